@@ -0,0 +1,27 @@
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(database=None):
+    '''
+        setup_django -> benchmark skriptlari uchun Django ni sozlaydi.
+        database berilsa, asosiy baza o'rniga shu sqlite fayl ishlatiladi
+        va unga migratsiyalar qo'llanadi.
+    '''
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'room_booking.settings')
+
+    from django.conf import settings
+
+    if database is not None:
+        settings.DATABASES['default']['NAME'] = str(database)
+
+    import django
+    django.setup()
+
+    if database is not None:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
@@ -0,0 +1,165 @@
+'''
+    Sync (DRF APIView) va async (Django async view) o'qish endpointlarining
+    uvicorn ostidagi yuk testi: har bir endpoint uchun bir xil parallel
+    ulanishlar soni bilan so'rovlar/sekund va p50/p99 kechikish.
+
+    ishlatish:
+        python -m benchmarks.async_load --rooms 200 --concurrency 32 --duration 10
+'''
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks import BASE_DIR, setup_django
+
+DATE = date(2023, 7, 3)
+
+
+def seed(rooms, per_day):
+    import random
+    from django.utils import timezone
+    from booking.models import Booking, Resident, Room
+    from booking.signals import bookings_changed
+    from booking.search import index_rooms, normalize_name
+
+    rng = random.Random(42)
+    resident = Resident.objects.create(name='benchmark')
+    rooms = Room.objects.bulk_create([
+        Room(name=f'room {i}', normalized_name=normalize_name(f'room {i}'),
+             type=rng.choice(Room.ROOM_TYPES)[0], capacity=rng.randint(1, 30))
+        for i in range(rooms)
+    ])
+    index_rooms(rooms)
+
+    bookings = []
+    for room in rooms:
+        for hour in sorted(rng.sample(range(8, 20), per_day)):
+            start = timezone.make_aware(datetime.combine(DATE, datetime.min.time()) + timedelta(hours=hour))
+            bookings.append(Booking(room=room, resident=resident, start=start, end=start + timedelta(minutes=45)))
+    Booking.objects.bulk_create(bookings)
+    bookings_changed(added=[(b.room_id, b.start, b.end) for b in bookings], rooms={r.pk: r for r in rooms})
+    return rooms
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database, port, workers=1, env=None):
+    env = dict(
+        os.environ, **(env or {}), DJANGO_SETTINGS_MODULE='benchmarks.settings', BENCHMARK_DATABASE=str(database)
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'room_booking.asgi:application', '--workers', str(workers),
+         '--port', str(port), '--log-level', 'warning', '--no-access-log'],
+        cwd=BASE_DIR, env=env,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("uvicorn ishga tushmadi")
+
+
+async def request(reader, writer, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n\r\n'.encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port, path, concurrency, duration):
+    '''
+        load -> `concurrency` ta keep-alive ulanish orqali `duration`
+        sekund davomida so'rov yuboradi.
+    '''
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await request(reader, writer, path)
+            latencies.append(time.perf_counter() - started)
+            if status >= 500:
+                errors += 1
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--per-day', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / 'benchmark.sqlite3'
+        setup_django(database)
+        rooms = seed(args.rooms, args.per_day)
+        pk = rooms[0].pk
+
+        endpoints = {
+            'room_list': ('/api/rooms/?page=3', '/api/async/rooms/?page=3'),
+            'room_detail': (f'/api/rooms/{pk}/', f'/api/async/rooms/{pk}/'),
+            'availability': (
+                f'/api/rooms/{pk}/availability/?date={DATE}', f'/api/async/rooms/{pk}/availability/?date={DATE}'
+            ),
+            'rooms_availability': (
+                f'/api/rooms/availability/?date={DATE}', f'/api/async/rooms/availability/?date={DATE}'
+            ),
+        }
+
+        port = free_port()
+        server = start_server(database, port)
+        try:
+            report = {'rooms': args.rooms, 'concurrency': args.concurrency, 'duration': args.duration}
+            for name, (sync_path, async_path) in endpoints.items():
+                report[name] = {
+                    'sync': asyncio.run(load(port, sync_path, args.concurrency, args.duration)),
+                    'async': asyncio.run(load(port, async_path, args.concurrency, args.duration)),
+                }
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+'''
+    Asosiy endpointlar benchmarki: xonalar ro'yhati, xona, xonaning bo'sh
+    vaqtlari va xonani band qilish (muvaffaqiyatli va band vaqtga).
+
+    Har bir stsenariy ikki usulda o'lchanadi:
+      - in_process: Django test Client orqali ketma-ket, har bir so'rovdagi
+        SQL so'rovlari soni bilan
+      - server: uvicorn (--workers) ostida `concurrency` ta keep-alive
+        ulanish bilan
+
+    Natija JSON da: so'rovlar/sekund, p50/p95/p99 (ms), so'rovga to'g'ri
+    keladigan SQL so'rovlari. --baseline fayli bilan solishtirilganda
+    regressiya bo'lsa exit code 1.
+
+    ishlatish:
+        python -m benchmarks.endpoints --baseline benchmarks/baseline.json
+        python -m benchmarks.endpoints --save-baseline benchmarks/baseline.json
+'''
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks import setup_django
+from benchmarks.async_load import free_port, start_server
+
+SCENARIOS = ['room_list', 'room_detail', 'availability', 'book', 'book_conflict']
+
+# stsenariy -> kutilgan HTTP status
+EXPECTED_STATUS = {'book': 201, 'book_conflict': 410}
+
+# solishtiriladigan ko'rsatkichlar: (nomi, yaxshisi katta qiymatmi). p99 faqat
+# hisobotda: qisqa yugurishda u bir necha sekin so'rovga bog'liq va barqaror emas
+COMPARED = [('rps', True), ('p95_ms', False)]
+
+
+def seed(rooms, days, per_day):
+    '''
+        seed -> rooms ta xona va ertangi kundan boshlab days kun davomida
+        har bir xonaga kuniga per_day ta (8:00 dan 19:00 gacha, soat
+        boshida 45 daqiqalik) bookingni bulk_create bilan yaratadi.
+        Bo'sh oraliqlar, rollup va versiyalar bitta bookings_changed
+        chaqiruvida yangilanadi.
+    '''
+    from django.utils import timezone
+    from booking.models import Booking, Resident, Room
+    from booking.search import index_rooms, normalize_name
+    from booking.signals import bookings_changed
+
+    rng = random.Random(42)
+    resident = Resident.objects.create(name='benchmark')
+    rooms = Room.objects.bulk_create([
+        Room(name=f'room {i}', normalized_name=normalize_name(f'room {i}'),
+             type=rng.choice(Room.ROOM_TYPES)[0], capacity=rng.randint(1, 30))
+        for i in range(rooms)
+    ])
+    index_rooms(rooms)
+
+    dates = [timezone.localdate() + timedelta(days=day) for day in range(1, days + 1)]
+    bookings = []
+    for room in rooms:
+        for date_ in dates:
+            for hour in sorted(rng.sample(range(8, 20), per_day)):
+                start = timezone.make_aware(datetime.combine(date_, datetime.min.time()) + timedelta(hours=hour))
+                bookings.append(Booking(room=room, resident=resident, start=start, end=start + timedelta(minutes=45)))
+    Booking.objects.bulk_create(bookings, batch_size=5000)
+    bookings_changed(
+        added=[(booking.room_id, booking.start, booking.end, booking.pk) for booking in bookings],
+        rooms={room.pk: room for room in rooms},
+    )
+    return [room.pk for room in rooms], dates, bookings
+
+
+def booking_body(start, end):
+    return json.dumps({
+        'resident': {'name': 'benchmark'},
+        'start': start.strftime('%d-%m-%Y %H:%M:%S'),
+        'end': end.strftime('%d-%m-%Y %H:%M:%S'),
+    })
+
+
+def make_requests(room_ids, dates, bookings):
+    '''
+        make_requests -> {stsenariy: cheksiz (method, path, body) iteratori}.
+
+        book -> har bir soatning 45-60 daqiqalaridagi bo'sh oraliqdagi
+        takrorlanmaydigan 5 daqiqalik vaqtlar, book_conflict -> seed
+        qilingan bookinglar bilan kesishadigan vaqtlar.
+    '''
+    from django.utils import timezone
+
+    rng = random.Random(7)
+    pages = math.ceil(len(room_ids) / 10)
+
+    def book():
+        for date_, hour, minute, pk in itertools.product(dates, range(8, 20), (45, 50, 55), room_ids):
+            start = timezone.make_aware(datetime.combine(date_, datetime.min.time()) + timedelta(hours=hour, minutes=minute))
+            yield 'POST', f'/api/rooms/{pk}/book/', booking_body(start, start + timedelta(minutes=5))
+
+    def book_conflict():
+        while True:
+            booking = rng.choice(bookings)
+            start = booking.start + timedelta(minutes=15)
+            yield 'POST', f'/api/rooms/{booking.room_id}/book/', booking_body(start, start + timedelta(minutes=15))
+
+    return {
+        'room_list': (('GET', f'/api/rooms/?page={rng.randint(1, pages)}', None) for _ in itertools.count()),
+        'room_detail': (('GET', f'/api/rooms/{rng.choice(room_ids)}/', None) for _ in itertools.count()),
+        'availability': (
+            ('GET', f'/api/rooms/{rng.choice(room_ids)}/availability/?date={rng.choice(dates)}', None)
+            for _ in itertools.count()
+        ),
+        'book': book(),
+        'book_conflict': book_conflict(),
+    }
+
+
+def percentile(latencies, fraction):
+    # latencies tartiblangan, nearest-rank usuli
+    return latencies[max(math.ceil(fraction * len(latencies)) - 1, 0)]
+
+
+def summarize(latencies, elapsed, errors, queries=None):
+    latencies = sorted(latencies)
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(queries / len(latencies), 2)
+    return summary
+
+
+def run_in_process(requests, count, warmup):
+    '''
+        run_in_process -> har bir stsenariydan warmup + count ta so'rovni
+        test Client orqali ketma-ket yuboradi.
+    '''
+    from django.test import Client
+    from booking.query_budget import capture_queries
+
+    client = Client()
+    report = {}
+    for name in SCENARIOS:
+        expected = EXPECTED_STATUS.get(name, 200)
+        for method, path, body in itertools.islice(requests[name], warmup):
+            client.generic(method, path, body or '', content_type='application/json')
+
+        latencies, errors = [], 0
+        with capture_queries() as stats:
+            started = time.perf_counter()
+            for method, path, body in itertools.islice(requests[name], count):
+                request_started = time.perf_counter()
+                response = client.generic(method, path, body or '', content_type='application/json')
+                latencies.append(time.perf_counter() - request_started)
+                errors += response.status_code != expected
+            elapsed = time.perf_counter() - started
+        report[name] = summarize(latencies, elapsed, errors, stats.count)
+    return report
+
+
+async def send(reader, writer, method, path, body):
+    body = (body or '').encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port, requests, expected, concurrency, duration):
+    '''
+        load -> `concurrency` ta keep-alive ulanish orqali `duration`
+        sekund davomida requests iteratoridagi so'rovlarni yuboradi.
+    '''
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        while time.perf_counter() < deadline:
+            method, path, body = next(requests)
+            started = time.perf_counter()
+            status = await send(reader, writer, method, path, body)
+            latencies.append(time.perf_counter() - started)
+            errors += status != expected
+        writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def run_server(database, requests, workers, concurrency, duration):
+    port = free_port()
+    server = start_server(database, port, workers=workers)
+    try:
+        return {
+            name: asyncio.run(load(port, requests[name], EXPECTED_STATUS.get(name, 200), concurrency, duration))
+            for name in SCENARIOS
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(report, baseline, tolerance):
+    '''
+        compare -> baseline ga nisbatan regressiyalar ro'yhati: SQL so'rovlari
+        soni oshishi (aniq), so'rovlar/sekund kamayishi yoki p95 oshishi
+        (tolerance ulushidan ko'p), kutilmagan statuslar.
+    '''
+    regressions = []
+    for mode in ('in_process', 'server'):
+        for name, current in report.get(mode, {}).items():
+            previous = baseline.get(mode, {}).get(name)
+            if previous is None:
+                continue
+            label = f'{mode}.{name}'
+            if current['errors']:
+                regressions.append(f"{label}: {current['errors']} ta kutilmagan status")
+            if current.get('queries_per_request', 0) > previous.get('queries_per_request', math.inf):
+                regressions.append(
+                    f"{label}.queries_per_request: {previous['queries_per_request']} -> {current['queries_per_request']}"
+                )
+            for metric, higher_is_better in COMPARED:
+                old, new = previous[metric], current[metric]
+                limit = old * (1 - tolerance) if higher_is_better else old * (1 + tolerance)
+                if (new < limit) if higher_is_better else (new > limit):
+                    regressions.append(f'{label}.{metric}: {old} -> {new}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--per-day', type=int, default=6)
+    parser.add_argument('--requests', type=int, default=300, help="in_process: har bir stsenariy uchun so'rovlar")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5, help='server: har bir stsenariy uchun sekund')
+    parser.add_argument('--skip-server', action='store_true')
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument('--save-baseline', type=Path)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / 'benchmark.sqlite3'
+        # in_process ham real server bilan bir xil sozlamalarda (DEBUG=False)
+        os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+        os.environ['BENCHMARK_DATABASE'] = str(database)
+        setup_django(database)
+
+        started = time.perf_counter()
+        room_ids, dates, bookings = seed(args.rooms, args.days, args.per_day)
+        report = {
+            'config': {
+                key: getattr(args, key)
+                for key in ('rooms', 'days', 'per_day', 'requests', 'workers', 'concurrency', 'duration')
+            },
+            'seed_seconds': round(time.perf_counter() - started, 2),
+        }
+
+        requests = make_requests(room_ids, dates, bookings)
+        report['in_process'] = run_in_process(requests, args.requests, args.warmup)
+        if not args.skip_server:
+            report['server'] = run_server(database, requests, args.workers, args.concurrency, args.duration)
+
+    if args.baseline:
+        report['regressions'] = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2) + '\n')
+
+    print(json.dumps(report, indent=2))
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+    GET /api/bookings/export/ xotira benchmarki: har xil sondagi bookinglar
+    uchun eksport vaqti va jarayonning maksimal xotirasi (ru_maxrss).
+    O'lchamlar o'sish tartibida ishlaydi, shuning uchun xotira oshsa
+    keyingi o'lchamda ko'rinadi.
+
+    ishlatish:
+        python -m benchmarks.export_memory --rows 10000 100000 1000000
+'''
+import argparse
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup_django
+
+
+def fill(room, resident, count):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM booking_booking")
+        cursor.execute(
+            """
+            WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s)
+            INSERT INTO booking_booking (room_id, resident_id, start, "end")
+            SELECT %s, %s, '2023-06-30 05:00:00', '2023-06-30 06:00:00' FROM seq
+            """,
+            [count, room.pk, resident.pk]
+        )
+
+
+def export(format):
+    from django.test import RequestFactory
+    from booking.export import BookingExportView
+
+    request = RequestFactory().get('/api/bookings/export/', {'format': format})
+    response = BookingExportView.as_view()(request)
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+def run(sizes, format):
+    from booking.models import Resident, Room
+
+    room = Room.objects.create(name='benchmark', type='team', capacity=5)
+    resident = Resident.objects.create(name='benchmark')
+
+    report = []
+    for count in sorted(sizes):
+        fill(room, resident, count)
+        started = time.perf_counter()
+        size = export(format)
+        report.append({
+            'rows': count,
+            'bytes': size,
+            'seconds': round(time.perf_counter() - started, 3),
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'benchmark.sqlite3')
+        print(json.dumps(run(args.rows, args.format), indent=2))
+
+
+if __name__ == '__main__':
+    main()
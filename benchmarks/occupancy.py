@@ -0,0 +1,164 @@
+'''
+    Ko'p xonali bandlik benchmarki: har bir xona va kun uchun Python sikli
+    (generate_available_times) va OccupancyGrid ning NumPy massivlari.
+    Ikkala usul ham bir xil natijani hisoblaydi: har bir xonaning bo'sh
+    oraliqlari, kunlik bandlik foizi va hech bo'lmasa bitta xona bo'sh
+    bo'lgan vaqtlar.
+
+    ishlatish:
+        python -m benchmarks.occupancy --rooms 300 --days 7
+'''
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks import setup_django
+
+
+def seed(rooms, days, per_day):
+    from django.utils import timezone
+    from booking.models import Booking, Resident, Room
+
+    rng = random.Random(42)
+    resident = Resident.objects.create(name='benchmark')
+    rooms = Room.objects.bulk_create([
+        Room(name=f'room {i}', normalized_name=f'room {i}', type=rng.choice(Room.ROOM_TYPES)[0], capacity=5)
+        for i in range(rooms)
+    ])
+
+    first = date(2023, 7, 3)
+    bookings = []
+    for room in rooms:
+        for day in range(days):
+            date_ = first + timedelta(days=day)
+            # kun davomida bir-biriga kesishmaydigan bookinglar
+            for hour in sorted(rng.sample(range(8, 20), per_day)):
+                start = timezone.make_aware(datetime.combine(date_, datetime.min.time()) + timedelta(hours=hour))
+                bookings.append(Booking(
+                    room=room, resident=resident, start=start,
+                    end=start + timedelta(minutes=rng.choice([15, 30, 45, 60]))
+                ))
+    Booking.objects.bulk_create(bookings, batch_size=5000)
+    return [first + timedelta(days=day) for day in range(days)]
+
+
+def python_loop(dates):
+    from django.db.models import Prefetch
+    from booking.models import Booking, Room
+    from booking.utils import day_range, free_intervals
+    from booking.views import RoomAvailabiltyAPIView
+
+    view = RoomAvailabiltyAPIView()
+    range_start, _ = day_range(dates[0])
+    _, range_end = day_range(dates[-1])
+    rooms = Room.objects.order_by('id').prefetch_related(Prefetch(
+        'bookings',
+        queryset=Booking.objects.filter(start__gte=range_start, start__lt=range_end).order_by('start'),
+        to_attr='range_bookings'
+    ))
+
+    result = {'free': [], 'utilization': [], 'any_free': []}
+    union = {date_: [] for date_ in dates}
+    for room in rooms:
+        by_date = {date_: [] for date_ in dates}
+        for booking in room.range_bookings:
+            by_date[booking.start.astimezone(range_start.tzinfo).date()].append(booking)
+        for date_ in dates:
+            opening_time = view.make_aware(date_, room.opening_time)
+            closing_time = view.make_aware(date_, room.closing_time)
+            bookings = by_date[date_]
+            result['free'].append(view.generate_available_times(opening_time, closing_time, bookings))
+            free = free_intervals(opening_time, closing_time, [(b.start, b.end) for b in bookings])
+            busy = sum((b.end - b.start).total_seconds() for b in bookings)
+            result['utilization'].append(busy / (closing_time - opening_time).total_seconds())
+            union[date_] += free
+
+    for date_ in dates:
+        merged = []
+        for start, end in sorted(union[date_]):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        result['any_free'].append(merged)
+    return result
+
+
+def numpy_grid(dates):
+    from booking.models import Room
+    from booking.occupancy import OccupancyGrid
+    from booking.utils import format_intervals
+
+    grid = OccupancyGrid.build(Room.objects.order_by('id'), dates)
+    spans = grid.all_room_spans()
+    free = [
+        format_intervals(spans[i, j])
+        for i in range(len(grid.rooms)) for j in range(len(dates))
+    ]
+    any_free = grid.any_free()
+    return {
+        'free': free,
+        'utilization': grid.utilization(axis=2),
+        'hours': grid.bucket_utilization(60),
+        'any_free': [grid.spans(any_free[j], j) for j in range(len(dates))],
+    }
+
+
+def numpy_aggregates(dates):
+    from booking.models import Room
+    from booking.occupancy import OccupancyGrid
+
+    grid = OccupancyGrid.build(Room.objects.order_by('id'), dates)
+    any_free = grid.any_free()
+    return {
+        'utilization': grid.utilization(axis=2),
+        'hours': grid.bucket_utilization(60),
+        'any_free': [grid.spans(any_free[j], j) for j in range(len(dates))],
+    }
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {'median_ms': round(timings[len(timings) // 2] * 1000, 3)}
+
+
+def run(rooms, days, per_day, repeat):
+    dates = seed(rooms, days, per_day)
+
+    # natijalar bir xil ekanini tekshirish
+    assert python_loop(dates)['free'] == numpy_grid(dates)['free']
+
+    return {
+        'rooms': rooms,
+        'days': days,
+        'bookings_per_day': per_day,
+        'python_loop': measure(lambda: python_loop(dates), repeat),
+        'numpy_grid': measure(lambda: numpy_grid(dates), repeat),
+        'numpy_aggregates_only': measure(lambda: numpy_aggregates(dates), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=300)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--per-day', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'benchmark.sqlite3')
+        print(json.dumps(run(args.rooms, args.days, args.per_day, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
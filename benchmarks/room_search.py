@@ -0,0 +1,101 @@
+'''
+    Xona nomi bo'yicha qidiruv benchmarki: `name__icontains` (LIKE '%x%')
+    va trigram indeksi, hamda dublikat tekshiruvi: icontains va
+    normalized_name bo'yicha nuqtaviy qidiruv.
+
+    ishlatish:
+        python -m benchmarks.room_search --rooms 100000
+'''
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup_django
+
+WORDS = [
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel',
+    'india', 'juliet', 'kilo', 'lima', 'mike', 'november', 'oscar', 'papa',
+    'quebec', 'romeo', 'sierra', 'tango', 'uniform', 'victor', 'whiskey',
+    'xray', 'yankee', 'zulu', 'mytaxi', 'workly', 'express',
+]
+
+
+def seed(count):
+    from booking.models import Room
+    from booking.search import index_rooms, normalize_name
+
+    rng = random.Random(42)
+    for offset in range(0, count, 10000):
+        rooms = []
+        for i in range(offset, min(offset + 10000, count)):
+            name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+            rooms.append(Room(
+                name=name,
+                normalized_name=normalize_name(name),
+                type=rng.choice(Room.ROOM_TYPES)[0],
+                capacity=rng.randint(1, 30),
+            ))
+        index_rooms(Room.objects.bulk_create(rooms))
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {'median_ms': round(timings[len(timings) // 2] * 1000, 3)}
+
+
+def run(rooms, repeat):
+    from booking.models import Room
+    from booking.search import search_rooms, normalize_name
+
+    seed(rooms)
+    report = {'rooms': rooms, 'search': {}, 'duplicate_check': {}}
+
+    # ro'yhat sahifasi kabi: birinchi 10 ta natija va COUNT(*)
+    for query in ['xray', 'tango sierra', '12345', 'nomavjud']:
+        icontains = Room.objects.filter(name__icontains=query)
+        trigram = search_rooms(Room.objects.all(), query)
+        report['search'][query] = {
+            'matches': trigram.count(),
+            'icontains': {
+                'page': measure(lambda: list(icontains[:10]), repeat),
+                'count': measure(icontains.count, repeat),
+            },
+            'trigram': {
+                'page': measure(lambda: list(trigram[:10]), repeat),
+                'count': measure(trigram.count, repeat),
+            },
+        }
+
+    name = 'golf hotel 777'
+    report['duplicate_check'] = {
+        'icontains': measure(
+            lambda: Room.objects.filter(name__icontains=name, type='team').exists(), repeat
+        ),
+        'normalized_name': measure(
+            lambda: Room.objects.filter(normalized_name=normalize_name(name), type='team').exists(), repeat
+        ),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(Path(directory) / 'benchmark.sqlite3')
+        print(json.dumps(run(args.rooms, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
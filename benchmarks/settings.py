@@ -0,0 +1,12 @@
+'''
+    Real server (uvicorn) benchmarklari uchun sozlamalar: asosiy
+    sozlamalar, faqat baza BENCHMARK_DATABASE faylidan olinadi.
+'''
+import os
+
+from room_booking.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DATABASE']  # noqa: F405
+QUERY_BUDGET_ENFORCE = DEBUG
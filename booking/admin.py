@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Resident, Room, Booking
+from .models import Resident, Room, Booking, BookingSeries
 
 
 admin.site.register(Resident)
 admin.site.register(Room)
 admin.site.register(Booking)
+admin.site.register(BookingSeries)
@@ -0,0 +1,73 @@
+from django.db import connection
+from django.utils import timezone
+
+from .models import ArchivedBooking, Booking
+from .transactions import write_transaction
+
+ARCHIVE_FIELDS = ['id', 'resident', 'room', 'start', 'end', 'series']
+
+
+def booking_tables(fields, **filters):
+    '''
+        booking_tables -> Booking va ArchivedBooking dan filters bo'yicha
+        fields qiymatlarini o'qiydigan ikkita alohida so'rovni (avval
+        asosiy, keyin arxiv jadvali) qaytaradi.
+    '''
+    return (
+        Booking.objects.filter(**filters).values_list(*fields),
+        ArchivedBooking.objects.filter(**filters).values_list(*fields),
+    )
+
+
+def all_bookings(fields, order_by=(), **filters):
+    '''
+        all_bookings -> Booking va ArchivedBooking dan filters bo'yicha
+        fields qiymatlarini bitta UNION ALL so'rovi bilan o'qiydi.
+        order_by faqat fields ichidagi maydonlar bo'yicha bo'lishi mumkin.
+    '''
+    hot, cold = booking_tables(fields, **filters)
+    rows = hot.union(cold, all=True)
+    if order_by:
+        rows = rows.order_by(*order_by)
+    return rows
+
+
+def column(model, name):
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+def archive_chunk(cutoff, chunk_size):
+    '''
+        archive_chunk -> cutoff dan oldin tugagan eng kichik id li
+        chunk_size ta bookingni bitta qisqa tranzaksiyada ArchivedBooking ga
+        ko'chiradi (INSERT ... SELECT va DELETE) va ko'chirilganlar sonini
+        qaytaradi.
+
+        Booking qatorlari signalsiz o'chiriladi: bu o'chirish emas, shuning
+        uchun RoomDailyUsage, RoomDayFreeInterval, versiyalar va BookingEvent
+        o'zgarmaydi.
+    '''
+    with write_transaction():
+        ids = list(Booking.objects.filter(
+            end__lt=cutoff
+        ).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return 0
+
+        ops = connection.ops
+        columns = ', '.join(column(Booking, name) for name in ARCHIVE_FIELDS)
+        hot = ops.quote_name(Booking._meta.db_table)
+        cold = ops.quote_name(ArchivedBooking._meta.db_table)
+        # tranzaksiya yozish qulfi ostida, shuning uchun ikkala so'rov bir xil qatorlarni oladi
+        where = f"{column(Booking, 'end')} < %s AND {column(Booking, 'id')} <= %s"
+        params = [ops.adapt_datetimefield_value(cutoff), ids[-1]]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {cold} ({columns}, {column(ArchivedBooking, 'archived_at')}) "
+                f"SELECT {columns}, %s FROM {hot} WHERE {where}",
+                [ops.adapt_datetimefield_value(timezone.now()), *params]
+            )
+            cursor.execute(f"DELETE FROM {hot} WHERE {where}", params)
+        return len(ids)
+
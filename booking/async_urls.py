@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .async_views import room_list, room_detail, room_availability, rooms_availability
+
+
+urlpatterns = [
+    path('', room_list, name='async-rooms'),
+    path('availability/', rooms_availability, name='async-rooms-availability'),
+    path('<int:pk>/', room_detail, name='async-room-detail'),
+    path("<int:pk>/availability/", room_availability, name='async-availability'),
+]
@@ -0,0 +1,209 @@
+import asyncio
+
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils import timezone
+
+from .cache import availability_cache
+from .conditional import etag_matches, make_etag, set_conditional_headers
+from .holds import aday_holds, holds_pending, subtract_holds
+from .index import booking_index
+from .materialized import aread_day, day_hours, rows_to_intervals
+from .models import Room, RoomDayFreeInterval
+from .search import search_rooms
+from .serializers import RoomSerializer
+from .utils import format_intervals, free_intervals, parse_date, trim_intervals
+from .versions import ROOMS_KEY, aget_versions, room_day_key, room_holds_key, room_key
+
+PAGE_SIZE = 10
+CACHE_CONTROL = {'no_cache': True}
+
+
+def json_response(data, status=200):
+    # DRF JSONRenderer bilan bir xil ko'rinish
+    return JsonResponse(
+        data, status=status, safe=False,
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False}
+    )
+
+
+def error(message, status):
+    return json_response({"error": message}, status=status)
+
+
+def get_date(request):
+    '''
+        get_date -> RoomAvailabiltyAPIView.get_date kabi: `search` yoki
+        `date` parametri, berilmasa bugungi sana.
+    '''
+    value = request.GET.get('search') or request.GET.get('date')
+    return parse_date(value) if value else timezone.localdate()
+
+
+def get_now():
+    return timezone.localtime().replace(second=0, microsecond=0)
+
+
+def conditional(request, versions, extra=None):
+    '''
+        conditional -> (etag, 304 javobi yoki None): ConditionalGetMixin
+        ning async view lar uchun varianti, versiyalar aget_versions dan.
+    '''
+    etag = make_etag(request, versions, extra)
+    if etag_matches(request, etag):
+        return etag, set_conditional_headers(HttpResponseNotModified(), etag, CACHE_CONTROL)
+    return etag, None
+
+
+async def room_list(request):
+    '''
+        room_list -> GET /api/rooms ning async varianti (page/count
+        sahifalash). Sahifa va COUNT(*) so'rovlari bir vaqtda yuboriladi.
+    '''
+    etag, not_modified = conditional(request, await aget_versions([ROOMS_KEY]))
+    if not_modified:
+        return not_modified
+
+    queryset = Room.objects.order_by('id')
+    search_name = request.GET.get('search')
+    type = request.GET.get('type')
+    if search_name:
+        queryset = search_rooms(queryset, search_name)
+    if type:
+        queryset = queryset.filter(type=type)
+
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = min(max(int(request.GET.get('page_size', PAGE_SIZE)), 1), PAGE_SIZE)
+    except ValueError:
+        return json_response({"detail": "Invalid page."}, status=404)
+    if page < 1:
+        return json_response({"detail": "Invalid page."}, status=404)
+
+    offset = (page - 1) * page_size
+
+    async def fetch_page():
+        return [room async for room in queryset[offset:offset + page_size]]
+
+    count, rooms = await asyncio.gather(queryset.acount(), fetch_page())
+    if not rooms and page != 1:
+        return json_response({"detail": "Invalid page."}, status=404)
+
+    response = json_response({
+        'page': page,
+        'count': count,
+        'page_size': page_size,
+        'results': RoomSerializer(rooms, many=True).data,
+    })
+    return set_conditional_headers(response, etag, CACHE_CONTROL)
+
+
+async def room_detail(request, pk):
+    etag, not_modified = conditional(request, await aget_versions([ROOMS_KEY]))
+    if not_modified:
+        return not_modified
+
+    try:
+        room = await Room.objects.aget(pk=pk)
+    except Room.DoesNotExist:
+        return error("topilmadi", 404)
+    return set_conditional_headers(json_response(RoomSerializer(room).data), etag, CACHE_CONTROL)
+
+
+async def read_intervals(room, date, generation):
+    # BookingIndex generation ga mos bo'lsa undan, aks holda jadvaldan
+    index = booking_index.current(room.pk, generation) if date >= timezone.localdate() else None
+    if index is not None:
+        return free_intervals(*day_hours(room, date), index.day(date))
+    return await aread_day(room, date)
+
+
+async def room_availability(request, pk):
+    '''
+        room_availability -> GET /api/rooms/<pk>/availability ning async
+        varianti: kesh va RoomDayFreeInterval async ORM orqali o'qiladi.
+    '''
+    try:
+        date = get_date(request)
+    except ValueError:
+        return error("sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting", 400)
+
+    today = date == timezone.localdate()
+    holds_key = room_holds_key(pk, date)
+    versions = await aget_versions([ROOMS_KEY, room_day_key(pk, date), holds_key, room_key(pk)])
+    generation, _ = versions.pop(room_key(pk))
+    pending = holds_pending(versions, holds_key)
+    extra = get_now().isoformat() if today else None
+    if pending:
+        extra = [extra, timezone.now().isoformat()]
+    etag, not_modified = conditional(request, versions, extra)
+    if not_modified:
+        return not_modified
+
+    try:
+        room = await Room.objects.aget(pk=pk)
+    except Room.DoesNotExist:
+        return error("topilmadi", 404)
+
+    day_version, _ = versions[room_day_key(pk, date)]
+    intervals = await availability_cache.aget_or_set(
+        room, date, lambda: read_intervals(room, date, generation), day_version
+    )
+    if pending:
+        holds = await aday_holds(date, [room.pk])
+        intervals = subtract_holds(intervals, holds.get(room.pk, []))
+    if today:
+        intervals = trim_intervals(intervals, get_now())
+
+    data = format_intervals(intervals)
+    if not data:
+        response = json_response(
+            {"message": f"{date} sanasi uchun {room.name} xonasida bo'sh vaqtlar mavjud emas! :("},
+            status=404
+        )
+    else:
+        response = set_conditional_headers(json_response(data), etag, CACHE_CONTROL)
+    return response
+
+
+async def rooms_availability(request):
+    '''
+        rooms_availability -> GET /api/rooms/availability ning async
+        varianti. Xonalar, shu sanadagi bo'sh oraliqlar va faol holdlar
+        bir-biriga bog'liq bo'lmagan so'rovlar sifatida bir vaqtda yuboriladi.
+    '''
+    try:
+        date = get_date(request)
+    except ValueError:
+        return error("sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting", 400)
+    try:
+        min_capacity = request.GET.get('min_capacity')
+        min_capacity = int(min_capacity) if min_capacity else None
+    except ValueError:
+        return error("min_capacity butun son bo'lishi kerak", 400)
+
+    rooms = Room.objects.order_by('id')
+    type = request.GET.get('type')
+    if type:
+        rooms = rooms.filter(type=type)
+    if min_capacity is not None:
+        rooms = rooms.filter(capacity__gte=min_capacity)
+    rows = RoomDayFreeInterval.objects.filter(date=date).order_by('start').values_list('room_id', 'start', 'end')
+
+    async def fetch(queryset):
+        return [item async for item in queryset]
+
+    rooms, rows, holds = await asyncio.gather(fetch(rooms), fetch(rows), aday_holds(date))
+
+    by_room = {}
+    for room_id, start, end in rows:
+        by_room.setdefault(room_id, []).append((start, end))
+
+    now = get_now()
+    data = []
+    for room in rooms:
+        intervals = rows_to_intervals(room, date, by_room.get(room.pk, []))
+        intervals = subtract_holds(intervals, holds.get(room.pk, []))
+        if date == timezone.localdate():
+            intervals = trim_intervals(intervals, now)
+        data.append({**RoomSerializer(room).data, "available": format_intervals(intervals)})
+    return json_response(data)
@@ -0,0 +1,106 @@
+import threading
+
+from django.core.cache import caches
+
+
+class AvailabilityCache:
+    '''
+        AvailabilityCache -> xonaning bir kunlik bo'sh oraliqlarini
+        (xona id, sana) kaliti bo'yicha keshlaydi.
+
+        maqsadi -> bo'sh vaqtlarni har bir so'rovda bazadan qayta
+        hisoblamaslik. Yozuv birinchi o'qishda to'ldiriladi, booking
+        saqlanganda yoki o'chirilganda invalidate qilinadi. Qiymat bilan
+        birga xonaning ish vaqti versiyasi va room_day_key hisoblagichi
+        saqlanadi: ish vaqti o'zgarsa yoki boshqa worker shu kunga yozsa
+        (invalidate faqat shu jarayonda ishlaydi) eski yozuv keyingi
+        o'qishda qayta hisoblanadi.
+    '''
+
+    def __init__(self, alias='availability'):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, room_id, date_):
+        return f"availability:{room_id}:{date_.isoformat()}"
+
+    def hours_version(self, room):
+        return f"{room.opening_time.isoformat()}-{room.closing_time.isoformat()}"
+
+    def entry_version(self, room, day_version):
+        return self.hours_version(room), day_version
+
+    def get_or_set(self, room, date_, fill, day_version=None):
+        '''
+            get_or_set -> keshdan (room, date_) uchun bo'sh oraliqlarni
+            qaytaradi, yo'q bo'lsa, xonaning ish vaqti yoki day_version
+            (so'rov boshida o'qilgan room_day_key qiymati) o'zgargan
+            bo'lsa fill() natijasini keshga yozadi.
+        '''
+        key = self.make_key(room.pk, date_)
+        version = self.entry_version(room, day_version)
+        cached = self.cache.get(key)
+
+        if cached is not None and cached[0] == version:
+            self._count(hit=True)
+            return cached[1]
+
+        self._count(hit=False)
+        intervals = fill()
+        self.cache.set(key, (version, intervals))
+        return intervals
+
+    async def aget_or_set(self, room, date_, fill, day_version=None):
+        '''
+            aget_or_set -> get_or_set ning async varianti, fill() korutina
+            qaytaradi.
+        '''
+        key = self.make_key(room.pk, date_)
+        version = self.entry_version(room, day_version)
+        cached = await self.cache.aget(key)
+
+        if cached is not None and cached[0] == version:
+            self._count(hit=True)
+            return cached[1]
+
+        self._count(hit=False)
+        intervals = await fill()
+        await self.cache.aset(key, (version, intervals))
+        return intervals
+
+    def invalidate(self, room_id, date_):
+        self.cache.delete(self.make_key(room_id, date_))
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self):
+        self.cache.clear()
+        self.reset_stats()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+availability_cache = AvailabilityCache()
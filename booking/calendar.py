@@ -0,0 +1,129 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from .archive import all_bookings
+from .models import Room
+from .utils import day_range
+from .versions import get_versions, room_key
+
+
+def escape_text(value):
+    '''
+        escape_text -> iCalendar TEXT qiymatidagi maxsus belgilarni
+        (RFC 5545, 3.3.11) ekranlaydi.
+    '''
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    '''
+        fold_line -> 75 baytdan uzun qatorlarni RFC 5545 bo'yicha keyingi
+        qatorga bo'shliq bilan o'tkazadi.
+    '''
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts, current = [], b''
+    for char in line:
+        char = char.encode()
+        if len(current) + len(char) > (75 if not parts else 74):
+            parts.append(current)
+            current = b''
+        current += char
+    parts.append(current)
+    return '\r\n '.join(part.decode() for part in parts) + '\r\n'
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def calendar_stream(room, bookings, stamp, chunk_size):
+    '''
+        calendar_stream -> xona bookinglaridan VCALENDAR matnini bo'laklab
+        hosil qiladi. DTSTAMP versiya o'zgargan vaqt, shuning uchun bir
+        versiyaning javobi har doim bir xil.
+    '''
+    yield ''.join(fold_line(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//impact_room_booking_api//room calendar//UZ',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(room.name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ])
+
+    chunk = []
+    for id, start, end, resident in bookings:
+        chunk += [
+            'BEGIN:VEVENT',
+            f'UID:booking-{id}@room-{room.pk}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{format_utc(start)}',
+            f'DTEND:{format_utc(end)}',
+            f'SUMMARY:{escape_text(room.name)}: {escape_text(resident)}',
+            'END:VEVENT',
+        ]
+        if len(chunk) >= chunk_size:
+            yield ''.join(fold_line(line) for line in chunk)
+            chunk = []
+
+    chunk.append('END:VCALENDAR')
+    yield ''.join(fold_line(line) for line in chunk)
+
+
+class RoomCalendarView(View):
+    '''
+        RoomCalendarView -> xonaning jadvalini iCalendar (.ics) obunasi
+        sifatida qaytaradi.
+
+        maqsadi -> kalendar ilovalari har bir necha daqiqada so'rov
+        yuboradi. ETag va Last-Modified `room:<pk>` versiya hisoblagichidan
+        olinadi, shuning uchun o'zgarmagan jadval uchun booking jadvaliga
+        tegmasdan, bitta so'rov bilan 304 qaytariladi.
+    '''
+
+    def get(self, request, pk, *args, **kwargs):
+        today = timezone.localdate()
+        version, updated_at = get_versions([room_key(pk)])[room_key(pk)]
+        # oraliq bugungi sanaga bog'liq, shuning uchun u ham ETag ga kiradi
+        etag = quote_etag(f'room-{pk}-{version}-{today.isoformat()}')
+        last_modified = int(updated_at.timestamp()) if updated_at else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            try:
+                room = Room.objects.get(pk=pk)
+            except Room.DoesNotExist:
+                return JsonResponse({"error": "topilmadi"}, status=404)
+
+            range_start, _ = day_range(today - timedelta(days=settings.ROOM_CALENDAR_PAST_DAYS))
+            _, range_end = day_range(today + timedelta(days=settings.ROOM_CALENDAR_FUTURE_DAYS))
+            bookings = all_bookings(
+                ['id', 'start', 'end', 'resident__name'], order_by=['start'],
+                room_id=pk, start__gte=range_start, start__lt=range_end,
+            )
+
+            chunk_size = settings.BOOKING_EXPORT_CHUNK_SIZE
+            stamp = format_utc(updated_at or timezone.now().replace(microsecond=0))
+            response = StreamingHttpResponse(
+                calendar_stream(room, bookings.iterator(chunk_size=chunk_size), stamp, chunk_size),
+                content_type='text/calendar; charset=utf-8'
+            )
+            response['Content-Disposition'] = f'inline; filename="room-{pk}.ics"'
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, max_age=settings.ROOM_CALENDAR_MAX_AGE)
+        return response
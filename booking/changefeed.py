@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .models import BookingEvent
+from .utils import format_intervals
+
+logger = logging.getLogger('booking.changefeed')
+
+
+def record_events(added=(), removed=()):
+    '''
+        record_events -> (room_id, start, end, booking_id) o'zgarishlarini
+        BookingEvent outbox jadvaliga yozadi. Booking bilan bir
+        tranzaksiyada chaqiriladi.
+    '''
+    BookingEvent.objects.bulk_create([
+        BookingEvent(kind=kind, room_id=room_id, start=start, end=end, booking_id=booking_id)
+        for kind, changes in ((BookingEvent.DELETED, removed), (BookingEvent.CREATED, added))
+        for room_id, start, end, booking_id in changes
+    ])
+
+
+def event_data(event):
+    interval, = format_intervals([(event.start, event.end)])
+    return {
+        "id": event.pk,
+        "type": event.kind,
+        "booking": event.booking_id,
+        "room": event.room_id,
+        **interval,
+    }
+
+
+def format_event(event):
+    '''
+        format_event -> hodisani SSE ko'rinishiga o'tkazadi.
+    '''
+    data = json.dumps(event_data(event), ensure_ascii=False)
+    return f"id: {event.pk}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+class Subscription:
+    def __init__(self, rooms):
+        self.rooms = rooms
+        self.queue = asyncio.Queue()
+
+    def wants(self, event):
+        return self.rooms is None or event.room_id in self.rooms
+
+
+class ChangeBroker:
+    '''
+        ChangeBroker -> jarayon ichidagi pub/sub.
+
+        maqsadi -> har bir SSE ulanishi bazani alohida so'ramasligi:
+        jarayonda bitta fon vazifasi BookingEvent outbox jadvalidan yangi
+        hodisalarni o'qiydi va ularni obunachilarga tarqatadi. Boshqa
+        worker jarayonlarida yozilgan hodisalar ham shu jadval orqali
+        CHANGEFEED_POLL_INTERVAL ichida yetib keladi, shu jarayondagi
+        yozuvlar esa commit dan keyin notify() orqali darhol uyg'otadi.
+
+        id lar commit tartibida ko'rinmasligi mumkin (PostgreSQL sequence),
+        shuning uchun ketma-ketlikdagi bo'shliqdan keyingi hodisalar
+        bo'shliq to'lguncha yoki CHANGEFEED_GAP_TIMEOUT o'tguncha
+        (rollback bo'lgan tranzaksiya) ushlab turiladi.
+    '''
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.task = None
+        self.wakeup = None
+        self.last_id = 0
+        self.gap_since = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is loop and self.task and not self.task.done():
+            return
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+        self.last_id = (await BookingEvent.objects.aaggregate(last=Max('id')))['last'] or 0
+        self.gap_since = None
+        self.task = loop.create_task(self.run())
+
+    def notify(self):
+        '''
+            notify -> shu jarayondagi yozuv commit bo'lgach fon vazifasini
+            uyg'otadi. Istalgan oqimdan chaqirish mumkin.
+        '''
+        loop, wakeup = self.loop, self.wakeup
+        if loop is None or wakeup is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # loop yopilgan
+            pass
+
+    async def subscribe(self, rooms):
+        await self.start()
+        subscription = Subscription(rooms)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.CHANGEFEED_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if not self.subscribers:
+                continue
+            try:
+                await self.poll()
+            except Exception:
+                # baza vaqtincha ishlamasa yoziladi va bir poll oralig'i
+                # kutib qayta uriniladi (notify() uyg'otishlari bilan
+                # ketma-ket qayta urinishlar bo'lmaydi)
+                logger.exception("changefeed: hodisalarni o'qib bo'lmadi")
+                await asyncio.sleep(settings.CHANGEFEED_POLL_INTERVAL)
+
+    async def poll(self):
+        events = [
+            event async for event in BookingEvent.objects.filter(
+                id__gt=self.last_id
+            ).order_by('id')[:1000]
+        ]
+        for event in self.contiguous(events):
+            self.last_id = event.pk
+            for subscription in list(self.subscribers):
+                if subscription.wants(event):
+                    subscription.queue.put_nowait(event)
+
+    def contiguous(self, events):
+        expected = self.last_id + 1
+        for event in events:
+            if event.pk != expected:
+                if self.gap_since is None:
+                    self.gap_since = time.monotonic()
+                if time.monotonic() - self.gap_since < settings.CHANGEFEED_GAP_TIMEOUT:
+                    return
+            self.gap_since = None
+            yield event
+            expected = event.pk + 1
+
+
+change_broker = ChangeBroker()
+
+
+def parse_rooms(value):
+    if not value:
+        return None
+    return {int(room) for room in value.split(',') if room.strip()}
+
+
+async def stream_events(rooms, last_event_id):
+    '''
+        stream_events -> SSE oqimi: Last-Event-ID dan keyingi saqlangan
+        hodisalar, keyin jonli hodisalar va keep-alive izohlari.
+    '''
+    subscription = await change_broker.subscribe(rooms)
+    try:
+        yield f"retry: {int(settings.CHANGEFEED_POLL_INTERVAL * 3000)}\n\n"
+
+        last_sent = last_event_id
+        if last_event_id is not None:
+            # obuna backlog dan oldin ochilgan, shuning uchun oradagi
+            # hodisalar navbatda turadi va takrorlanmaydi
+            backlog = BookingEvent.objects.filter(
+                id__gt=last_event_id, id__lte=change_broker.last_id
+            ).order_by('id')
+            if subscription.rooms is not None:
+                backlog = backlog.filter(room_id__in=subscription.rooms)
+            async for event in backlog:
+                last_sent = event.pk
+                yield format_event(event)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.CHANGEFEED_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if last_sent is not None and event.pk <= last_sent:
+                continue
+            last_sent = event.pk
+            yield format_event(event)
+    finally:
+        change_broker.unsubscribe(subscription)
+
+
+async def changes_stream(request):
+    '''
+        changes_stream -> GET /api/rooms/changes/stream?rooms=1,2,3
+
+        booking yaratilishi va o'chirilishi hodisalarini Server-Sent
+        Events orqali yuboradi. Uzilgandan keyin brauzer Last-Event-ID
+        sarlavhasini yuboradi va oqim shu hodisadan davom etadi. Uzoq
+        ochiq turadigan ulanish bo'lgani uchun ASGI server talab qilinadi.
+    '''
+    try:
+        rooms = parse_rooms(request.GET.get('rooms'))
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse(
+            {"error": "rooms va Last-Event-ID butun sonlar bo'lishi kerak"}, status=400
+        )
+
+    response = StreamingHttpResponse(
+        stream_events(rooms, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx javobni buferlamasligi uchun
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+
+from .versions import get_versions
+
+
+def make_etag(request, versions, extra=None):
+    '''
+        make_etag -> versiyalar ({key: (value, updated_at)}), so'rov yo'li
+        va Accept sarlavhasidan ETag hisoblaydi.
+    '''
+    payload = json.dumps([
+        sorted((key, value) for key, (value, _) in versions.items()),
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        extra,
+    ], default=str)
+    return quote_etag(hashlib.sha1(payload.encode()).hexdigest()[:32])
+
+
+def etag_matches(request, etag):
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return '*' in etags or etag in etags
+
+
+def set_conditional_headers(response, etag, cache_control):
+    response['ETag'] = etag
+    patch_cache_control(response, **cache_control)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+class ConditionalGetMixin:
+    '''
+        ConditionalGetMixin -> APIView lar uchun ETag / If-None-Match.
+
+        maqsadi -> tez-tez so'raladigan (dashboard lar har 10 sekundda)
+        javoblar uchun ma'lumotni yuklamasdan, faqat ChangeCounter
+        versiyalaridan ETag hisoblash. Mijozdagi ETag mos kelsa 304
+        qaytariladi va asosiy so'rovlar bajarilmaydi.
+
+        view lar get_version_keys() ni, kerak bo'lsa get_etag_extra() ni
+        aniqlaydi va get() boshida not_modified() ni chaqiradi.
+    '''
+    cache_control = {'no_cache': True}
+
+    def get_version_keys(self):
+        raise NotImplementedError
+
+    def get_etag_extra(self):
+        return None
+
+    def get_current_versions(self):
+        if not hasattr(self, '_versions'):
+            self._versions = get_versions(self.get_version_keys())
+        return self._versions
+
+    def get_etag(self):
+        if not hasattr(self, '_etag'):
+            self._etag = make_etag(self.request, self.get_current_versions(), self.get_etag_extra())
+        return self._etag
+
+    def not_modified(self):
+        '''
+            not_modified -> If-None-Match dagi ETag joriy versiyaga mos
+            kelsa 304 javobini, aks holda None qaytaradi.
+        '''
+        if etag_matches(self.request, self.get_etag()):
+            return HttpResponseNotModified()
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # faqat not_modified() chaqirilgan (ETag hisoblangan) javoblar uchun
+        if hasattr(self, '_etag') and response.status_code in (200, 304):
+            set_conditional_headers(response, self.get_etag(), self.cache_control)
+        return response
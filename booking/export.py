@@ -0,0 +1,128 @@
+import csv
+import json
+from itertools import chain
+
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+
+from .archive import booking_tables
+from .utils import day_range, parse_date
+
+EXPORT_FIELDS = ['id', 'room_id', 'room', 'resident', 'start', 'end']
+EXPORT_COLUMNS = ['id', 'room_id', 'room__name', 'resident__name', 'start', 'end']
+
+
+class Echo:
+    '''
+        Echo -> csv.writer uchun yozilgan qatorni shunchaki qaytaradigan
+        "fayl": qatorlar xotirada to'planmasdan javobga uzatiladi.
+    '''
+
+    def write(self, value):
+        return value
+
+
+def export_rows(querysets, chunk_size):
+    '''
+        export_rows -> querysets dagi EXPORT_COLUMNS qiymatlarini ketma-ket,
+        har birini bazadan chunk_size lik bo'laklarda o'qib, EXPORT_FIELDS
+        tartibidagi tuple sifatida qaytaradi. Xona va rezident nomlari SQL
+        JOIN orqali olinadi.
+    '''
+    time_zone = timezone.get_current_timezone()
+    rows = chain.from_iterable(queryset.iterator(chunk_size=chunk_size) for queryset in querysets)
+    for id, room_id, room, resident, start, end in rows:
+        yield (
+            id, room_id, room, resident,
+            start.astimezone(time_zone).isoformat(), end.astimezone(time_zone).isoformat(),
+        )
+
+
+def csv_stream(rows, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    chunk = []
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def ndjson_stream(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + '\n')
+        if len(chunk) >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+class BookingExportView(View):
+    '''
+        BookingExportView -> bookinglarni CSV yoki NDJSON ko'rinishida
+        eksport qiladi.
+
+        maqsadi -> oylik bookinglarni BI vositalariga yuklash. Javob
+        StreamingHttpResponse orqali bo'laklab yuboriladi, bookinglar
+        (avval asosiy jadvaldan, keyin arxivdan) bazadan iterator() bilan o'qiladi va
+        serializer ishlatilmaydi, shuning uchun xotira qatorlar soniga
+        bog'liq emas.
+
+        parametrlar -> from, to (sana, kiritilgan), room (id),
+        format (csv yoki ndjson, standart csv)
+    '''
+    formats = {
+        'csv': (csv_stream, 'text/csv; charset=utf-8', 'csv'),
+        'ndjson': (ndjson_stream, 'application/x-ndjson; charset=utf-8', 'ndjson'),
+    }
+
+    def get_querysets(self, request):
+        '''
+            get_querysets -> avval asosiy, keyin arxiv jadvalidan id bo'yicha
+            tartiblangan ikkita so'rov. UNION ALL ustidan umumiy ORDER BY
+            natijani to'liq saralashga majbur qiladi, alohida so'rovlar esa
+            primary key indeksi bo'yicha oqim bilan o'qiladi.
+        '''
+        filters = {}
+        from_ = request.GET.get('from')
+        to = request.GET.get('to')
+        room = request.GET.get('room')
+
+        if from_:
+            filters['start__gte'] = day_range(parse_date(from_))[0]
+        if to:
+            filters['start__lt'] = day_range(parse_date(to))[1]
+        if room:
+            filters['room_id'] = int(room)
+        return [
+            queryset.order_by('id') for queryset in booking_tables(EXPORT_COLUMNS, **filters)
+        ]
+
+    def get(self, request, *args, **kwargs):
+        format = request.GET.get('format', 'csv')
+        if format not in self.formats:
+            return JsonResponse(
+                {"error": "format qiymati csv yoki ndjson bo'lishi kerak"}, status=400
+            )
+        try:
+            querysets = self.get_querysets(request)
+        except ValueError:
+            return JsonResponse(
+                {"error": "sana YYYY-MM-DD ko'rinishida, room esa butun son bo'lishi kerak"},
+                status=400
+            )
+
+        stream, content_type, extension = self.formats[format]
+        chunk_size = settings.BOOKING_EXPORT_CHUNK_SIZE
+        response = StreamingHttpResponse(
+            stream(export_rows(querysets, chunk_size), chunk_size), content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="bookings.{extension}"'
+        return response
@@ -0,0 +1,105 @@
+import secrets
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .materialized import split_intervals
+from .models import BookingHold
+from .utils import day_range
+from .versions import bump, room_holds_key
+
+
+def new_token():
+    return secrets.token_urlsafe(32)
+
+
+def with_holds(bookings, room_id, start, end):
+    '''
+        with_holds -> bookinglar querysetining (start, end) lariga xonaning
+        [start, end) bilan kesishgan faol holdlarini UNION ALL bilan
+        qo'shadi, ya'ni kesishish tekshiruvi bitta so'rovda qoladi.
+    '''
+    holds = BookingHold.objects.active().filter(
+        room_id=room_id, end__gt=start, start__lt=end
+    ).values_list('start', 'end')
+    return bookings.values_list('start', 'end').union(holds, all=True)
+
+
+def holds_changed(room_id, start):
+    '''
+        holds_changed -> xonaning shu kundagi hold versiyasini yangilaydi.
+        updated_at ga hozir yaratilgan holdlarning eng kech tugashi mumkin
+        bo'lgan vaqti (now + BOOKING_HOLD_MAX_TTL) yoziladi.
+    '''
+    date_ = timezone.localtime(start).date()
+    bump(
+        [room_holds_key(room_id, date_)],
+        updated_at=timezone.now() + timedelta(seconds=settings.BOOKING_HOLD_MAX_TTL),
+    )
+
+
+def holds_pending(versions, key, now=None):
+    '''
+        holds_pending -> versiyalar bo'yicha shu kunda hali faol hold
+        bo'lishi mumkinmi. False bo'lsa holdlarni bazadan o'qish shart emas.
+    '''
+    _, until = versions.get(key, (0, None))
+    return until is not None and until > (now or timezone.now())
+
+
+def day_holds_queryset(date_, room_ids=None):
+    day_start, day_end = day_range(date_)
+    holds = BookingHold.objects.active().filter(start__gte=day_start, start__lt=day_end)
+    if room_ids is not None:
+        holds = holds.filter(room_id__in=room_ids)
+    return holds.order_by('start').values_list('room_id', 'start', 'end')
+
+
+def group_holds(rows):
+    holds = defaultdict(list)
+    for room_id, start, end in rows:
+        holds[room_id].append((start, end))
+    return holds
+
+
+def day_holds(date_, room_ids=None):
+    '''
+        day_holds -> {room_id: [(start, end), ...]} shu sanadagi faol holdlar.
+    '''
+    return group_holds(day_holds_queryset(date_, room_ids))
+
+
+async def aday_holds(date_, room_ids=None):
+    '''
+        aday_holds -> day_holds ning async ORM dagi varianti.
+    '''
+    return group_holds([row async for row in day_holds_queryset(date_, room_ids)])
+
+
+def subtract_holds(intervals, holds):
+    '''
+        subtract_holds -> bo'sh oraliqlardan holdlar egallagan vaqtni
+        kesib tashlaydi. Keshdagi oraliqlar o'zgartirilmaydi.
+    '''
+    for start, end in holds:
+        intervals = split_intervals(intervals, start, end)
+    return intervals
+
+
+def sweep_expired_holds(batch_size=1000):
+    '''
+        sweep_expired_holds -> muddati o'tgan holdlarni expires_at indeksi
+        bo'yicha batch_size lik bo'laklarda o'chiradi, shuning uchun yozish
+        qulfi uzoq ushlanmaydi. O'chirilganlar sonini qaytaradi.
+    '''
+    now = timezone.now()
+    deleted = 0
+    while True:
+        pks = list(BookingHold.objects.filter(
+            expires_at__lte=now
+        ).order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += BookingHold.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,164 @@
+import bisect
+import threading
+
+from django.utils import timezone
+
+from .models import Booking
+from .utils import day_range
+from .versions import get_versions, room_key
+
+
+class RoomBookings:
+    '''
+        RoomBookings -> bitta xonaning `horizon` dan keyin tugaydigan
+        bookinglari, start bo'yicha tartiblangan ro'yhatda.
+
+        generation -> yuklangan yoki oxirgi qo'llangan o'zgarishdagi
+        `room:<id>` hisoblagichi qiymati.
+    '''
+
+    def __init__(self, rows, generation, horizon):
+        self.bookings = {booking_id: (start, end) for booking_id, start, end in rows}
+        self.items = sorted((start, end, booking_id) for booking_id, (start, end) in self.bookings.items())
+        self.generation = generation
+        self.horizon = horizon
+
+    def add(self, booking_id, start, end):
+        if booking_id in self.bookings or end <= self.horizon:
+            return
+        self.bookings[booking_id] = (start, end)
+        bisect.insort(self.items, (start, end, booking_id))
+
+    def remove(self, booking_id):
+        interval = self.bookings.pop(booking_id, None)
+        if interval is not None:
+            index = bisect.bisect_left(self.items, (*interval, booking_id))
+            del self.items[index]
+
+    def overlaps(self, start, end):
+        '''
+            overlaps -> [start, end) bilan kesishadigan booking bormi, O(log n).
+            Bookinglar o'zaro kesishmagani uchun end dan oldin boshlangan
+            oxirgi bookingni tekshirish yetarli.
+        '''
+        index = bisect.bisect_left(self.items, (end,))
+        return index > 0 and self.items[index - 1][1] > start
+
+    def day(self, date_):
+        return self.between(*day_range(date_))
+
+    def between(self, start, end):
+        '''
+            between -> [start, end) da boshlanadigan bookinglarning
+            start bo'yicha tartiblangan (start, end) lari.
+        '''
+        first = bisect.bisect_left(self.items, (start,))
+        last = bisect.bisect_left(self.items, (end,))
+        return [(start, end) for start, end, _ in self.items[first:last]]
+
+
+class BookingIndex:
+    '''
+        BookingIndex -> jarayon ichidagi xonalar bookinglari indeksi,
+        faqat bugungi va kelgusi kunlar uchun.
+
+        maqsadi -> kesishishni tekshirish va kunlik bandliklarni o'qish
+        uchun har safar bazaga murojaat qilmaslik. Xona birinchi so'ralganda
+        bitta so'rov bilan yuklanadi, shu jarayondagi yozuvlar commit dan
+        keyin signallar orqali qo'llanadi.
+
+        Boshqa jarayonlar yozuvlari `room:<id>` hisoblagichi (generation)
+        orqali aniqlanadi: har bir yozuv uni bittaga oshiradi, shu jarayon
+        yozuvlari esa indeksdagi qiymatni ham oshiradi. Qiymatlar farq qilsa
+        xona qayta yuklanadi. Availability view lar hisoblagichni ETag
+        versiyalari bilan bitta so'rovda o'qiydi, shuning uchun indeks
+        qo'shimcha so'rovsiz tekshiriladi.
+    '''
+
+    def __init__(self):
+        self.rooms = {}
+        self._lock = threading.Lock()
+
+    def horizon(self):
+        return day_range(timezone.localdate())[0]
+
+    def current(self, room_id, generation):
+        '''
+            current -> indeks berilgan generation ga mos bo'lsa uni, aks
+            holda None qaytaradi, so'rovsiz.
+        '''
+        entry = self.rooms.get(room_id)
+        if entry is None or entry.horizon != self.horizon() or entry.generation != generation:
+            return None
+        return entry
+
+    def checked(self, room_id):
+        '''
+            checked -> xona yuklangan bo'lsa hisoblagichni bazadan o'qib
+            (bitta so'rov) current() natijasini, aks holda so'rovsiz None
+            qaytaradi.
+        '''
+        if room_id not in self.rooms:
+            return None
+        return self.current(room_id, self.generation(room_id))
+
+    def get(self, room_id, generation=None):
+        '''
+            get -> xona indeksini qaytaradi, eskirgan bo'lsa qayta yuklaydi.
+            generation berilmasa u bazadan o'qiladi (bitta so'rov).
+        '''
+        if generation is None:
+            generation = self.generation(room_id)
+        entry = self.current(room_id, generation)
+        if entry is not None:
+            return entry
+
+        # generation bookinglardan oldin o'qilgan, ya'ni indeks undan eski bo'lmaydi
+        horizon = self.horizon()
+        rows = Booking.objects.filter(room_id=room_id, end__gt=horizon).values_list('id', 'start', 'end')
+        entry = RoomBookings(rows, generation, horizon)
+        with self._lock:
+            self.rooms[room_id] = entry
+        return entry
+
+    def generation(self, room_id):
+        value, _ = get_versions([room_key(room_id)])[room_key(room_id)]
+        return value
+
+    def apply(self, added=(), removed=()):
+        '''
+            apply -> commit bo'lgan (room_id, start, end, booking_id)
+            o'zgarishlarini yuklangan xonalarga qo'llaydi. Har bir
+            bookings_changed chaqiruvi xona hisoblagichini bittaga oshiradi.
+        '''
+        changes = {}
+        for kind, items in (('removed', removed), ('added', added)):
+            for room_id, start, end, booking_id in items:
+                changes.setdefault(room_id, []).append((kind, start, end, booking_id))
+
+        with self._lock:
+            for room_id, room_changes in changes.items():
+                entry = self.rooms.get(room_id)
+                if entry is None:
+                    continue
+                if any(booking_id is None for *_, booking_id in room_changes):
+                    # id siz o'zgarishni qo'llab bo'lmaydi, xona qayta yuklanadi
+                    del self.rooms[room_id]
+                    continue
+                for kind, start, end, booking_id in room_changes:
+                    if kind == 'removed':
+                        entry.remove(booking_id)
+                    else:
+                        entry.add(booking_id, start, end)
+                entry.generation += 1
+
+    def discard(self, room_id):
+        with self._lock:
+            self.rooms.pop(room_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.rooms.clear()
+
+
+booking_index = BookingIndex()
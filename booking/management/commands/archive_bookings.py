@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking.archive import archive_chunk
+from booking.utils import day_range
+
+
+class Command(BaseCommand):
+    '''
+        archive_bookings -> --days kundan oldin tugagan bookinglarni
+        ArchivedBooking jadvaliga ko'chiradi.
+
+        maqsadi -> Booking jadvali (va uning indekslari) faqat yaqin va
+        kelgusi kunlar hajmida qolishi. Bookinglar --chunk-size lik
+        bo'laklarda, har biri alohida qisqa tranzaksiyada ko'chiriladi,
+        shuning uchun yozish qulfi uzoq ushlanmaydi va to'xtatilgan buyruqni
+        qayta ishga tushirish shu joydan davom etadi.
+
+            python manage.py archive_bookings [--days 90] [--chunk-size 1000]
+    '''
+    help = "eski bookinglarni ArchivedBooking jadvaliga ko'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None)
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument('--max-chunks', type=int, default=None, help="shuncha bo'lakdan keyin to'xtash")
+        parser.add_argument('--pause', type=float, default=0, help="bo'laklar orasida kutish (sekund)")
+
+    def handle(self, *args, days=None, chunk_size=None, max_chunks=None, pause=0, **options):
+        days = settings.BOOKING_ARCHIVE_DAYS if days is None else days
+        chunk_size = chunk_size or settings.BOOKING_ARCHIVE_CHUNK_SIZE
+        if days < 1 or chunk_size < 1:
+            raise CommandError("--days va --chunk-size musbat son bo'lishi kerak")
+
+        cutoff_date = timezone.localdate() - timedelta(days=days)
+        cutoff, _ = day_range(cutoff_date)
+
+        moved = chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            count = archive_chunk(cutoff, chunk_size)
+            if not count:
+                break
+            moved += count
+            chunks += 1
+            self.stdout.write(f"{moved} ta booking ko'chirildi")
+            if pause:
+                time.sleep(pause)
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{moved} ta booking ko'chirildi, qolganlari keyingi ishga tushirishda ko'chiriladi"
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"{moved} ta booking arxivlandi"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking.archive import all_bookings
+from booking.models import RoomDailyUsage
+from booking.rollups import write_usage
+from booking.utils import day_range, parse_date
+
+
+class Command(BaseCommand):
+    '''
+        backfill_usage -> RoomDailyUsage jadvalini bookinglardan qayta
+        hisoblaydi. Bookinglar (arxivlanganlari bilan) (room, start)
+        indeksi bo'yicha chunk_size lik bo'laklarda o'qiladi, shuning uchun
+        xotira bookinglar soniga bog'liq emas.
+
+            python manage.py backfill_usage [--from 2023-06-01] [--to 2023-06-30]
+    '''
+    help = "RoomDailyUsage jadvalini bookinglardan qayta hisoblash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='from_', help="birinchi sana (YYYY-MM-DD)")
+        parser.add_argument('--to', help="oxirgi sana (YYYY-MM-DD)")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, from_=None, to=None, chunk_size=2000, **options):
+        try:
+            first = parse_date(from_) if from_ else None
+            last = parse_date(to) if to else None
+        except ValueError:
+            raise CommandError("sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting")
+
+        filters = {}
+        usage = RoomDailyUsage.objects.all()
+        if first:
+            filters['start__gte'] = day_range(first)[0]
+            usage = usage.filter(date__gte=first)
+        if last:
+            filters['start__lt'] = day_range(last)[1]
+            usage = usage.filter(date__lte=last)
+        bookings = all_bookings(['room_id', 'start', 'end'], order_by=['room_id', 'start'], **filters)
+
+        with transaction.atomic():
+            usage.delete()
+            written = write_usage(
+                RoomDailyUsage,
+                bookings.iterator(chunk_size=chunk_size),
+            )
+        self.stdout.write(self.style.SUCCESS(f"{written} ta kunlik qator yozildi"))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from booking.archive import all_bookings
+from booking.materialized import day_hours, read_day, rebuild_room
+from booking.models import Room, RoomDayFreeInterval
+from booking.utils import day_range, format_intervals, free_intervals
+
+
+class Command(BaseCommand):
+    '''
+        free_intervals -> RoomDayFreeInterval jadvalini boshqaradi.
+
+            python manage.py free_intervals rebuild [--room ID]
+            python manage.py free_intervals verify [--room ID]
+
+        verify jadvaldagi har bir (xona, sana) ni shu kun bookinglaridan
+        (arxivlanganlari bilan) free_intervals orqali hisoblangan natija bilan solishtiradi va farq bo'lsa xatolik bilan
+        tugaydi (CI da ishlatish mumkin).
+    '''
+    help = "RoomDayFreeInterval jadvalini qayta qurish yoki tekshirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'verify'])
+        parser.add_argument('--room', type=int, help="faqat shu xona uchun")
+
+    def handle(self, *args, action, room=None, **options):
+        rooms = Room.objects.order_by('id')
+        if room is not None:
+            rooms = rooms.filter(pk=room)
+
+        if action == 'rebuild':
+            for room in rooms.iterator():
+                with transaction.atomic():
+                    rebuild_room(room)
+            self.stdout.write(self.style.SUCCESS("bo'sh oraliqlar qayta hisoblandi"))
+            return
+
+        mismatches = []
+        for room in rooms.iterator():
+            for date_ in self.room_dates(room):
+                day_start, day_end = day_range(date_)
+                bookings = all_bookings(
+                    ('start', 'end'), order_by=('start',),
+                    room_id=room.pk, start__gte=day_start, start__lt=day_end,
+                )
+                expected = format_intervals(free_intervals(*day_hours(room, date_), bookings))
+                actual = format_intervals(read_day(room, date_))
+                if actual != expected:
+                    mismatches.append((room, date_))
+                    self.stderr.write(f"{room.pk} ({room.name}) {date_}: {actual} != {expected}")
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} ta kunda bo'sh oraliqlar mos emas")
+        self.stdout.write(self.style.SUCCESS("bo'sh oraliqlar bookinglar bilan mos"))
+
+    def room_dates(self, room):
+        dates = set(
+            RoomDayFreeInterval.objects.filter(room=room).values_list('date', flat=True).distinct()
+        )
+        for start, in all_bookings(('start',), room_id=room.pk).iterator():
+            dates.add(timezone.localtime(start).date())
+        return sorted(dates)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from booking.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    '''
+        profile_token -> so'rovni profillash uchun imzolangan sarlavha
+        qiymatini chiqaradi, PROFILING_TOKEN_MAX_AGE sekund amal qiladi.
+
+            curl -H "X-Profile: $(python manage.py profile_token)" ...
+    '''
+    help = "so'rovni profillash uchun imzolangan sarlavha qiymati"
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token())
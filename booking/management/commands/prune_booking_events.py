@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.models import BookingEvent
+
+
+class Command(BaseCommand):
+    '''
+        prune_booking_events -> CHANGEFEED_RETENTION_DAYS kundan eski
+        BookingEvent hodisalarini o'chiradi. Shundan eski Last-Event-ID
+        bilan ulangan mijozlar faqat yangi hodisalarni oladi.
+
+            python manage.py prune_booking_events [--days 7]
+    '''
+    help = "eski BookingEvent hodisalarini o'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None)
+
+    def handle(self, *args, days=None, **options):
+        if days is None:
+            days = settings.CHANGEFEED_RETENTION_DAYS
+        deleted, _ = BookingEvent.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} ta hodisa o'chirildi"))
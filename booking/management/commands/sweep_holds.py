@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    '''
+        sweep_holds -> muddati o'tgan BookingHold larni o'chiradi. --loop
+        bilan fon jarayoni sifatida har BOOKING_HOLD_SWEEP_INTERVAL
+        sekundda takrorlanadi.
+
+            python manage.py sweep_holds [--loop] [--interval 60]
+    '''
+    help = "muddati o'tgan holdlarni o'chirish"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=None)
+
+    def handle(self, *args, loop=False, interval=None, **options):
+        interval = interval or settings.BOOKING_HOLD_SWEEP_INTERVAL
+        while True:
+            deleted = sweep_expired_holds()
+            self.stdout.write(self.style.SUCCESS(f"{deleted} ta hold o'chirildi"))
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.utils import timezone
+
+from .archive import all_bookings
+from .models import RoomDayFreeInterval
+from .utils import day_range, free_intervals
+
+
+def day_hours(room, date_):
+    '''
+        day_hours -> xonaning berilgan sanadagi ochilish va yopilish vaqti.
+    '''
+    return (
+        timezone.make_aware(datetime.combine(date_, room.opening_time)),
+        timezone.make_aware(datetime.combine(date_, room.closing_time)),
+    )
+
+
+def make_rows(room, date_, intervals):
+    rows = [
+        RoomDayFreeInterval(room_id=room.pk, date=date_, start=start, end=end)
+        for start, end in intervals
+    ]
+    if not rows:
+        # to'liq band kun belgisi
+        opening_time, _ = day_hours(room, date_)
+        rows.append(RoomDayFreeInterval(room_id=room.pk, date=date_, start=opening_time, end=opening_time))
+    return rows
+
+
+def compute_day(room, date_):
+    '''
+        compute_day -> xonaning bir kunlik bo'sh oraliqlarini bevosita
+        bookinglardan (arxivlanganlari bilan) hisoblaydi
+        (RoomAvailabiltyAPIView bilan bir xil).
+    '''
+    day_start, day_end = day_range(date_)
+    bookings = all_bookings(
+        ('start', 'end'), order_by=('start',),
+        room_id=room.pk, start__gte=day_start, start__lt=day_end,
+    )
+    return free_intervals(*day_hours(room, date_), bookings)
+
+
+def read_day(room, date_):
+    '''
+        read_day -> xonaning bir kunlik bo'sh oraliqlarini bitta indeksli
+        so'rov bilan o'qiydi.
+    '''
+    rows = RoomDayFreeInterval.objects.filter(
+        room_id=room.pk, date=date_
+    ).order_by('start').values_list('start', 'end')
+    return rows_to_intervals(room, date_, rows)
+
+
+async def aread_day(room, date_):
+    '''
+        aread_day -> read_day ning async ORM dagi varianti.
+    '''
+    rows = RoomDayFreeInterval.objects.filter(
+        room_id=room.pk, date=date_
+    ).order_by('start').values_list('start', 'end')
+    return rows_to_intervals(room, date_, [row async for row in rows])
+
+
+def rows_to_intervals(room, date_, rows):
+    rows = list(rows)
+    if not rows:
+        return [day_hours(room, date_)]
+    return [(start, end) for start, end in rows if start < end]
+
+
+def split_intervals(intervals, start, end):
+    '''
+        split_intervals -> bo'sh oraliqlardan [start, end) bandlikni
+        kesib tashlaydi, kesishmagan oraliqlar o'zgarishsiz qoladi.
+    '''
+    result = []
+    for free_start, free_end in intervals:
+        if free_end <= start or end <= free_start:
+            result.append((free_start, free_end))
+            continue
+        if free_start < start:
+            result.append((free_start, start))
+        if end < free_end:
+            result.append((end, free_end))
+    return result
+
+
+def apply_changes(rooms, added=(), removed=()):
+    '''
+        apply_changes -> qo'shilgan (added) va olib tashlangan (removed)
+        (room_id, start, end) bandliklarini RoomDayFreeInterval ga yozadi.
+        rooms -> {room_id: Room}.
+
+        maqsadi -> har bir o'zgarishda kunni qayta hisoblamaslik: faqat
+        booking qo'shilgan kunlarda kesishgan oraliqlar xotirada bo'linadi.
+        Booking olib tashlangan yoki hali qatorlari yo'q kunlar shu kun
+        bookinglaridan qayta hisoblanadi. Bazaga faqat farq yoziladi, ya'ni
+        o'zgarmagan qatorlarga tegilmaydi. O'zgarishlar soniga qaramay
+        so'rovlar soni o'zgarmas (4 tagacha).
+    '''
+    def key(room_id, start):
+        return room_id, timezone.localtime(start).date()
+
+    additions = defaultdict(list)
+    for room_id, start, end in added:
+        additions[key(room_id, start)].append((start, end))
+    recompute = {key(room_id, start) for room_id, start, end in removed}
+    keys = set(additions) | recompute
+    if not keys:
+        return
+
+    existing = defaultdict(list)
+    for row in RoomDayFreeInterval.objects.filter(
+        room_id__in={room_id for room_id, _ in keys},
+        date__in={date_ for _, date_ in keys},
+    ).order_by('start'):
+        if (row.room_id, row.date) in keys:
+            existing[row.room_id, row.date].append(row)
+    recompute |= keys - set(existing)
+
+    result = {}
+    if recompute:
+        days = defaultdict(list)
+        first_start, _ = day_range(min(date_ for _, date_ in recompute))
+        _, last_end = day_range(max(date_ for _, date_ in recompute))
+        bookings = all_bookings(
+            ('room_id', 'start', 'end'), order_by=('start',),
+            room_id__in={room_id for room_id, _ in recompute},
+            start__gte=first_start, start__lt=last_end,
+        )
+        for room_id, start, end in bookings:
+            if key(room_id, start) in recompute:
+                days[key(room_id, start)].append((start, end))
+        for room_id, date_ in recompute:
+            room = rooms[room_id]
+            result[room_id, date_] = free_intervals(*day_hours(room, date_), days[room_id, date_])
+
+    for room_day, intervals in additions.items():
+        if room_day in result:
+            continue
+        free = [(row.start, row.end) for row in existing[room_day] if row.start < row.end]
+        for start, end in intervals:
+            free = split_intervals(free, start, end)
+        result[room_day] = free
+
+    stale = []
+    missing = []
+    for (room_id, date_), intervals in result.items():
+        current = {(row.start, row.end): row.pk for row in existing[room_id, date_]}
+        wanted = {(row.start, row.end) for row in make_rows(rooms[room_id], date_, intervals)}
+        stale += [pk for interval, pk in current.items() if interval not in wanted]
+        missing += [
+            RoomDayFreeInterval(room_id=room_id, date=date_, start=start, end=end)
+            for start, end in wanted - set(current)
+        ]
+
+    if stale:
+        RoomDayFreeInterval.objects.filter(pk__in=stale).delete()
+    RoomDayFreeInterval.objects.bulk_create(missing, batch_size=1000)
+
+
+def rebuild_room(room):
+    '''
+        rebuild_room -> xonaning barcha kunlarini qayta hisoblaydi,
+        masalan ish vaqti o'zgarganda. Bookinglar (arxivlanganlari bilan)
+        bitta so'rov bilan olinib, sanalar bo'yicha guruhlanadi.
+    '''
+    days = defaultdict(list)
+    bookings = all_bookings(('start', 'end'), order_by=('start',), room_id=room.pk)
+    for start, end in bookings.iterator(chunk_size=2000):
+        days[timezone.localtime(start).date()].append((start, end))
+
+    RoomDayFreeInterval.objects.filter(room_id=room.pk).delete()
+    rows = []
+    for date_, intervals in days.items():
+        rows += make_rows(room, date_, free_intervals(*day_hours(room, date_), intervals))
+    RoomDayFreeInterval.objects.bulk_create(rows, batch_size=1000)
@@ -0,0 +1,249 @@
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+from .cache import availability_cache
+
+# name -> (turi, tavsifi)
+METRICS = {
+    'booking_http_requests_total': ('counter', "So'rovlar soni (view, method, status bo'yicha)"),
+    'booking_http_request_duration_seconds': ('histogram', "So'rovlarga javob berish vaqti"),
+    'booking_db_queries_total': ('counter', "So'rovlar bajargan SQL so'rovlari soni"),
+    'booking_db_query_seconds_total': ('counter', "SQL so'rovlari umumiy vaqti"),
+    'booking_outcomes_total': ('counter', "Band qilish natijalari (201, 400, 410, ...)"),
+    'booking_cache_hits_total': ('counter', "Keshdan topilgan o'qishlar"),
+    'booking_cache_misses_total': ('counter', "Keshda bo'lmagan o'qishlar"),
+    'booking_cache_hit_ratio': ('gauge', "Keshdan topilgan o'qishlar ulushi"),
+}
+
+
+class MetricsRegistry:
+    '''
+        MetricsRegistry -> jarayon ichidagi counter va histogrammalar.
+
+        maqsadi -> so'rov yo'lida faqat xotiradagi lug'atni yangilash
+        (qulf, bisect va qo'shish). Ko'p jarayonli (gunicorn) ishga
+        tushirishda har bir jarayon o'z qiymatlarini METRICS_DIR dagi
+        alohida faylga ko'pi bilan METRICS_FLUSH_INTERVAL sekundda bir marta
+        yozadi, /metrics esa barcha fayllarni qo'shib beradi. Fayl nomida
+        pid va jarayon boshlangan vaqt bor, shuning uchun to'xtagan
+        jarayonlar qiymatlari ham yig'indida qoladi (counter lar kamaymaydi).
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.process_id = f'{self.pid}-{time.time_ns()}'
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.flushed_at = time.monotonic()
+
+    def _check_pid(self):
+        # fork dan keyin (gunicorn --preload) bola jarayon o'z faylini ochadi
+        if os.getpid() != self.pid:
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._check_pid()
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = settings.METRICS_LATENCY_BUCKETS
+        with self._lock:
+            self._check_pid()
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][bisect.bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        '''
+            snapshot -> joriy jarayon qiymatlari JSON ga yoziladigan
+            ko'rinishda, keshlar statistikasi bilan.
+        '''
+        with self._lock:
+            self._check_pid()
+            counters = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [
+                [name, list(labels), list(buckets), total, count]
+                for (name, labels), (buckets, total, count) in self.histograms.items()
+            ]
+        cache = availability_cache.stats()
+        counters += [
+            ['booking_cache_hits_total', [['cache', 'availability']], cache['hits']],
+            ['booking_cache_misses_total', [['cache', 'availability']], cache['misses']],
+        ]
+        return {'counters': counters, 'histograms': histograms}
+
+    def path(self):
+        directory = settings.METRICS_DIR
+        return Path(directory) / f'{self.process_id}.json' if directory else None
+
+    def flush(self, force=False):
+        '''
+            flush -> METRICS_DIR berilgan bo'lsa qiymatlarni jarayon fayliga
+            yozadi (vaqtinchalik fayl va os.replace, ya'ni o'quvchi yarim
+            yozilgan faylni ko'rmaydi).
+        '''
+        path = self.path()
+        if path is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self.flushed_at < settings.METRICS_FLUSH_INTERVAL:
+                return
+            self.flushed_at = now
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, path)
+
+    def collect(self):
+        '''
+            collect -> barcha jarayonlar qiymatlari yig'indisi:
+            ({(name, labels): value}, {(name, labels): (buckets, sum, count)}).
+        '''
+        path = self.path()
+        if path is None:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush(force=True)
+            snapshots = []
+            for file in path.parent.glob('*.json'):
+                try:
+                    snapshots.append(json.loads(file.read_text()))
+                except (OSError, ValueError):
+                    # fayl shu payt o'chirilgan yoki buzilgan
+                    continue
+
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                counters[name, tuple(map(tuple, labels))] += value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                key = name, tuple(map(tuple, labels))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+    def render(self):
+        '''
+            render -> Prometheus text formati (version 0.0.4).
+        '''
+        counters, histograms = self.collect()
+
+        caches = {labels for name, labels in counters if name == 'booking_cache_hits_total'}
+        for labels in caches:
+            hits = counters['booking_cache_hits_total', labels]
+            total = hits + counters['booking_cache_misses_total', labels]
+            counters['booking_cache_hit_ratio', labels] = hits / total if total else 0.0
+
+        samples = defaultdict(list)
+        for (name, labels), value in sorted(counters.items()):
+            samples[name].append(f'{name}{format_labels(labels)} {format_value(value)}')
+        buckets = settings.METRICS_LATENCY_BUCKETS
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket_count in zip([*buckets, '+Inf'], counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else format_value(bound)
+                samples[name].append(f'{name}_bucket{format_labels((*labels, ("le", le)))} {cumulative}')
+            samples[name].append(f'{name}_sum{format_labels(labels)} {format_value(total)}')
+            samples[name].append(f'{name}_count{format_labels(labels)} {count}')
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            if samples[name]:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', *samples[name]]
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+registry = MetricsRegistry()
+atexit.register(lambda: registry.flush(force=True))
+
+
+class MetricsMiddleware:
+    '''
+        MetricsMiddleware -> har bir so'rovning vaqti, statusi va SQL
+        so'rovlarini (QueryBudgetMiddleware hisobidan) URL nomi bo'yicha
+        registry ga yozadi. MIDDLEWARE ro'yhatida birinchi turishi kerak.
+        ASGI ostida async rejimda ishlaydi.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        status = str(response.status_code)
+        registry.observe('booking_http_request_duration_seconds', (('view', view),), duration)
+        registry.inc(
+            'booking_http_requests_total', (('view', view), ('method', request.method), ('status', status))
+        )
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            registry.inc('booking_db_queries_total', (('view', view),), stats.count)
+            registry.inc('booking_db_query_seconds_total', (('view', view),), stats.duration)
+        if request.method == 'POST' and view in settings.METRICS_BOOKING_VIEWS:
+            registry.inc('booking_outcomes_total', (('view', view), ('status', status)))
+        registry.flush()
+
+
+def metrics_view(request):
+    '''
+        metrics_view -> GET /metrics: barcha worker jarayonlari
+        metrikalari Prometheus text formatida.
+    '''
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.2 on 2026-10-17 21:49
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='room',
+            old_name='room_type',
+            new_name='type',
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='closing_time',
+            field=models.TimeField(default=datetime.time(23, 59, 59)),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='opening_time',
+            field=models.TimeField(default=datetime.time(0, 0)),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'start'], name='booking_room_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'end'], name='booking_room_end_idx'),
+        ),
+    ]
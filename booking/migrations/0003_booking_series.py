@@ -0,0 +1,31 @@
+# Generated by Django 4.2.2 on 2026-10-17 21:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('interval_days', models.PositiveSmallIntegerField(default=7)),
+                ('occurrences', models.PositiveSmallIntegerField()),
+                ('resident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.resident')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='booking.room')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='booking.bookingseries'),
+        ),
+    ]
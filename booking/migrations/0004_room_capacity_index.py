@@ -0,0 +1,17 @@
+# Generated by Django 4.2.2 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_booking_series'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['capacity', 'id'], name='room_capacity_id_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.2 on 2026-10-17 21:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# booking.search dagi funksiyalarning shu migratsiya vaqtidagi nusxasi:
+# keyinchalik ular o'zgarsa ham migratsiya natijasi o'zgarmaydi
+def normalize_name(name):
+    return ' '.join((name or '').casefold().split())
+
+
+def name_trigrams(name):
+    name = normalize_name(name)
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def unique_name(name, pk, type, taken):
+    '''
+        unique_name -> bir xil turdagi boshqa xona nomi bilan normallashtirilgan
+        ko'rinishda mos keladigan nomga " (id)" (kerak bo'lsa " (id-n)")
+        qo'shadi, aks holda nomni o'zgarishsiz qaytaradi.
+    '''
+    candidate = name
+    n = 0
+    while (normalize_name(candidate), type) in taken:
+        n += 1
+        suffix = f' ({pk})' if n == 1 else f' ({pk}-{n})'
+        candidate = name[:200 - len(suffix)] + suffix
+    return candidate
+
+
+def build_room_search(apps, schema_editor):
+    Room = apps.get_model('booking', 'Room')
+    RoomNameTrigram = apps.get_model('booking', 'RoomNameTrigram')
+
+    # room_unique_normalized_name cheklovidan oldin takroriy nomlar
+    # qayta nomlanadi: eng kichik id li xona nomi saqlanadi
+    taken = set()
+    renamed = []
+    for room in Room.objects.only('id', 'name', 'type').order_by('id').iterator(chunk_size=1000):
+        name = unique_name(room.name, room.pk, room.type, taken)
+        taken.add((normalize_name(name), room.type))
+        if name != room.name:
+            renamed.append((room.pk, room.name, name))
+        Room.objects.filter(pk=room.pk).update(name=name, normalized_name=normalize_name(name))
+        RoomNameTrigram.objects.bulk_create([
+            RoomNameTrigram(room_id=room.pk, trigram=trigram)
+            for trigram in name_trigrams(name)
+        ])
+
+    # qayta nomlash jimgina o'tmasligi uchun migrate chiqishida ko'rsatiladi
+    if renamed:
+        print(f'\n  {len(renamed)} ta xona nomi takrorlangani uchun o\'zgartirildi:')
+        for pk, old_name, new_name in renamed:
+            print(f'    #{pk}: {old_name!r} -> {new_name!r}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_room_capacity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='normalized_name',
+            field=models.CharField(default='', editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='roomnametrigram',
+            name='room',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='booking.room'),
+        ),
+        migrations.RunPython(build_room_search, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.UniqueConstraint(fields=('normalized_name', 'type'), name='room_unique_normalized_name'),
+        ),
+        migrations.AddIndex(
+            model_name='roomnametrigram',
+            index=models.Index(fields=['trigram', 'room'], name='room_trigram_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomnametrigram',
+            constraint=models.UniqueConstraint(fields=('room', 'trigram'), name='room_trigram_unique'),
+        ),
+    ]
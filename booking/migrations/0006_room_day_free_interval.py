@@ -0,0 +1,71 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import datetime
+
+from django.utils import timezone
+
+
+# booking.utils.free_intervals ning shu migratsiya vaqtidagi nusxasi:
+# keyinchalik u o'zgarsa ham migratsiya natijasi o'zgarmaydi
+def free_intervals(opening_time, closing_time, intervals):
+    data = []
+    cursor = opening_time
+    for start, end in intervals:
+        if cursor >= closing_time:
+            break
+        if start > cursor:
+            data.append((cursor, min(start, closing_time)))
+        cursor = max(cursor, end)
+    if cursor < closing_time:
+        data.append((cursor, closing_time))
+    return data
+
+
+def build_free_intervals(apps, schema_editor):
+    Room = apps.get_model('booking', 'Room')
+    Booking = apps.get_model('booking', 'Booking')
+    RoomDayFreeInterval = apps.get_model('booking', 'RoomDayFreeInterval')
+
+    for room in Room.objects.iterator(chunk_size=1000):
+        days = defaultdict(list)
+        bookings = Booking.objects.filter(room_id=room.pk).order_by('start').values_list('start', 'end')
+        for start, end in bookings.iterator(chunk_size=2000):
+            days[timezone.localtime(start).date()].append((start, end))
+
+        rows = []
+        for date_, intervals in days.items():
+            opening_time = timezone.make_aware(datetime.combine(date_, room.opening_time))
+            closing_time = timezone.make_aware(datetime.combine(date_, room.closing_time))
+            pieces = free_intervals(opening_time, closing_time, intervals) or [(opening_time, opening_time)]
+            rows += [
+                RoomDayFreeInterval(room_id=room.pk, date=date_, start=start, end=end)
+                for start, end in pieces
+            ]
+        RoomDayFreeInterval.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_room_name_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDayFreeInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='free_intervals', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'date', 'start'], name='free_interval_room_date_idx'), models.Index(fields=['date', 'room'], name='free_interval_date_room_idx')],
+            },
+        ),
+        migrations.RunPython(build_free_intervals, migrations.RunPython.noop),
+    ]
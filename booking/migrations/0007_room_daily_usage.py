@@ -0,0 +1,73 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:12
+
+from collections import defaultdict
+from itertools import islice
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+# booking.rollups dagi usage_rows va write_usage ning shu migratsiya
+# vaqtidagi nusxasi: keyinchalik ular o'zgarsa ham migratsiya natijasi o'zgarmaydi
+def usage_rows(bookings):
+    current_room, days = None, defaultdict(lambda: [0, 0])
+    for room_id, start, end in bookings:
+        if room_id != current_room:
+            for date_, (seconds, count) in sorted(days.items()):
+                yield current_room, date_, seconds, count
+            current_room, days = room_id, defaultdict(lambda: [0, 0])
+        date_ = timezone.localtime(start).date()
+        days[date_][0] += int((end - start).total_seconds())
+        days[date_][1] += 1
+
+    for date_, (seconds, count) in sorted(days.items()):
+        yield current_room, date_, seconds, count
+
+
+def write_usage(model, bookings, batch_size=1000):
+    rows = (
+        model(room_id=room_id, date=date_, booked_seconds=seconds, bookings=count)
+        for room_id, date_, seconds, count in usage_rows(bookings)
+    )
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        model.objects.bulk_create(batch)
+
+
+def build_daily_usage(apps, schema_editor):
+    Booking = apps.get_model('booking', 'Booking')
+    RoomDailyUsage = apps.get_model('booking', 'RoomDailyUsage')
+
+    bookings = Booking.objects.order_by('room_id', 'start').values_list('room_id', 'start', 'end')
+    write_usage(RoomDailyUsage, bookings.iterator(chunk_size=2000))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_room_day_free_interval'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDailyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked_seconds', models.BigIntegerField(default=0)),
+                ('bookings', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'room'], name='room_daily_usage_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='roomdailyusage',
+            constraint=models.UniqueConstraint(fields=('room', 'date'), name='room_daily_usage_unique'),
+        ),
+        migrations.RunPython(build_daily_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0008_change_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('deleted', 'Deleted')], max_length=7)),
+                ('booking_id', models.BigIntegerField(null=True)),
+                ('room_id', models.BigIntegerField()),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room_id', 'id'], name='booking_event_room_idx'), models.Index(fields=['created_at'], name='booking_event_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0009_booking_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('resident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.resident')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='booking.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'start'], name='booking_hold_room_start_idx'), models.Index(fields=['expires_at'], name='booking_hold_expires_idx')],
+            },
+        ),
+    ]
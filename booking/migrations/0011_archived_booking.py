@@ -0,0 +1,29 @@
+# Generated by Django 4.2.2 on 2026-10-17 22:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_booking_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('resident', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking.resident')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking.room')),
+                ('series', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking.bookingseries')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'start'], name='archived_booking_room_idx'), models.Index(fields=['start'], name='archived_booking_start_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
-from datetime import time
+from datetime import datetime, time, timedelta
 
 from django.db import models
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .search import normalize_name
 
 
 class Resident(models.Model):
@@ -19,30 +22,127 @@ class Room(models.Model):
     ]
 
     name = models.CharField(max_length=200)
+    normalized_name = models.CharField(max_length=200, editable=False, default='')
     type = models.CharField(max_length=11, choices=ROOM_TYPES)
     capacity = models.PositiveIntegerField()
     
     opening_time = models.TimeField(default=time(hour=0, minute=0, second=0))
     closing_time = models.TimeField(default=time(hour=23, minute=59, second=59))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['capacity', 'id'], name='room_capacity_id_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['normalized_name', 'type'], name='room_unique_normalized_name'),
+        ]
     
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
+
     def clean(self):
+        # (normalized_name, type) unique indeksi bo'yicha nuqtaviy qidiruv
         rooms = Room.objects.filter(
-            name__icontains = self.name,
+            normalized_name = normalize_name(self.name),
             type = self.type,
-        )
+        ).exclude(pk=self.pk)
 
         if rooms.exists():
             raise ValidationError("This room already created!")
 
 
+class RoomNameTrigram(models.Model):
+    '''
+        RoomNameTrigram -> xona nomlarining trigram indeksi, nom
+        bo'yicha qidiruvni LIKE '%x%' siz bajarish uchun.
+    '''
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="trigrams")
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['trigram', 'room'], name='room_trigram_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'trigram'], name='room_trigram_unique'),
+        ]
+
+
+class BookingSeries(models.Model):
+    '''
+        BookingSeries -> takrorlanuvchi booking, masalan "har seshanba
+        10:00-11:00, 26 hafta". Har bir takror alohida Booking sifatida
+        saqlanadi va series ga bog'lanadi.
+    '''
+    resident = models.ForeignKey(Resident, on_delete=models.CASCADE)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="series")
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    interval_days = models.PositiveSmallIntegerField(default=7)
+    occurrences = models.PositiveSmallIntegerField()
+
+    def occurrence_times(self, start_time=None, end_time=None):
+        '''
+            occurrence_times -> series ning barcha takrorlari uchun
+            (start, end) juftliklarini mahalliy vaqt bo'yicha hisoblaydi.
+            start_time/end_time berilsa, kun ichidagi vaqt shunga almashtiriladi.
+        '''
+        start = timezone.localtime(self.start)
+        end = timezone.localtime(self.end)
+        start_time = start_time or start.time()
+        end_time = end_time or end.time()
+
+        times = []
+        for i in range(self.occurrences):
+            date_ = start.date() + timedelta(days=i * self.interval_days)
+            times.append((
+                timezone.make_aware(datetime.combine(date_, start_time)),
+                timezone.make_aware(datetime.combine(date_, end_time)),
+            ))
+        return times
+
+    def __str__(self) -> str:
+        return f"{self.room} booked by {self.resident} every {self.interval_days} days x{self.occurrences}"
+
+
+class BookingQuerySet(models.QuerySet):
+    def delete(self, rooms=None):
+        '''
+            delete -> bookinglarni o'chiradi va ularni har biri uchun
+            post_delete signalida emas, bitta bookings_changed bilan qo'llaydi
+            (booking_deleted QuerySet.delete() dan kelgan signallarni
+            o'tkazib yuboradi). rooms -> {room_id: Room} (ixtiyoriy).
+        '''
+        from .signals import bookings_changed
+
+        removed = list(self.values_list('room_id', 'start', 'end', 'id'))
+        deleted = super().delete()
+        if removed:
+            bookings_changed(removed=removed, rooms=rooms)
+        return deleted
+
+
 class Booking(models.Model):
     resident = models.ForeignKey(Resident, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="bookings")
     start = models.DateTimeField()
     end = models.DateTimeField()
+    series = models.ForeignKey(
+        BookingSeries, on_delete=models.CASCADE, related_name="bookings",
+        null=True, blank=True
+    )
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'start'], name='booking_room_start_idx'),
+            models.Index(fields=['room', 'end'], name='booking_room_end_idx'),
+        ]
 
     def clean(self):
         if self.start is not None and self.end is not None and self.end <= self.start:
@@ -57,3 +157,159 @@ class Booking(models.Model):
     def __str__(self) -> str:
         return f"{self.room} booked by {self.resident} from {self.start} to {self.end}"
 
+
+
+class ArchivedBooking(models.Model):
+    '''
+        ArchivedBooking -> archive_bookings buyrug'i Booking jadvalidan
+        ko'chirgan eski bookinglar. id asl Booking id si bilan bir xil.
+        Kesishish tekshiruvlari faqat Booking dan o'qiydi, bo'sh oraliqlarni
+        qayta hisoblash, statistika va eksport ikkala jadvaldan o'qiydi.
+    '''
+    id = models.BigIntegerField(primary_key=True)
+    resident = models.ForeignKey(Resident, on_delete=models.CASCADE)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="archived_bookings")
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    series = models.ForeignKey(
+        BookingSeries, on_delete=models.CASCADE, related_name="archived_bookings",
+        null=True, blank=True
+    )
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'start'], name='archived_booking_room_idx'),
+            models.Index(fields=['start'], name='archived_booking_start_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.room} booked by {self.resident} from {self.start} to {self.end} (archived)"
+
+
+class BookingHoldQuerySet(models.QuerySet):
+    def active(self, now=None):
+        # muddati o'tgan holdlar sweep_holds o'chirguncha ham hisobga olinmaydi
+        return self.filter(expires_at__gt=now or timezone.now())
+
+
+class BookingHold(models.Model):
+    '''
+        BookingHold -> xonani booking qilishdan oldin vaqtincha (ttl
+        sekundga) band qilish. Muddati tugaguncha hold booking kabi
+        kesishish tekshiruvlarida va bo'sh vaqtlarda hisobga olinadi,
+        token bilan tasdiqlanganda Booking ga aylanadi.
+    '''
+    token = models.CharField(max_length=64, unique=True)
+    resident = models.ForeignKey(Resident, on_delete=models.CASCADE)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="holds")
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    objects = BookingHoldQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'start'], name='booking_hold_room_start_idx'),
+            models.Index(fields=['expires_at'], name='booking_hold_expires_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.room} held by {self.resident} from {self.start} to {self.end} until {self.expires_at}"
+
+
+class RoomDayFreeInterval(models.Model):
+    '''
+        RoomDayFreeInterval -> xonaning bir kundagi bo'sh oraliqlari,
+        booking saqlanganda yoki o'chirilganda faqat tegishli oraliq
+        bo'linadi yoki birlashtiriladi.
+
+        Qatorlari bo'lmagan kun hali hisoblanmagan va unda booking yo'q,
+        ya'ni butun ish vaqti bo'sh. To'liq band bo'lgan kun start == end
+        bo'lgan bitta qator bilan belgilanadi.
+    '''
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="free_intervals")
+    date = models.DateField()
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room', 'date', 'start'], name='free_interval_room_date_idx'),
+            models.Index(fields=['date', 'room'], name='free_interval_date_room_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.room} is free from {self.start} to {self.end}"
+
+
+class RoomDailyUsage(models.Model):
+    '''
+        RoomDailyUsage -> xonaning bir kundagi bandligi: band qilingan
+        vaqt (sekundlarda) va bookinglar soni. Booking qo'shilganda yoki
+        o'chirilganda faqat tegishli qator oshiriladi yoki kamaytiriladi.
+        Booking boshlangan mahalliy sanaga yoziladi.
+    '''
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="daily_usage")
+    date = models.DateField()
+    booked_seconds = models.BigIntegerField(default=0)
+    bookings = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date'], name='room_daily_usage_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'room'], name='room_daily_usage_date_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.room} on {self.date}: {self.bookings} bookings"
+
+
+class ChangeCounter(models.Model):
+    '''
+        ChangeCounter -> nomlangan versiya hisoblagichi, masalan
+        `room:<id>` xona yoki uning bookinglari har o'zgarganda yangilanadi.
+        ETag va Last-Modified sarlavhalari ma'lumotlarni yuklamasdan shu
+        jadvaldan hisoblanadi.
+    '''
+    key = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.key} = {self.value}"
+
+
+class BookingEvent(models.Model):
+    '''
+        BookingEvent -> booking o'zgarishlari jurnali (outbox). id
+        o'suvchi ketma-ketlik bo'lib, SSE dagi event id sifatida
+        ishlatiladi. Booking va xona o'chirilsa ham hodisa saqlanib
+        qolishi uchun ularga ForeignKey emas, oddiy id yoziladi.
+    '''
+    CREATED = 'created'
+    DELETED = 'deleted'
+    KINDS = [
+        (CREATED, 'Created'),
+        (DELETED, 'Deleted'),
+    ]
+
+    kind = models.CharField(max_length=7, choices=KINDS)
+    booking_id = models.BigIntegerField(null=True)
+    room_id = models.BigIntegerField()
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_id', 'id'], name='booking_event_room_idx'),
+            models.Index(fields=['created_at'], name='booking_event_created_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.kind} booking {self.booking_id} in room {self.room_id}"
+
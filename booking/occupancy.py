@@ -0,0 +1,214 @@
+from datetime import datetime, time, timedelta
+from functools import cached_property
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .archive import all_bookings
+from .utils import day_range
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def runs(mask):
+    '''
+        runs -> bool massivning oxirgi o'qi bo'yicha ketma-ket True
+        bo'laklarning [boshi, oxiri) indekslarini vektorli usulda qaytaradi.
+        Natija (oldingi o'qlar indekslari..., boshi, oxiri) massivlari.
+    '''
+    padding = [(0, 0)] * (mask.ndim - 1) + [(1, 1)]
+    edges = np.diff(np.pad(mask, padding).astype(np.int8), axis=-1)
+    starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)
+    return (*starts[:-1], starts[-1], ends[-1])
+
+
+class OccupancyGrid:
+    '''
+        OccupancyGrid -> xonalarning bir necha kunlik bandligini
+        (xona, kun, katakcha) o'lchamli bool massivlarda saqlaydi.
+
+        maqsadi -> ko'p xonali so'rovlarni (heatmap, "shu hafta qachon
+        hech bo'lmasa bitta xona bo'sh") har bir xona va kun uchun Python
+        siklisiz, NumPy ning vektorli amallari bilan hisoblash.
+
+        katakcha (slot) `slot_minutes` daqiqalik oraliq. Katakcha bandlik
+        bilan qisman kesishsa ham band hisoblanadi, boshi xonaning ish
+        vaqti ichida bo'lsa ochiq hisoblanadi. Chegaralari daqiqaga
+        to'g'ri keladigan bookinglar uchun natija generate_available_times
+        bilan bir xil.
+    '''
+
+    def __init__(self, rooms, dates, slot_minutes=None):
+        self.rooms = list(rooms)
+        self.dates = list(dates)
+        self.slot_minutes = slot_minutes or settings.OCCUPANCY_SLOT_MINUTES
+        if (24 * 60) % self.slot_minutes:
+            raise ValueError("slot_minutes 1440 ga bo'linishi kerak")
+        self.slot = timedelta(minutes=self.slot_minutes)
+        self.slots = 24 * 60 // self.slot_minutes
+        self.index = {room.pk: i for i, room in enumerate(self.rooms)}
+
+        shape = (len(self.rooms), len(self.dates), self.slots)
+        self.open = np.zeros(shape, dtype=bool)
+        self.busy = np.zeros(shape, dtype=bool)
+        self.fill_hours()
+
+    @classmethod
+    def build(cls, rooms, dates, slot_minutes=None):
+        '''
+            build -> xonalar va ketma-ket sanalar uchun massivlarni
+            barcha bookinglarni (arxivlanganlari bilan) bitta so'rov bilan
+            olib to'ldiradi.
+        '''
+        grid = cls(rooms, dates, slot_minutes)
+        if grid.rooms and grid.dates:
+            range_start, _ = day_range(grid.dates[0])
+            _, range_end = day_range(grid.dates[-1])
+            bookings = all_bookings(
+                ['room_id', 'start', 'end'],
+                room_id__in=grid.index, end__gt=range_start, start__lt=range_end,
+            )
+            grid.add_bookings(bookings)
+        return grid
+
+    def slot_of(self, seconds):
+        return seconds // (self.slot_minutes * 60)
+
+    def fill_hours(self):
+        step = self.slot_minutes * 60
+        for i, room in enumerate(self.rooms):
+            opening = room.opening_time.hour * 3600 + room.opening_time.minute * 60 + room.opening_time.second
+            closing = room.closing_time.hour * 3600 + room.closing_time.minute * 60 + room.closing_time.second
+            # boshi [opening, closing) ichidagi katakchalar
+            first, last = -(-opening // step), -(-closing // step)
+            self.open[i, :, first:last] = True
+
+    def add_bookings(self, bookings):
+        '''
+            add_bookings -> (room_id, start, end) bandliklarini massivga
+            yozadi. Kunlar bitta uzluksiz o'q sifatida qaraladi, shuning
+            uchun yarim tundan o'tadigan bookinglar ham to'g'ri yoziladi.
+        '''
+        origin = datetime.combine(self.dates[0], time.min)
+        time_zone = timezone.get_current_timezone()
+        rows, starts, ends = [], [], []
+        for room_id, start, end in bookings:
+            start = start.astimezone(time_zone).replace(tzinfo=None) - origin
+            end = end.astimezone(time_zone).replace(tzinfo=None) - origin
+            rows.append(self.index[room_id])
+            starts.append(start // timedelta(seconds=1))
+            ends.append(-(-end // timedelta(seconds=1)))
+        if not rows:
+            return
+
+        step = self.slot_minutes * 60
+        total = len(self.dates) * self.slots
+        starts = np.clip(np.array(starts) // step, 0, total)
+        ends = np.clip(-(-np.array(ends) // step), 0, total)
+
+        # har bir xona uchun farqlar massivi: boshida +1, oxirida -1
+        delta = np.zeros((len(self.rooms), total + 1), dtype=np.int32)
+        np.add.at(delta, (rows, starts), 1)
+        np.add.at(delta, (rows, ends), -1)
+        busy = np.cumsum(delta[:, :total], axis=1) > 0
+        self.busy |= busy.reshape(self.busy.shape)
+        self.__dict__.pop('free', None)
+
+    @cached_property
+    def free(self):
+        return self.open & ~self.busy
+
+    def any_free(self):
+        '''
+            any_free -> (kun, katakcha): hech bo'lmasa bitta xona bo'sh (OR).
+        '''
+        return self.free.any(axis=0)
+
+    def all_free(self):
+        '''
+            all_free -> (kun, katakcha): barcha xonalar bo'sh (AND).
+        '''
+        return self.free.all(axis=0) if self.rooms else np.zeros((len(self.dates), self.slots), dtype=bool)
+
+    def utilization(self, axis):
+        '''
+            utilization -> ish vaqtidagi band katakchalarning ochiq
+            katakchalarga nisbati, `axis` bo'yicha yig'ilgan.
+        '''
+        open_slots = self.open.sum(axis=axis)
+        busy_slots = (self.busy & self.open).sum(axis=axis)
+        return np.divide(
+            busy_slots, open_slots,
+            out=np.zeros(np.shape(open_slots), dtype=float), where=open_slots > 0
+        )
+
+    def bucket_utilization(self, minutes=60):
+        '''
+            bucket_utilization -> (kun, `minutes` daqiqalik bo'lak) bo'yicha
+            barcha xonalar bandligi: heatmap uchun.
+        '''
+        if minutes % self.slot_minutes or (24 * 60) % minutes:
+            raise ValueError("bo'lak katakchalarga va 1440 ga bo'linishi kerak")
+        per_bucket = minutes // self.slot_minutes
+        shape = (len(self.rooms), len(self.dates), self.slots // per_bucket, per_bucket)
+        open_slots = self.open.reshape(shape).sum(axis=(0, 3))
+        busy_slots = (self.busy & self.open).reshape(shape).sum(axis=(0, 3))
+        return np.divide(
+            busy_slots, open_slots,
+            out=np.zeros(open_slots.shape, dtype=float), where=open_slots > 0
+        )
+
+    def spans(self, mask, date_index, opening_time=None, closing_time=None):
+        '''
+            spans -> bir kunlik katakchalar massividan bo'sh oraliqlarni
+            (start, end) aware datetime lar sifatida qaytaradi, berilsa
+            ish vaqti bilan kesiladi.
+        '''
+        first, last = runs(mask)
+        return self.to_datetimes(date_index, first, last, opening_time, closing_time)
+
+    def to_datetimes(self, date_index, first, last, opening_time=None, closing_time=None):
+        date_ = self.dates[date_index]
+        day_start = timezone.make_aware(datetime.combine(date_, time.min))
+        lower = timezone.make_aware(datetime.combine(date_, opening_time)) if opening_time else None
+        upper = timezone.make_aware(datetime.combine(date_, closing_time)) if closing_time else None
+        result = []
+        for first_slot, last_slot in zip(first.tolist(), last.tolist()):
+            start = day_start + self.slot * first_slot
+            end = day_start + self.slot * last_slot
+            if lower is not None:
+                start = max(start, lower)
+            if upper is not None:
+                end = min(end, upper)
+            if start < end:
+                result.append((start, end))
+        return result
+
+    def room_spans(self, room_index, date_index):
+        room = self.rooms[room_index]
+        return self.spans(
+            self.free[room_index, date_index], date_index, room.opening_time, room.closing_time
+        )
+
+    def all_room_spans(self):
+        '''
+            all_room_spans -> barcha (xona, kun) juftliklarining bo'sh
+            oraliqlari: {(xona indeksi, kun indeksi): [(start, end), ...]}.
+            Bo'laklar butun massiv bo'yicha bir marta ajratiladi.
+        '''
+        room_indexes, date_indexes, firsts, lasts = runs(self.free)
+        groups = {}
+        for position, key in enumerate(zip(room_indexes.tolist(), date_indexes.tolist())):
+            groups.setdefault(key, []).append(position)
+
+        result = {}
+        for room_index, room in enumerate(self.rooms):
+            for date_index in range(len(self.dates)):
+                positions = groups.get((room_index, date_index), [])
+                result[room_index, date_index] = self.to_datetimes(
+                    date_index, firsts[positions], lasts[positions],
+                    room.opening_time, room.closing_time
+                )
+        return result
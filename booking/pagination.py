@@ -0,0 +1,134 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CustomPagination(PageNumberPagination):
+    page_size = 10
+    max_page_size = 10
+    page_size_query_param = 'page_size'
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'page': self.page.number,
+                'count': self.page.paginator.count,
+                "page_size": self.page.paginator.per_page,
+                'results': data
+            }
+        )
+
+
+class KeysetPagination(BasePagination):
+    '''
+        KeysetPagination -> (id) yoki (capacity, id) bo'yicha cursor
+        (keyset) sahifalash.
+
+        maqsadi -> COUNT(*) va OFFSET siz sahifalash: keyingi sahifa oldingi
+        sahifaning oxirgi qatoridan `WHERE (capacity, id) > (...)` bilan
+        indeks orqali boshlanadi, shuning uchun chuqur sahifalar ham
+        birinchi sahifa kabi tez. Cursor lar mijoz uchun shaffof emas.
+    '''
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    orderings = {
+        'id': ('id',),
+        'capacity': ('capacity', 'id'),
+    }
+    invalid_cursor_message = "noto'g'ri cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.orderings.get(
+            request.query_params.get(self.ordering_query_param), self.orderings['id']
+        )
+        position, reverse = self.decode_cursor(request)
+
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, reverse))
+        ordering = [f'-{field}' if reverse else field for field in self.fields]
+
+        # bitta ortiqcha qator keyingi sahifa bor-yo'qligini bildiradi
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.results = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def seek(self, position, reverse):
+        '''
+            seek -> (f1, f2, ...) > (v1, v2, ...) leksikografik shartini
+            Q obyektlari orqali quradi (reverse bo'lsa <).
+        '''
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.fields):
+            equal = {self.fields[j]: position[j] for j in range(i)}
+            condition |= Q(**equal, **{f'{field}__{lookup}': position[i]})
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps([position, reverse], separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(cursor.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            position, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(position) != len(self.fields) or not all(isinstance(v, int) for v in position):
+                raise ValueError
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(reverse)
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.get_position(self.results[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.results:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.results[0]), True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                'next': self.get_next_link(),
+                'previous': self.get_previous_link(),
+                'page_size': self.page_size,
+                'results': data
+            }
+        )
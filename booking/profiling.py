@@ -0,0 +1,258 @@
+import json
+import os
+import random
+import secrets
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+PROFILE_SALT = 'booking.profiling'
+
+
+def make_profile_token():
+    '''
+        make_profile_token -> PROFILING_HEADER sarlavhasi uchun imzolangan
+        qiymat, PROFILING_TOKEN_MAX_AGE sekund amal qiladi.
+    '''
+    return signing.TimestampSigner(salt=PROFILE_SALT).sign('profile')
+
+
+def should_profile(request):
+    '''
+        should_profile -> so'rov profillanadimi: sarlavhadagi imzo to'g'ri
+        bo'lsa yoki PROFILING_SAMPLE_RATE ulushidagi tasodifiy so'rov bo'lsa.
+    '''
+    token = request.headers.get(settings.PROFILING_HEADER)
+    if token:
+        try:
+            signing.TimestampSigner(salt=PROFILE_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+            return True
+        except signing.BadSignature:
+            pass
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def frame_name(code):
+    filename = code.co_filename
+    for prefix in (f'{settings.BASE_DIR}{os.sep}', f'site-packages{os.sep}'):
+        if prefix in filename:
+            filename = filename.split(prefix, 1)[1]
+            break
+    # co_qualname faqat Python 3.11 dan boshlab bor
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({filename}:{code.co_firstlineno})'
+
+
+class StackProfiler:
+    '''
+        StackProfiler -> sys.setprofile orqali joriy oqimdagi har bir
+        chaqiruv stekida o'tgan vaqtni (mikrosekund) yig'adi.
+
+        maqsadi -> natija to'g'ridan-to'g'ri collapsed-stack formatida
+        (`a;b;c 120`), ya'ni flamegraph.pl yoki speedscope da ochiladi.
+        Qisqa (bir necha ms) so'rovlarda ham sampling profiler kabi
+        namunalar yetishmasligi bo'lmaydi. Faqat tanlangan so'rovda yoqiladi.
+    '''
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.stack = []
+        self.names = {}
+        self.last = 0
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self.stack:
+            self.stacks[tuple(self.stack)] += now - self.last
+        if event == 'call':
+            code = frame.f_code
+            name = self.names.get(code)
+            if name is None:
+                name = self.names[code] = frame_name(code)
+            self.stack.append(name)
+        elif event == 'c_call':
+            self.stack.append(f'{getattr(arg, "__qualname__", arg)} (builtin)')
+        elif self.stack:
+            # return, c_return, c_exception; profiler yoqilgandan oldingi
+            # kadrlardan qaytish stekda yo'q
+            self.stack.pop()
+        self.last = time.perf_counter_ns()
+
+    def __enter__(self):
+        self.last = time.perf_counter_ns()
+        sys.setprofile(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.setprofile(None)
+
+    def collapsed(self):
+        return ''.join(
+            f"{';'.join(stack)} {max(nanoseconds // 1000, 1)}\n"
+            for stack, nanoseconds in self.stacks.items()
+        )
+
+
+class SqlTimeline:
+    '''
+        SqlTimeline -> so'rov boshidan SQL so'rovlari boshlanish vaqti va
+        davomiyligi (ms), parametrlarsiz.
+    '''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            finished = time.perf_counter()
+            self.queries.append({
+                'start_ms': round((started - self.started) * 1000, 3),
+                'duration_ms': round((finished - started) * 1000, 3),
+                'sql': sql,
+                'many': many,
+            })
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def save_profile(view, request, response, duration, profiler, timeline):
+    '''
+        save_profile -> <nom>.collapsed (steklar) va <nom>.json (so'rov
+        ma'lumotlari va SQL timeline) fayllarini yozadi, PROFILING_KEEP
+        tadan eski profillarni o'chiradi. Profil nomini qaytaradi.
+    '''
+    now = timezone.now()
+    name = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{view}-{secrets.token_hex(3)}"
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f'{name}.collapsed').write_text(profiler.collapsed())
+    (directory / f'{name}.json').write_text(json.dumps({
+        'name': name,
+        'view': view,
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'created_at': now.isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'queries': len(timeline.queries),
+        'db_time_ms': round(sum(query['duration_ms'] for query in timeline.queries), 3),
+        'sql': timeline.queries,
+    }))
+
+    # nom vaqtdan boshlanadi, ya'ni tartib bo'yicha eng eskisi birinchi
+    profiles = sorted(directory.glob('*.json'))
+    for old in profiles[:-settings.PROFILING_KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_suffix('.collapsed').unlink(missing_ok=True)
+    return name
+
+
+class ProfilingMixin:
+    '''
+        ProfilingMixin -> APIView lar uchun tanlangan so'rovni profillash.
+
+        PROFILING_HEADER sarlavhasida make_profile_token() qiymati
+        (`python manage.py profile_token`) yuborilgan yoki
+        PROFILING_SAMPLE_RATE bo'yicha tanlangan so'rov StackProfiler va
+        SqlTimeline bilan bajariladi, profil nomi X-Profile-Id sarlavhasida
+        qaytariladi. Qolgan so'rovlarga faqat should_profile() tekshiruvi
+        qo'shiladi.
+    '''
+    profile_name = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if not should_profile(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        timeline = SqlTimeline()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timeline))
+            with StackProfiler() as profiler:
+                response = super().dispatch(request, *args, **kwargs)
+        duration = time.perf_counter() - timeline.started
+
+        view = self.profile_name or type(self).__name__
+        response['X-Profile-Id'] = save_profile(view, request, response, duration, profiler, timeline)
+        return response
+
+
+def read_profile(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        # rotatsiya paytida o'chirilgan
+        return None
+
+
+class ProfileListView(APIView):
+    '''
+        ProfileListView -> GET /api/profiles/: oxirgi profillar (eng
+        yangisi birinchi), SQL timeline siz. Faqat adminlar uchun.
+    '''
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        profiles = []
+        for path in sorted(profile_dir().glob('*.json'), reverse=True):
+            data = read_profile(path)
+            if data is not None:
+                data.pop('sql')
+                profiles.append(data)
+        return Response(profiles, status=status.HTTP_200_OK)
+
+
+def profile_path(name, suffix):
+    # nom faqat profil papkasidagi fayllarga ishora qilishi kerak
+    path = profile_dir() / f'{name}{suffix}'
+    if Path(name).name != name or not path.exists():
+        raise Http404
+    return path
+
+
+class ProfileDetailView(APIView):
+    '''
+        ProfileDetailView -> GET /api/profiles/<nom>/: profil ma'lumotlari
+        SQL timeline bilan. Faqat adminlar uchun.
+    '''
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name, *args, **kwargs):
+        data = read_profile(profile_path(name, '.json'))
+        if data is None:
+            raise Http404
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ProfileStacksView(APIView):
+    '''
+        ProfileStacksView -> GET /api/profiles/<nom>/collapsed/: collapsed-stack
+        fayli (flamegraph.pl, speedscope uchun). Faqat adminlar uchun.
+    '''
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name, *args, **kwargs):
+        path = profile_path(name, '.collapsed')
+        return FileResponse(
+            path.open('rb'), content_type='text/plain; charset=utf-8',
+            as_attachment=True, filename=path.name,
+        )
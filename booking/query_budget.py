@@ -0,0 +1,178 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('booking.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    '''
+        QueryStats -> bitta so'rov (yoki kod bloki) bajargan SQL
+        so'rovlari soni, umumiy vaqti va takrorlanishlari.
+
+        maqsadi -> DEBUG=True (connection.queries) siz ishlash: so'rovlar
+        execute_wrapper orqali sanaladi, faqat SQL shabloni va parametrlar
+        xeshi saqlanadi.
+    '''
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()  # (sql, parametrlar) -> soni
+        self.templates = Counter()  # sql shabloni -> soni
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.templates[sql] += 1
+            self.statements[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self):
+        # bir xil parametrlar bilan qayta bajarilgan so'rovlar soni
+        return sum(count - 1 for count in self.statements.values())
+
+    def repeated(self, threshold):
+        '''
+            repeated -> kamida threshold marta bajarilgan SQL shablonlari
+            (N+1 belgisi), eng ko'p bajarilgani birinchi.
+        '''
+        return [(sql, count) for sql, count in self.templates.most_common() if count >= threshold]
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_time_ms': round(self.duration * 1000, 3),
+            'duplicates': self.duplicates,
+            'repeated': [
+                {'sql': sql[:300], 'count': count}
+                for sql, count in self.repeated(settings.QUERY_BUDGET_REPEAT_THRESHOLD)[:5]
+            ],
+        }
+
+
+@contextmanager
+def capture_queries(using=None):
+    '''
+        capture_queries -> blok ichida barcha (yoki using) bazalarda
+        bajarilgan so'rovlarni QueryStats ga yig'adi.
+    '''
+    stats = QueryStats()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        yield stats
+
+
+def check_budget(name, stats, budget=None):
+    '''
+        check_budget -> budjetdan oshgan bo'lsa xatolik sabablari ro'yhati,
+        aks holda bo'sh ro'yhat. budget berilmasa QUERY_BUDGETS dan olinadi.
+    '''
+    if budget is None:
+        budget = settings.QUERY_BUDGETS.get(name)
+    problems = []
+    if budget is not None and stats.count > budget:
+        problems.append(f'{stats.count} ta so\'rov, budjet {budget}')
+    if stats.duplicates > settings.QUERY_BUDGET_MAX_DUPLICATES:
+        problems.append(f'{stats.duplicates} ta takroriy so\'rov')
+    if stats.repeated(settings.QUERY_BUDGET_REPEAT_THRESHOLD):
+        problems.append('N+1: bir xil so\'rov ko\'p marta bajarilgan')
+    return problems
+
+
+@contextmanager
+def query_budget(name, budget=None):
+    '''
+        query_budget -> testlar uchun: blok ichidagi so'rovlar name (URL
+        nomi) budjetidan oshsa, takroriy yoki N+1 so'rovlar bo'lsa
+        AssertionError.
+
+            with query_budget('availability'):
+                self.client.get(url)
+    '''
+    with capture_queries() as stats:
+        yield stats
+    problems = check_budget(name, stats, budget)
+    if problems:
+        raise AssertionError(f"{name}: {'; '.join(problems)}\n{json.dumps(stats.as_dict(), indent=2)}")
+
+
+class QueryBudgetMiddleware:
+    '''
+        QueryBudgetMiddleware -> har bir so'rovning SQL so'rovlarini URL
+        nomi bo'yicha budjet (settings.QUERY_BUDGETS) bilan solishtiradi.
+
+        QUERY_BUDGET_ENFORCE=True (dev va test) bo'lsa QUERY_BUDGETS dagi
+        view larning budjetdan oshishi QueryBudgetExceeded xatoligi bilan
+        to'xtatiladi, boshqa view lar (masalan admin) va production da
+        'booking.query_budget' loggeriga JSON yozuv sifatida yoziladi. DB vaqti QUERY_BUDGET_SLOW_MS dan oshgan so'rovlar ham
+        yoziladi. Streaming javoblar tanasidagi so'rovlar sanalmaydi.
+        ASGI ostida async rejimda ishlaydi (sync_to_async ga o'tkazilmaydi).
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with capture_queries() as stats:
+            response = self.get_response(request)
+        return self.check(request, response, stats)
+
+    async def __acall__(self, request):
+        # DB ulanishlari oqimga bog'liq, async ORM so'rovlari esa
+        # sync_to_async oqimida bajariladi: hisoblagich o'sha oqimda ulanadi
+        capture = capture_queries()
+        stats = await sync_to_async(capture.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(capture.__exit__)(None, None, None)
+        return self.check(request, response, stats)
+
+    def check(self, request, response, stats):
+        # MetricsMiddleware uchun
+        request.query_stats = stats
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.url_name if match else None
+        problems = check_budget(name, stats) if name else []
+        slow = stats.duration * 1000 > settings.QUERY_BUDGET_SLOW_MS
+        if not problems and not slow:
+            return response
+
+        record = {
+            'url_name': name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'budget': settings.QUERY_BUDGETS.get(name),
+            'problems': problems,
+            **stats.as_dict(),
+        }
+        if problems and settings.QUERY_BUDGET_ENFORCE and name in settings.QUERY_BUDGETS:
+            raise QueryBudgetExceeded(json.dumps(record))
+        logger.warning(json.dumps(record), extra={'query_budget': record})
+        return response
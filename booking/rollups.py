@@ -0,0 +1,111 @@
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+
+def booking_usage(start, end):
+    '''
+        booking_usage -> bookingning (mahalliy sana, sekundlar) juftligi.
+    '''
+    return timezone.localtime(start).date(), int((end - start).total_seconds())
+
+
+def usage_rows(bookings):
+    '''
+        usage_rows -> room_id bo'yicha tartiblangan (room_id, start, end)
+        oqimidan (room_id, date, sekundlar, soni) yig'indilarini hosil
+        qiladi. Xotirada bir vaqtda faqat bitta xonaning kunlari turadi.
+    '''
+    current_room, days = None, defaultdict(lambda: [0, 0])
+    for room_id, start, end in bookings:
+        if room_id != current_room:
+            for date_, (seconds, count) in sorted(days.items()):
+                yield current_room, date_, seconds, count
+            current_room, days = room_id, defaultdict(lambda: [0, 0])
+        date_, seconds = booking_usage(start, end)
+        days[date_][0] += seconds
+        days[date_][1] += 1
+
+    for date_, (seconds, count) in sorted(days.items()):
+        yield current_room, date_, seconds, count
+
+
+def write_usage(model, bookings, batch_size=1000):
+    '''
+        write_usage -> usage_rows natijalarini `model` (RoomDailyUsage)
+        jadvaliga batch_size lik bo'laklarda yozadi va yozilgan qatorlar
+        sonini qaytaradi.
+    '''
+    rows = (
+        model(room_id=room_id, date=date_, booked_seconds=seconds, bookings=count)
+        for room_id, date_, seconds, count in usage_rows(bookings)
+    )
+    written = 0
+    while batch := list(islice(rows, batch_size)):
+        model.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def usage_changed(added=(), removed=()):
+    '''
+        usage_changed -> qo'shilgan va olib tashlangan (room_id, start, end)
+        bandliklarini RoomDailyUsage ga qo'shadi yoki ayiradi.
+
+        Mavjud qatorlar bitta UPDATE ... SET x = x + CASE ... bilan
+        o'zgartiriladi (parallel yozuvlarda ham qiymat yo'qolmaydi),
+        yo'qlari bulk_create bilan qo'shiladi.
+    '''
+    from .models import RoomDailyUsage
+
+    deltas = defaultdict(lambda: [0, 0])
+    for sign, changes in ((1, added), (-1, removed)):
+        for room_id, start, end in changes:
+            date_, seconds = booking_usage(start, end)
+            deltas[room_id, date_][0] += sign * seconds
+            deltas[room_id, date_][1] += sign
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+
+    existing = {
+        (room_id, date_): pk
+        for pk, room_id, date_ in RoomDailyUsage.objects.filter(
+            room_id__in={room_id for room_id, _ in deltas},
+            date__in={date_ for _, date_ in deltas},
+        ).values_list('pk', 'room_id', 'date')
+        if (room_id, date_) in deltas
+    }
+
+    if existing:
+        RoomDailyUsage.objects.filter(pk__in=existing.values()).update(
+            booked_seconds=Case(*[
+                When(pk=pk, then=F('booked_seconds') + Value(deltas[key][0]))
+                for key, pk in existing.items()
+            ]),
+            bookings=Case(*[
+                When(pk=pk, then=F('bookings') + Value(deltas[key][1]))
+                for key, pk in existing.items()
+            ]),
+        )
+    RoomDailyUsage.objects.bulk_create([
+        RoomDailyUsage(room_id=room_id, date=date_, booked_seconds=seconds, bookings=count)
+        for (room_id, date_), (seconds, count) in deltas.items()
+        if (room_id, date_) not in existing
+    ])
+
+
+def week_days(first, last):
+    '''
+        week_days -> [first, last] oralig'idagi har bir hafta kuni
+        (1 - dushanba, 7 - yakshanba) necha marta uchrashi.
+    '''
+    counts = defaultdict(int)
+    date_ = first
+    while date_ <= last:
+        counts[date_.isoweekday()] += 1
+        date_ += timedelta(days=1)
+    return counts
@@ -0,0 +1,81 @@
+from django.db.models import Count
+
+
+def normalize_name(name):
+    '''
+        normalize_name -> xona nomini taqqoslash uchun kichik harflarga
+        o'tkazadi va ortiqcha bo'shliqlarni olib tashlaydi.
+    '''
+    return ' '.join((name or '').casefold().split())
+
+
+def name_trigrams(name):
+    '''
+        name_trigrams -> normallashtirilgan nomdagi barcha 3 harfli
+        bo'laklar (trigramlar) to'plami.
+    '''
+    name = normalize_name(name)
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def index_rooms(rooms):
+    '''
+        index_rooms -> xonalarning trigram indeksini ularning hozirgi
+        nomlariga moslaydi: faqat o'zgargan trigramlar o'chiriladi yoki
+        qo'shiladi. Room saqlanganda signal orqali, bulk_create dan keyin
+        esa qo'lda chaqiriladi.
+    '''
+    from .models import RoomNameTrigram
+
+    rooms = {room.pk: room for room in rooms}
+    existing = {}
+    for id, room_id, trigram in RoomNameTrigram.objects.filter(
+        room_id__in=rooms
+    ).values_list('id', 'room_id', 'trigram'):
+        existing.setdefault(room_id, {})[trigram] = id
+
+    stale = []
+    missing = []
+    for room_id, room in rooms.items():
+        current = existing.get(room_id, {})
+        trigrams = name_trigrams(room.name)
+        stale += [id for trigram, id in current.items() if trigram not in trigrams]
+        missing += [
+            RoomNameTrigram(room_id=room_id, trigram=trigram)
+            for trigram in trigrams - current.keys()
+        ]
+
+    if stale:
+        RoomNameTrigram.objects.filter(id__in=stale).delete()
+    RoomNameTrigram.objects.bulk_create(missing, batch_size=1000)
+
+
+def search_rooms(queryset, query):
+    '''
+        search_rooms -> nomida `query` qatnashgan xonalarni trigram
+        indeksi orqali topadi.
+
+        maqsadi -> `name__icontains` (LIKE '%x%') butun jadvalni ko'rib
+        chiqadi. Trigram indeksi so'rovdagi barcha trigramlarga ega
+        xonalarni indeks orqali tanlaydi, keyin faqat shu nomzodlar
+        oddiy substring bilan tekshiriladi. 3 harfdan qisqa so'rovlar
+        uchun indeks ishlatilmaydi.
+    '''
+    from .models import RoomNameTrigram
+
+    query = normalize_name(query)
+    trigrams = name_trigrams(query)
+    if not trigrams:
+        return queryset.filter(normalized_name__contains=query)
+
+    # uzun so'rovlarda bir-biriga yopishmagan trigramlar nomzodlarni
+    # toraytirish uchun yetarli, qolganini substring tekshiruvi bajaradi
+    trigrams = {query[i:i + 3] for i in range(0, len(query) - 2, 3)} | {query[-3:]}
+
+    candidates = RoomNameTrigram.objects.filter(
+        trigram__in=trigrams
+    ).values('room_id').annotate(
+        matched=Count('trigram')
+    ).filter(matched=len(trigrams)).values('room_id')
+
+    return queryset.filter(pk__in=candidates, normalized_name__contains=query)
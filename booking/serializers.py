@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from .models import Booking, Room
+from .holds import with_holds
+from .index import booking_index
+from .models import Booking, Resident, Room
 from django.utils import timezone
+from django.conf import settings
 
 
 class RoomSerializer(serializers.ModelSerializer):
@@ -10,7 +13,66 @@ class RoomSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'type', 'capacity')
 
 
+class InstanceRelatedField(serializers.PrimaryKeyRelatedField):
+    '''
+        InstanceRelatedField -> view allaqachon o'qigan (yoki qulflagan)
+        obyekt berilsa uni qayta so'ramaydi, aks holda pk bo'yicha oladi.
+    '''
+
+    def to_internal_value(self, data):
+        if isinstance(data, self.get_queryset().model):
+            return data
+        return super().to_internal_value(data)
+
+
+def check_booking_period(room, start, end):
+    '''
+        check_booking_period -> funksiyasi band qilinayotgan vaqtni
+        bazaga murojaat qilmasdan tekshiradi, xato bo'lsa ValidationError
+        ko'taradi. Kesishishlar alohida tekshiriladi.
+    '''
+    # agar 'start' uchun kiritilgan sana oldingi sana bo‘lsa
+    if timezone.localdate() > start.date():
+        raise ValidationError(
+            "O'tgan vaqt uchun bron qilolmaysiz",
+            code='error'
+            )
+
+    # agart 'start' vaqti hozirgi vaqtdan kichik bo'lsa
+    if timezone.localdate() == start.date():
+        if timezone.localtime().time() > start.time():
+            raise ValidationError(
+                "O'tgan vaqt uchun bron qilolmaysiz",
+                code='error'
+                )            
+
+    # agar 'start' uchun kiritilgan sana va vaqt 'end' uchun kiritilgan vaqtdan keyin kelsa
+    if end <= start:
+        raise ValidationError(
+            "boshlanish vaqti tugash vaqtidan keyin kelolmaydi!",
+            code='error'
+            )
+    
+    # residentlar xonani faqat eng ko‘pi bilan bir kun uchun band
+    # qila olishini ta'minlash
+    if start.date() != end.date():
+        raise ValidationError(
+            "Siz xonani eng ko‘pi bilan bir kun uchun band qila olishingiz mumkin",
+            code='error'
+            )
+
+    # agar foydalanuvchi kiritgan vaqt xonaning ish vaqtiga nomutanosib bo‘lsa
+    if start.time() < room.opening_time or end.time() > room.closing_time:
+        raise ValidationError(
+            f"Siz ushbu xonani faqatgina soat {room.opening_time} dan {room.closing_time} gacha band qila olasiz ",
+            code="error"
+            )
+
+
 class BookingRoomSerializer(serializers.ModelSerializer):
+    resident = InstanceRelatedField(queryset=Resident.objects.all())
+    room = InstanceRelatedField(queryset=Room.objects.all())
+
     class Meta:
         model = Booking
         fields = ('resident', 'room', 'start', 'end')
@@ -20,49 +82,78 @@ class BookingRoomSerializer(serializers.ModelSerializer):
         start = data['start']
         end = data['end']
         
-        # agar 'start' uchun kiritilgan sana oldingi sana bo‘lsa
-        if timezone.localdate() > start.date():
-            raise ValidationError(
-                "O'tgan vaqt uchun bron qilolmaysiz",
-                code='error'
-                )
-
-        # agart 'start' vaqti hozirgi vaqtdan kichik bo'lsa
-        if timezone.localdate() == start.date():
-            if timezone.localtime().time() > start.time():
-                raise ValidationError(
-                    "O'tgan vaqt uchun bron qilolmaysiz",
-                    code='error'
-                    )            
+        check_booking_period(room, start, end)
 
-        # agar 'start' uchun kiritilgan sana va vaqt 'end' uchun kiritilgan vaqtdan keyin kelsa
-        if end <= start:
-            raise ValidationError(
-                "boshlanish vaqti tugash vaqtidan keyin kelolmaydi!",
-                code='error'
-                )
-        
-        # residentlar xonani faqat eng ko‘pi bilan bir kun uchun band
-        # qila olishini ta'minlash
-        if start.date() != end.date():
-            raise ValidationError(
-                "Siz xonani eng ko‘pi bilan bir kun uchun band qila olishingiz mumkin",
-                code='error'
-                )
+        # jarayon ichidagi indeks `room:<id>` hisoblagichiga mos bo'lsa aniq
+        # kesishishni bitta kalit bo'yicha so'rov bilan rad etadi, eskirgan
+        # bo'lsa ishlatilmaydi. Yakuniy tekshiruv baza orqali (yozish tranzaksiyasi ichida)
+        index = booking_index.checked(room.pk)
+        if index is not None and index.overlaps(start, end):
+            raise ValidationError('uzr, siz tanlagan vaqtda xona band', code="error")
 
-        # agar foydalanuvchi kiritgan vaqt xonaning ish vaqtiga nomutanosib bo‘lsa
-        if start.time() < room.opening_time or end.time() > room.closing_time:
-            raise ValidationError(
-                f"Siz ushbu xonani faqatgina soat {room.opening_time} dan {room.closing_time} gacha band qila olasiz ",
-                code="error"
-                )
-        
         # end_gt=start -> Kiritilgan "end" sana va vaqti "start" sana va vaqtidan keyin(katta) bo‘lishi
         # start_lt=end -> Kiritilgan "start" sana va vaqti 'end" sana va vaqtidan oldin(kichik) bo‘lishi
         bookings = Booking.objects.filter(room = room, end__gt = start, start__lt = end)
         
-        # agar shu vaqtda xonani bron qilishgan bo‘lsa 
-        if bookings.exists():
+        # agar shu vaqtda xonani bron qilishgan yoki vaqtincha band (hold) qilishgan bo‘lsa
+        if with_holds(bookings, room.pk, start, end).exists():
             raise ValidationError('uzr, siz tanlagan vaqtda xona band', code="error")
 
         return data
+
+
+class ResidentNameSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=150)
+
+
+class BatchBookingItemSerializer(serializers.Serializer):
+    room = serializers.IntegerField()
+    resident = ResidentNameSerializer()
+    start = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+    end = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+
+
+class BatchBookingSerializer(serializers.Serializer):
+    MODES = [
+        ('atomic', 'All or nothing'),
+        ('best_effort', 'Best effort'),
+    ]
+
+    mode = serializers.ChoiceField(choices=MODES, default='atomic')
+    bookings = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.BOOKING_BATCH_MAX_SIZE
+    )
+
+
+class BookingSeriesSerializer(serializers.Serializer):
+    resident = ResidentNameSerializer()
+    start = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+    end = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+    interval_days = serializers.IntegerField(min_value=1, max_value=365, default=7)
+    occurrences = serializers.IntegerField(
+        min_value=1, max_value=settings.BOOKING_SERIES_MAX_OCCURRENCES
+    )
+
+
+class BookingHoldSerializer(serializers.Serializer):
+    resident = ResidentNameSerializer()
+    start = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+    end = serializers.DateTimeField(input_formats=[settings.DATETIME_FORMAT, 'iso-8601'])
+    ttl = serializers.IntegerField(
+        min_value=1, max_value=settings.BOOKING_HOLD_MAX_TTL, default=settings.BOOKING_HOLD_TTL
+    )
+
+
+class BookingSeriesUpdateSerializer(serializers.Serializer):
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, data):
+        if data['end_time'] <= data['start_time']:
+            raise ValidationError(
+                "boshlanish vaqti tugash vaqtidan keyin kelolmaydi!",
+                code='error'
+                )
+        return data
@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import availability_cache
+from .changefeed import change_broker, record_events
+from .index import booking_index
+from .models import Booking, BookingQuerySet, Room
+from .materialized import apply_changes, rebuild_room
+from .rollups import usage_changed
+from .search import index_rooms
+from .versions import ROOMS_KEY, bump, room_day_key, room_key
+
+
+def as_aware(value):
+    if timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def normalize_change(room_id, start, end, booking_id=None):
+    return room_id, as_aware(start), as_aware(end), booking_id
+
+
+def booking_dates(start, end):
+    '''
+        booking_dates -> booking qamragan mahalliy sanalar ro'yhati.
+    '''
+    date_ = timezone.localtime(as_aware(start)).date()
+    last_date = timezone.localtime(as_aware(end)).date()
+    dates = [date_]
+    while date_ < last_date:
+        date_ += timedelta(days=1)
+        dates.append(date_)
+    return dates
+
+
+def bookings_changed(added=(), removed=(), rooms=None, materialize=True):
+    '''
+        bookings_changed -> (room_id, start, end[, booking_id]) bandliklari
+        qo'shilganda (added) yoki olib tashlanganda (removed) ular bilan
+        bog'liq RoomDayFreeInterval, RoomDailyUsage qatorlari, versiya
+        hisoblagichlari, BookingEvent hodisalari, BookingIndex va keshlarni
+        yangilaydi.
+
+        signal ishlamaydigan joylarda (bulk_create, bulk_update) ham
+        shu funksiyani chaqirish kerak. rooms -> {room_id: Room} (ixtiyoriy).
+    '''
+    added_events = [normalize_change(*change) for change in added]
+    removed_events = [normalize_change(*change) for change in removed]
+    added = [(room_id, start, end) for room_id, start, end, _ in added_events]
+    removed = [(room_id, start, end) for room_id, start, end, _ in removed_events]
+    changed = added + removed
+
+    if materialize:
+        rooms = dict(rooms or {})
+        missing = {room_id for room_id, _, _ in changed} - set(rooms)
+        if missing:
+            rooms.update(Room.objects.in_bulk(missing))
+        apply_changes(rooms, added, removed)
+        usage_changed(added, removed)
+    record_events(added_events, removed_events)
+    transaction.on_commit(change_broker.notify)
+    transaction.on_commit(lambda: booking_index.apply(added_events, removed_events))
+
+    room_days = {
+        (room_id, date_)
+        for room_id, start, end in changed
+        for date_ in booking_dates(start, end)
+    }
+    bump(
+        [room_key(room_id) for room_id, _, _ in changed]
+        + [room_day_key(room_id, date_) for room_id, date_ in room_days]
+    )
+
+    def invalidate():
+        for room_id, date_ in room_days:
+            availability_cache.invalidate(room_id, date_)
+
+    # tranzaksiya ichidagi o'qishlar uchun darhol, parallel so'rovlar
+    # eski qiymatni qayta yozgan bo'lishi mumkinligi uchun commit dan keyin ham
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_booking(sender, instance, **kwargs):
+    # booking boshqa vaqtga yoki xonaga ko'chirilsa eski kun ham yangilanadi
+    instance._previous = None
+    if instance.pk is not None:
+        instance._previous = Booking.objects.filter(pk=instance.pk).values_list(
+            'room_id', 'start', 'end'
+        ).first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    bookings_changed(
+        added=[(instance.room_id, instance.start, instance.end, instance.pk)],
+        removed=[(*previous, instance.pk)] if previous else [],
+        rooms={instance.room_id: instance.room},
+    )
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, origin=None, **kwargs):
+    # BookingQuerySet.delete() o'zgarishlarni bitta bookings_changed bilan qo'llaydi
+    if isinstance(origin, BookingQuerySet):
+        return
+    # xona o'chirilayotgan bo'lsa uning qatorlari ham CASCADE bilan o'chadi
+    room_deleted = isinstance(origin, Room) or getattr(origin, 'model', None) is Room
+    bookings_changed(
+        removed=[(instance.room_id, instance.start, instance.end, instance.pk)],
+        materialize=not room_deleted,
+    )
+
+
+@receiver(pre_save, sender=Room)
+def remember_previous_hours(sender, instance, **kwargs):
+    instance._previous_hours = None
+    if instance.pk is not None:
+        instance._previous_hours = Room.objects.filter(pk=instance.pk).values_list(
+            'opening_time', 'closing_time'
+        ).first()
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, created, **kwargs):
+    # nom bo'yicha qidiruv indeksini yangilash (o'chirishda CASCADE)
+    index_rooms([instance])
+    bump([ROOMS_KEY, room_key(instance.pk)])
+
+    # ish vaqti o'zgarsa xonaning bo'sh oraliqlari qayta hisoblanadi
+    previous = getattr(instance, '_previous_hours', None)
+    if not created and previous and previous != (instance.opening_time, instance.closing_time):
+        rebuild_room(instance)
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    bump([ROOMS_KEY, room_key(instance.pk)])
+    booking_index.discard(instance.pk)
+
@@ -1,14 +1,51 @@
 from datetime import datetime
 from datetime import date
+from datetime import time
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import time as time_module
+import asyncio
+import json
+import tempfile
+from types import SimpleNamespace
+import tracemalloc
+from pathlib import Path
 
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APIRequestFactory, APIClient
+from rest_framework.request import Request
 from rest_framework import status
 from django.utils import timezone
-from django.urls import reverse
+from django.urls import resolve, reverse
+from django.http import HttpResponse
 from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, OperationalError, connection
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase, AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+import random
 
-from .models import Room, Booking, Resident
+from .models import (
+    Room, Booking, Resident, BookingSeries, RoomNameTrigram, RoomDayFreeInterval, RoomDailyUsage,
+    BookingEvent, BookingHold, ArchivedBooking,
+)
+from .search import name_trigrams
 from .serializers import RoomSerializer
+from .views import RoomAvailabiltyAPIView
+from .occupancy import OccupancyGrid
+from .utils import day_range, format_intervals
+from .cache import availability_cache
+from .changefeed import ChangeBroker
+from .materialized import apply_changes
+from .index import booking_index
+from .metrics import MetricsMiddleware, registry
+from .profiling import frame_name, make_profile_token
+from .query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, capture_queries, query_budget
 
 
 class RoomListTest(APITestCase):
@@ -143,6 +180,7 @@ class RoomAvailabiltyTest(APITestCase):
         self.room = Room.objects.create(name='traning room', type='focus', capacity=9)
         self.resident = Resident.objects.create(name="Residentjon")
         self.url = reverse('availability', args=[self.room.pk])
+        availability_cache.clear()
 
     def test_get_room_availability_today(self):
         response = self.client.get(self.url, format='json')
@@ -178,3 +216,1671 @@ class RoomAvailabiltyTest(APITestCase):
         assert isinstance(response.data, list), "qabul qilingan ma'lumot list tipida bo'lishi kerak"
         assert len(response.data) >= 2, "ro'yhatda kamida ikta element bo'lishi kerak"
         
+
+
+class BookingQueryPlanTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='traning room', type='focus', capacity=9)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.indexes = ('booking_room_start_idx', 'booking_room_end_idx')
+
+    def assert_uses_index(self, queryset):
+        plan = queryset.explain()
+        assert any(index in plan for index in self.indexes), plan
+
+    def test_availability_query_uses_index(self):
+        url = reverse('availability', args=[self.room.pk])
+        view = RoomAvailabiltyAPIView()
+        view.request = Request(APIRequestFactory().get(url, {'date': '2023-06-30'}))
+        view.kwargs = {'pk': self.room.pk}
+
+        self.assert_uses_index(view.get_queryset().order_by('start'))
+
+    def test_overlap_query_uses_index(self):
+        start = timezone.now()
+        end = start + timedelta(hours=1)
+        queryset = Booking.objects.filter(room=self.room, end__gt=start, start__lt=end)
+
+        self.assert_uses_index(queryset)
+
+
+class RoomsAvailabilityTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name=f'room {i}', type='team', capacity=i + 1)
+            for i in range(5)
+        ]
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('rooms-availability')
+
+        for room in self.rooms[:3]:
+            Booking.objects.create(
+                room=room,
+                resident=self.resident,
+                start=timezone.make_aware(datetime(2023, 6, 30, 10)),
+                end=timezone.make_aware(datetime(2023, 6, 30, 11))
+            )
+
+    def test_all_rooms_in_constant_queries(self):
+        # xonalar, bo'sh oraliqlar va faol holdlar
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'date': '2023-06-30'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(self.rooms))
+        self.assertEqual(response.data[0]['available'], [
+            {'start': '30-06-2023 00:00:00', 'end': '30-06-2023 10:00:00'},
+            {'start': '30-06-2023 11:00:00', 'end': '30-06-2023 23:59:59'},
+        ])
+        self.assertEqual(len(response.data[4]['available']), 1)
+
+    def test_filter_by_type_and_capacity(self):
+        response = self.client.get(self.url, {'date': '2023-06-30', 'type': 'team', 'min_capacity': 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([room['capacity'] for room in response.data], [4, 5])
+
+    def test_invalid_capacity(self):
+        response = self.client.get(self.url, {'min_capacity': 'ko‘p'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_date(self):
+        response = self.client.get(self.url, {'date': 'garbage'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+
+class FreeRoomListTest(APITestCase):
+    def setUp(self):
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.big = Room.objects.create(name='big room', type='conference', capacity=20)
+        self.small = Room.objects.create(name='small room', type='conference', capacity=4)
+        self.busy = Room.objects.create(name='busy room', type='conference', capacity=6)
+        self.closed = Room.objects.create(
+            name='morning room', type='conference', capacity=5,
+            opening_time=time(8, 0), closing_time=time(10, 0)
+        )
+        Booking.objects.create(
+            room=self.busy,
+            resident=self.resident,
+            start=timezone.make_aware(datetime(2023, 6, 30, 9, 30)),
+            end=timezone.make_aware(datetime(2023, 6, 30, 10, 30))
+        )
+        self.url = reverse('free-rooms')
+        self.params = {'start': '30-06-2023 09:00:00', 'end': '30-06-2023 11:00:00'}
+
+    def test_free_rooms_ordered_by_capacity(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [room['id'] for room in response.data['results']],
+            [self.small.id, self.big.id]
+        )
+
+    def test_free_rooms_min_capacity(self):
+        response = self.client.get(self.url, {**self.params, 'min_capacity': 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([room['id'] for room in response.data['results']], [self.big.id])
+
+    def test_invalid_window(self):
+        response = self.client.get(self.url, {'start': self.params['end'], 'end': self.params['start']})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'start': '2023/06/30'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NextSlotsTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name='traning room', type='focus', capacity=9,
+            opening_time=time(9, 0), closing_time=time(12, 0)
+        )
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('next-slots', args=[self.room.pk])
+        self.now = timezone.make_aware(datetime(2030, 1, 7, 11, 0))
+
+        for start, end in [((9, 0), (10, 0)), ((10, 30), (11, 30))]:
+            Booking.objects.create(
+                room=self.room,
+                resident=self.resident,
+                start=timezone.make_aware(datetime(2030, 1, 8, *start)),
+                end=timezone.make_aware(datetime(2030, 1, 8, *end))
+            )
+
+    def get(self, params):
+        with mock.patch('django.utils.timezone.now', return_value=self.now):
+            return self.client.get(self.url, params)
+
+    def test_first_slots_skip_short_gaps(self):
+        with self.assertNumQueries(2):
+            response = self.get({'duration': '45m', 'count': 2, 'days': 14})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'start': '07-01-2030 11:00:00', 'end': '07-01-2030 12:00:00'},
+            {'start': '09-01-2030 09:00:00', 'end': '09-01-2030 12:00:00'},
+        ])
+
+    def test_short_duration_uses_gaps_between_bookings(self):
+        response = self.get({'duration': '30m', 'count': 5, 'days': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([slot['start'] for slot in response.data], [
+            '07-01-2030 11:00:00', '08-01-2030 10:00:00', '08-01-2030 11:30:00',
+        ])
+
+    def test_invalid_duration(self):
+        response = self.get({'duration': 'uzoq'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AvailabilityCacheTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='traning room', type='focus', capacity=9)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('availability', args=[self.room.pk])
+        self.params = {'date': '2023-06-30'}
+        availability_cache.clear()
+
+    def book(self, start_hour, end_hour):
+        return Booking.objects.create(
+            room=self.room,
+            resident=self.resident,
+            start=timezone.make_aware(datetime(2023, 6, 30, start_hour)),
+            end=timezone.make_aware(datetime(2023, 6, 30, end_hour))
+        )
+
+    def test_second_read_is_served_from_cache(self):
+        # versiyalar (ETag), xona va bo'sh oraliqlar
+        with self.assertNumQueries(3):
+            self.client.get(self.url, self.params)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, self.params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(availability_cache.stats()['hits'], 1)
+        self.assertEqual(availability_cache.stats()['misses'], 1)
+
+    def test_booking_save_and_delete_invalidate(self):
+        self.client.get(self.url, self.params)
+        booking = self.book(10, 11)
+
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(len(response.data), 2)
+
+        booking.delete()
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(len(response.data), 1)
+
+    def test_write_from_another_worker_rebuilds_entry(self):
+        self.client.get(self.url, self.params)
+        # boshqa worker yozuvi: shu jarayon keshi invalidate qilinmaydi,
+        # faqat room_day_key hisoblagichi oshadi
+        with mock.patch.object(availability_cache, 'invalidate'):
+            self.book(10, 11)
+
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(availability_cache.stats()['misses'], 2)
+
+    def test_room_hours_change_rebuilds_entry(self):
+        self.client.get(self.url, self.params)
+        self.room.opening_time = time(9, 0)
+        self.room.save()
+
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.data[0]['start'], '30-06-2023 09:00:00')
+        self.assertEqual(availability_cache.stats()['misses'], 2)
+
+    def test_today_is_trimmed_to_current_time(self):
+        now = timezone.make_aware(datetime(2023, 6, 30, 10, 30))
+        self.book(12, 13)
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.client.get(self.url)
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.data, [
+            {'start': '30-06-2023 10:30:00', 'end': '30-06-2023 12:00:00'},
+            {'start': '30-06-2023 13:00:00', 'end': '30-06-2023 23:59:59'},
+        ])
+        self.assertEqual(availability_cache.stats()['hits'], 1)
+
+
+# parallel yozuvlar SQLite qulfini kutadi: sekin so'rov yozuvlari testda shovqin
+@override_settings(QUERY_BUDGET_SLOW_MS=60_000)
+class ConcurrentBookingTest(TransactionTestCase):
+    requests_per_slot = 50
+    slots = 4
+
+    def setUp(self):
+        self.room = Room.objects.create(name='traning room', type='focus', capacity=9)
+        self.url = reverse('room-booking', args=[self.room.pk])
+        self.booking_date = (timezone.localdate() + timedelta(days=1)).strftime('%d-%m-%Y')
+
+    def book(self, index):
+        slot = index % self.slots
+        try:
+            response = APIClient().post(self.url, {
+                "resident": {"name": f"Resident {index}"},
+                # har bir slot keyingisi bilan yarim soat ustma-ust tushadi
+                "start": f"{self.booking_date} {9 + slot * 2:02d}:00:00",
+                "end": f"{self.booking_date} {10 + slot * 2:02d}:30:00",
+            }, format='json')
+            return slot, response.status_code
+        finally:
+            connection.close()
+
+    def test_exactly_one_booking_wins_per_slot(self):
+        total = self.requests_per_slot * self.slots
+        started = time_module.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(self.book, range(total)))
+        elapsed = time_module.perf_counter() - started
+
+        created = [slot for slot, code in results if code == status.HTTP_201_CREATED]
+        self.assertEqual(sorted(created), list(range(self.slots)), f"{total / elapsed:.0f} req/s")
+        self.assertTrue(all(
+            code in (status.HTTP_201_CREATED, status.HTTP_410_GONE) for _, code in results
+        ))
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), self.slots)
+
+
+class BatchBookingTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name=f'room {i}', type='team', capacity=5)
+            for i in range(2)
+        ]
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('booking-batch')
+        self.date = timezone.localdate() + timedelta(days=1)
+        Booking.objects.create(
+            room=self.rooms[0],
+            resident=self.resident,
+            start=timezone.make_aware(datetime.combine(self.date, time(9))),
+            end=timezone.make_aware(datetime.combine(self.date, time(10)))
+        )
+
+    def item(self, room, start_hour, end_hour, name="Residentjon"):
+        booking_date = self.date.strftime('%d-%m-%Y')
+        return {
+            "room": room.pk,
+            "resident": {"name": name},
+            "start": f"{booking_date} {start_hour:02d}:00:00",
+            "end": f"{booking_date} {end_hour:02d}:00:00",
+        }
+
+    def test_bulk_insert_in_constant_queries(self):
+        items = [
+            self.item(room, hour, hour + 1, name=f"Resident {hour}")
+            for room in self.rooms for hour in range(10, 22)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"bookings": items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], len(items))
+        self.assertEqual(Booking.objects.count(), len(items) + 1)
+        self.assertEqual(Resident.objects.count(), 13)
+        # RoomDayFreeInterval, RoomDailyUsage, versiyalar va BookingEvent yozuvlari bilan birga ham o'zgarmas
+        self.assertLessEqual(len(queries), 18)
+
+    def test_best_effort_reports_status_per_item(self):
+        items = [
+            self.item(self.rooms[0], 10, 11),
+            self.item(self.rooms[0], 9, 10),
+            self.item(self.rooms[1], 9, 11),
+            self.item(self.rooms[1], 10, 12),
+            {**self.item(self.rooms[1], 12, 13), "room": 1000},
+            {**self.item(self.rooms[1], 13, 12)},
+        ]
+        response = self.client.post(self.url, {"mode": "best_effort", "bookings": items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'conflict', 'created', 'conflict', 'invalid', 'invalid']
+        )
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_atomic_mode_creates_nothing_on_conflict(self):
+        items = [self.item(self.rooms[1], 10, 11), self.item(self.rooms[0], 9, 10)]
+        response = self.client.post(self.url, {"bookings": items}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['skipped', 'conflict']
+        )
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class BookingSeriesTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='traning room', type='team', capacity=9)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('booking-series', args=[self.room.pk])
+        self.first_date = timezone.localdate() + timedelta(days=1)
+        self.series = {
+            "resident": {"name": "Residentjon"},
+            "start": f"{self.first_date.strftime('%d-%m-%Y')} 10:00:00",
+            "end": f"{self.first_date.strftime('%d-%m-%Y')} 11:00:00",
+            "occurrences": 26,
+        }
+
+    def booked_at(self, weeks, start_hour, end_hour):
+        date_ = self.first_date + timedelta(weeks=weeks)
+        return Booking.objects.create(
+            room=self.room,
+            resident=self.resident,
+            start=timezone.make_aware(datetime.combine(date_, time(start_hour))),
+            end=timezone.make_aware(datetime.combine(date_, time(end_hour)))
+        )
+
+    def test_create_series(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.series, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['occurrences']), 26)
+        self.assertEqual(BookingSeries.objects.get().bookings.count(), 26)
+        # RoomDayFreeInterval, RoomDailyUsage va BookingEvent yozuvlari bilan birga
+        self.assertLessEqual(len(queries), 15)
+
+    def test_conflicting_occurrences_are_listed(self):
+        self.booked_at(3, 10, 12)
+        self.booked_at(7, 9, 11)
+        self.booked_at(8, 11, 12)
+
+        response = self.client.post(self.url, self.series, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(
+            [conflict['start'][:10] for conflict in response.data['conflicts']],
+            [(self.first_date + timedelta(weeks=weeks)).strftime('%d-%m-%Y') for weeks in (3, 7)]
+        )
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_edit_and_cancel_series(self):
+        series_id = self.client.post(self.url, self.series, format='json').data['id']
+        url = reverse('booking-series-detail', args=[series_id])
+        self.booked_at(2, 12, 13)
+
+        response = self.client.patch(url, {"start_time": "12:00:00", "end_time": "13:00:00"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(len(response.data['conflicts']), 1)
+
+        response = self.client.patch(url, {"start_time": "14:00:00", "end_time": "15:30:00"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            Booking.objects.filter(series_id=series_id, start__hour=14, end__minute=30).count(), 26
+        )
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cancelled'], 26)
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_cancel_keeps_archived_occurrences(self):
+        series_id = self.client.post(self.url, self.series, format='json').data['id']
+        # birinchi 3 ta takror arxivlanadigan darajada eski
+        for booking in Booking.objects.filter(series_id=series_id).order_by('start')[:3]:
+            Booking.objects.filter(pk=booking.pk).update(
+                start=booking.start - timedelta(days=200), end=booking.end - timedelta(days=200)
+            )
+        call_command('archive_bookings', days=90, stdout=mock.MagicMock())
+        self.assertEqual(ArchivedBooking.objects.filter(series_id=series_id).count(), 3)
+
+        response = self.client.delete(reverse('booking-series-detail', args=[series_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cancelled'], 23)
+        self.assertTrue(BookingSeries.objects.filter(pk=series_id).exists())
+        self.assertEqual(ArchivedBooking.objects.filter(series_id=series_id).count(), 3)
+
+
+class RoomCursorPaginationTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name=f'room {i}', type='team', capacity=i % 4 + 1)
+            for i in range(25)
+        ]
+        self.url = reverse('rooms')
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [room['id'] for room in response.data['results']]
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_walk_by_id_without_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            ids, _ = self.walk({'pagination': 'cursor'})
+
+        self.assertEqual(ids, [room.id for room in self.rooms])
+        self.assertFalse(any('COUNT' in query['sql'] for query in queries))
+
+    def test_walk_by_capacity(self):
+        ids, last_page = self.walk({'pagination': 'cursor', 'ordering': 'capacity', 'page_size': 4})
+        expected = sorted(self.rooms, key=lambda room: (room.capacity, room.id))
+
+        self.assertEqual(ids, [room.id for room in expected])
+
+        previous = self.client.get(last_page.data['previous'])
+        self.assertEqual(
+            [room['id'] for room in previous.data['results']],
+            [room.id for room in expected[20:24]]
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'yaroqsiz'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_mode_is_default(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(response.data['page'], 1)
+
+
+class RoomSearchTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='Training  Room', type='conference', capacity=9)
+        Room.objects.create(name='workly', type='team', capacity=5)
+        self.url = reverse('rooms')
+
+    def search(self, query):
+        response = self.client.get(self.url, {'search': query})
+        return [room['id'] for room in response.data['results']]
+
+    def test_search_uses_trigram_index(self):
+        self.assertEqual(self.search('ning ro'), [self.room.id])
+        self.assertEqual(self.search('TRAIN'), [self.room.id])
+        self.assertEqual(self.search('room x'), [])
+        self.assertEqual(self.search('in'), [self.room.id])
+
+    def test_rename_keeps_index_in_sync(self):
+        self.room.name = 'express24'
+        with CaptureQueriesContext(connection) as queries:
+            self.room.save()
+        # eskirgan trigramlar bitta so'rov bilan o'chiriladi
+        deletes = [query for query in queries if query['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 1)
+
+        self.assertEqual(self.search('training'), [])
+        self.assertEqual(self.search('press'), [self.room.id])
+        self.assertEqual(
+            set(RoomNameTrigram.objects.filter(room=self.room).values_list('trigram', flat=True)),
+            name_trigrams('express24')
+        )
+
+    def test_duplicate_check_is_point_lookup(self):
+        duplicate = Room(name='training room', type='conference', capacity=3)
+        with self.assertRaises(DjangoValidationError):
+            duplicate.clean()
+
+        Room(name='training room', type='focus', capacity=3).clean()
+        self.room.clean()
+
+
+class RoomDayFreeIntervalTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name='training room', type='focus', capacity=9,
+            opening_time=time(9), closing_time=time(18)
+        )
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.date = date(2023, 6, 30)
+
+    def at(self, hour):
+        return timezone.make_aware(datetime.combine(self.date, time(hour)))
+
+    def book(self, start, end):
+        return Booking.objects.create(
+            room=self.room, resident=self.resident, start=self.at(start), end=self.at(end)
+        )
+
+    def rows(self):
+        return [
+            (timezone.localtime(start).hour, timezone.localtime(end).hour)
+            for start, end in RoomDayFreeInterval.objects.filter(
+                room=self.room, date=self.date
+            ).order_by('start').values_list('start', 'end')
+        ]
+
+    def test_insert_splits_and_delete_merges(self):
+        first = self.book(10, 11)
+        second = self.book(13, 14)
+        self.assertEqual(self.rows(), [(9, 10), (11, 13), (14, 18)])
+
+        first.delete()
+        self.assertEqual(self.rows(), [(9, 13), (14, 18)])
+
+        second.start, second.end = self.at(15), self.at(16)
+        second.save()
+        self.assertEqual(self.rows(), [(9, 15), (16, 18)])
+
+    def test_queryset_delete_applies_changes_once(self):
+        self.book(10, 11)
+        self.book(13, 14)
+        self.book(15, 16)
+        events = BookingEvent.objects.count()
+
+        with mock.patch('booking.signals.apply_changes', wraps=apply_changes) as apply:
+            deleted, _ = Booking.objects.filter(room=self.room, start__lt=self.at(15)).delete()
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(apply.call_count, 1)
+        self.assertEqual(self.rows(), [(9, 15), (16, 18)])
+        self.assertEqual(BookingEvent.objects.count(), events + 2)
+
+    def test_fully_booked_day_keeps_sentinel(self):
+        booking = self.book(9, 18)
+        self.assertEqual(self.rows(), [(9, 9)])
+
+        response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': '2023-06-30'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        booking.delete()
+        self.assertEqual(self.rows(), [(9, 18)])
+
+    def test_availability_reads_materialized_rows(self):
+        self.book(10, 11)
+        availability_cache.clear()
+        booking_index.clear()
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': '2023-06-30'})
+
+        self.assertEqual(response.data, [
+            {'start': '30-06-2023 09:00:00', 'end': '30-06-2023 10:00:00'},
+            {'start': '30-06-2023 11:00:00', 'end': '30-06-2023 18:00:00'},
+        ])
+
+    def test_working_hours_change_rebuilds_room(self):
+        self.book(10, 11)
+        self.room.closing_time = time(12)
+        self.room.save()
+
+        self.assertEqual(self.rows(), [(9, 10), (11, 12)])
+
+    def test_verify_after_random_changes(self):
+        rng = random.Random(7)
+        bookings = []
+        for _ in range(60):
+            if bookings and rng.random() < 0.4:
+                bookings.pop(rng.randrange(len(bookings))).delete()
+            else:
+                start = rng.randrange(8, 18)
+                bookings.append(self.book(start, start + rng.randint(1, 3)))
+
+        call_command('free_intervals', 'verify', stdout=mock.MagicMock())
+
+        RoomDayFreeInterval.objects.filter(room=self.room).delete()
+        RoomDayFreeInterval.objects.create(room=self.room, date=self.date, start=self.at(9), end=self.at(10))
+        with self.assertRaises(CommandError):
+            call_command('free_intervals', 'verify', stdout=mock.MagicMock(), stderr=mock.MagicMock())
+
+        call_command('free_intervals', 'rebuild', stdout=mock.MagicMock())
+        call_command('free_intervals', 'verify', stdout=mock.MagicMock())
+
+
+class RoomHeatmapTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name='room a', type='team', capacity=5, opening_time=time(9), closing_time=time(18)),
+            Room.objects.create(name='room b', type='team', capacity=5, opening_time=time(9), closing_time=time(18)),
+        ]
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.date = date(2023, 6, 30)
+        self.url = reverse('rooms-heatmap')
+
+    def book(self, room, start, end, date_=None):
+        date_ = date_ or self.date
+        return Booking.objects.create(
+            room=room, resident=self.resident,
+            start=timezone.make_aware(datetime.combine(date_, start)),
+            end=timezone.make_aware(datetime.combine(date_, end)),
+        )
+
+    def test_matches_generate_available_times(self):
+        rng = random.Random(3)
+        room = Room.objects.create(name='room c', type='focus', capacity=3)
+        dates = [self.date + timedelta(days=i) for i in range(3)]
+        for date_ in dates:
+            for _ in range(6):
+                start = rng.randrange(0, 23 * 60)
+                end = start + rng.randint(1, 120)
+                self.book(room, time(start // 60, start % 60), time(min(end, 1439) // 60, min(end, 1439) % 60), date_)
+
+        grid = OccupancyGrid.build([room], dates)
+        view = RoomAvailabiltyAPIView()
+        for i, date_ in enumerate(dates):
+            day_start, day_end = day_range(date_)
+            bookings = Booking.objects.filter(room=room, start__gte=day_start, start__lt=day_end).order_by('start')
+            expected = view.generate_available_times(
+                view.make_aware(date_, room.opening_time), view.make_aware(date_, room.closing_time), bookings
+            )
+            self.assertEqual(format_intervals(grid.room_spans(0, i)), expected)
+            self.assertEqual(format_intervals(grid.all_room_spans()[0, i]), expected)
+
+    def test_heatmap(self):
+        self.book(self.rooms[0], time(10), time(11))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'from': '2023-06-30', 'to': '2023-07-01', 'type': 'team'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        day = response.data['days'][0]
+        self.assertEqual(day['hours'][10], 0.5)
+        self.assertEqual(day['hours'][12], 0)
+        self.assertEqual(day['any_free'], [{'start': '30-06-2023 09:00:00', 'end': '30-06-2023 18:00:00'}])
+        self.assertEqual(day['all_free'], [
+            {'start': '30-06-2023 09:00:00', 'end': '30-06-2023 10:00:00'},
+            {'start': '30-06-2023 11:00:00', 'end': '30-06-2023 18:00:00'},
+        ])
+        self.assertEqual(response.data['days'][1]['utilization'], 0)
+        self.assertEqual([room['utilization'] for room in response.data['rooms']], [round(1 / 18, 4), 0])
+
+    def test_invalid_range(self):
+        response = self.client.get(self.url, {'from': '2023-06-30', 'to': '2023-06-29'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.url, {'from': '2023-06-01', 'to': '2023-08-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RoomStatsTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(
+                name=f'room {i}', type=type, capacity=5, opening_time=time(9), closing_time=time(18)
+            )
+            for i, type in enumerate(['focus', 'team', 'team'])
+        ]
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.first = date(2023, 6, 26)
+        self.url = reverse('rooms-stats')
+
+        rng = random.Random(5)
+        bookings = []
+        for _ in range(80):
+            if bookings and rng.random() < 0.2:
+                bookings.pop(rng.randrange(len(bookings))).delete()
+                continue
+            if bookings and rng.random() < 0.2:
+                booking = rng.choice(bookings)
+                booking.start += timedelta(days=1)
+                booking.end += timedelta(minutes=rng.randint(-10, 30)) + timedelta(days=1)
+                booking.save()
+                continue
+            start = timezone.make_aware(datetime.combine(
+                self.first + timedelta(days=rng.randrange(14)), time(rng.randrange(9, 17), rng.choice([0, 15, 30]))
+            ))
+            bookings.append(Booking.objects.create(
+                room=rng.choice(self.rooms), resident=self.resident,
+                start=start, end=start + timedelta(minutes=rng.randint(15, 60))
+            ))
+
+    def expected(self, group_by, first, last):
+        seconds, counts = {}, {}
+        for booking in Booking.objects.select_related('room'):
+            date_ = timezone.localtime(booking.start).date()
+            if not first <= date_ <= last:
+                continue
+            key = {
+                'room': booking.room_id,
+                'type': booking.room.type,
+                'weekday': date_.isoweekday(),
+            }[group_by]
+            seconds[key] = seconds.get(key, 0) + (booking.end - booking.start).total_seconds()
+            counts[key] = counts.get(key, 0) + 1
+        return {key: (round(value / 60, 2), counts[key]) for key, value in seconds.items()}
+
+    def stats(self, group_by, first, last):
+        response = self.client.get(self.url, {'from': first.isoformat(), 'to': last.isoformat(), 'group_by': group_by})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        key = {'room': 'room', 'type': 'type', 'weekday': 'weekday'}[group_by]
+        return {
+            row[key]: (row['booked_minutes'], row['bookings'])
+            for row in response.data['results'] if row['bookings']
+        }
+
+    def test_matches_raw_bookings(self):
+        last = self.first + timedelta(days=9)
+        for group_by in ['room', 'type', 'weekday']:
+            self.assertEqual(self.stats(group_by, self.first, last), self.expected(group_by, self.first, last))
+
+    def test_reads_only_rollup(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'from': '2023-06-26', 'to': '2023-06-26', 'group_by': 'type'})
+
+        available = 9 * 60
+        self.assertEqual(
+            [(row['type'], row['available_minutes']) for row in response.data['results']],
+            [('focus', available), ('team', 2 * available)]
+        )
+        # heatmap bilan bir xil birlik: 0 dan 1 gacha ulush
+        for row in response.data['results']:
+            self.assertAlmostEqual(
+                row['utilization'], row['booked_minutes'] / row['available_minutes'], delta=0.0001
+            )
+            self.assertLessEqual(row['utilization'], 1)
+
+    def test_backfill(self):
+        last = self.first + timedelta(days=20)
+        expected = self.expected('room', self.first, last)
+        RoomDailyUsage.objects.update(booked_seconds=0, bookings=0)
+
+        call_command('backfill_usage', chunk_size=7, stdout=mock.MagicMock())
+
+        self.assertEqual(self.stats('room', self.first, last), expected)
+
+    def test_invalid_group_by(self):
+        response = self.client.get(self.url, {'group_by': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookingExportTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.other = Room.objects.create(name='express24', type='focus', capacity=3)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('bookings-export')
+
+    def book(self, room, day, hour):
+        start = timezone.make_aware(datetime(2023, 6, day, hour))
+        return Booking.objects.create(room=room, resident=self.resident, start=start, end=start + timedelta(hours=1))
+
+    def fill(self, count):
+        # ko'p qatorni tez yaratish uchun to'g'ridan-to'g'ri SQL
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM booking_booking")
+            cursor.execute(
+                """
+                WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s)
+                INSERT INTO booking_booking (room_id, resident_id, start, "end")
+                SELECT %s, %s, '2023-06-30 05:00:00', '2023-06-30 06:00:00' FROM seq
+                """,
+                [count, self.room.pk, self.resident.pk]
+            )
+
+    def export_peak(self, count):
+        self.fill(count)
+        tracemalloc.start()
+        try:
+            response = self.client.get(self.url, {'format': 'csv'})
+            lines = sum(chunk.count(b'\n') for chunk in response.streaming_content)
+            return lines, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_csv_and_ndjson(self):
+        first = self.book(self.room, 29, 10)
+        self.book(self.other, 30, 11)
+        self.book(self.room, 30, 12)
+
+        response = self.client.get(self.url, {'format': 'csv', 'to': '2023-06-29'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), [
+            'id,room_id,room,resident,start,end',
+            f'{first.pk},{self.room.pk},training room,Residentjon,2023-06-29T10:00:00+05:00,2023-06-29T11:00:00+05:00',
+        ])
+
+        response = self.client.get(self.url, {'format': 'ndjson', 'from': '2023-06-30', 'room': self.room.pk})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(row['room'], row['start']) for row in rows], [('training room', '2023-06-30T12:00:00+05:00')])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xlsx'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'room': 'a'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_memory_stays_flat(self):
+        # 1M qator uchun: python -m benchmarks.export_memory
+        small_lines, small_peak = self.export_peak(5000)
+        large_lines, large_peak = self.export_peak(50000)
+
+        self.assertEqual((small_lines, large_lines), (5001, 50001))
+        self.assertLess(large_peak, small_peak * 1.5)
+
+
+class RoomCalendarTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training, room', type='team', capacity=5)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.url = reverse('room-calendar', args=[self.room.pk])
+
+    def book(self, days, hour):
+        start = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=days), time(hour)))
+        return Booking.objects.create(room=self.room, resident=self.resident, start=start, end=start + timedelta(hours=1))
+
+    def test_calendar_feed(self):
+        booking = self.book(1, 10)
+        self.book(-60, 10)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+
+        start = booking.start.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f'UID:booking-{booking.pk}@room-{self.room.pk}\r\n', body)
+        self.assertIn(f'DTSTART:{start}\r\n', body)
+        self.assertIn('SUMMARY:training\\, room: Residentjon\r\n', body)
+
+    def test_not_modified_without_booking_query(self):
+        self.book(1, 10)
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('booking_booking', queries[0]['sql'])
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.book(2, 10)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_not_found(self):
+        response = self.client.get(reverse('room-calendar', args=[self.room.pk + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.params = {'date': '2023-06-30'}
+
+    def book(self, day, hour):
+        start = timezone.make_aware(datetime(2023, 6, day, hour))
+        return Booking.objects.create(room=self.room, resident=self.resident, start=start, end=start + timedelta(hours=1))
+
+    def revalidate(self, url, etag, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            self.assertEqual(len(queries), 1)
+        return response.status_code
+
+    def test_room_list_and_detail(self):
+        for i, url in enumerate([reverse('rooms'), reverse('room-detail', args=[self.room.pk])]):
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertIn('no-cache', response['Cache-Control'])
+
+            self.book(30, 10)
+            self.assertEqual(self.revalidate(url, etag), status.HTTP_304_NOT_MODIFIED)
+
+            Room.objects.create(name=f'express{i}', type='focus', capacity=3)
+            self.assertEqual(self.revalidate(url, etag), status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        url = reverse('rooms')
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.revalidate(url, etag, {'page': 2}), status.HTTP_404_NOT_FOUND)
+        self.assertNotEqual(self.client.get(url, {'type': 'team'})['ETag'], etag)
+
+    def test_availability_per_day_version(self):
+        url = reverse('availability', args=[self.room.pk])
+        etag = self.client.get(url, self.params)['ETag']
+
+        self.book(29, 10)
+        self.assertEqual(self.revalidate(url, etag, self.params), status.HTTP_304_NOT_MODIFIED)
+
+        booking = self.book(30, 10)
+        self.assertEqual(self.revalidate(url, etag, self.params), status.HTTP_200_OK)
+
+        etag = self.client.get(url, self.params)['ETag']
+        booking.delete()
+        self.assertEqual(self.revalidate(url, etag, self.params), status.HTTP_200_OK)
+
+    def test_today_changes_every_minute(self):
+        url = reverse('availability', args=[self.room.pk])
+        now = timezone.make_aware(datetime(2023, 6, 30, 10, 30, 5))
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            response = self.client.get(url)
+        self.assertEqual(response.data[0]['start'], '30-06-2023 10:30:00')
+
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(seconds=40)):
+            self.assertEqual(self.revalidate(url, response['ETag']), status.HTTP_304_NOT_MODIFIED)
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(minutes=1)):
+            self.assertEqual(self.revalidate(url, response['ETag']), status.HTTP_200_OK)
+
+
+class AsyncViewsTest(APITestCase):
+    def setUp(self):
+        self.rooms = [
+            Room.objects.create(name=f'room {i}', type='team' if i % 2 else 'focus', capacity=i + 1)
+            for i in range(12)
+        ]
+        self.resident = Resident.objects.create(name="Residentjon")
+        start = timezone.make_aware(datetime(2023, 6, 30, 10))
+        Booking.objects.create(room=self.rooms[0], resident=self.resident, start=start, end=start + timedelta(hours=1))
+        self.async_client = AsyncClient()
+        availability_cache.clear()
+
+    async def assert_same(self, sync_url, async_url, params=None):
+        sync_response = await sync_to_async(self.client.get)(sync_url, params)
+        async_response = await self.async_client.get(async_url, params)
+
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+        return async_response
+
+    async def test_same_responses_as_sync_views(self):
+        pk = self.rooms[0].pk
+        await self.assert_same(reverse('rooms'), reverse('async-rooms'))
+        await self.assert_same(reverse('rooms'), reverse('async-rooms'), {'page': 2, 'type': 'team'})
+        await self.assert_same(reverse('rooms'), reverse('async-rooms'), {'search': 'room 1'})
+        await self.assert_same(reverse('rooms'), reverse('async-rooms'), {'page': 5})
+        await self.assert_same(reverse('room-detail', args=[pk]), reverse('async-room-detail', args=[pk]))
+        await self.assert_same(reverse('room-detail', args=[999]), reverse('async-room-detail', args=[999]))
+        await self.assert_same(
+            reverse('availability', args=[pk]), reverse('async-availability', args=[pk]), {'date': '2023-06-30'}
+        )
+        await self.assert_same(
+            reverse('rooms-availability'), reverse('async-rooms-availability'),
+            {'date': '2023-06-30', 'min_capacity': 3}
+        )
+
+    async def test_invalid_params(self):
+        url = reverse('async-rooms-availability')
+        response = await self.assert_same(reverse('rooms-availability'), url, {'date': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sanani', json.loads(response.content)['error'])
+
+        response = await self.assert_same(reverse('rooms-availability'), url, {'min_capacity': 'ko‘p'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_capacity', json.loads(response.content)['error'])
+
+    async def test_not_modified(self):
+        url = reverse('async-availability', args=[self.rooms[0].pk])
+        response = await self.async_client.get(url, {'date': '2023-06-30'})
+        etag = response['ETag']
+
+        response = await self.async_client.get(url, {'date': '2023-06-30'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        start = timezone.make_aware(datetime(2023, 6, 30, 15))
+        await Booking.objects.acreate(
+            room=self.rooms[0], resident=self.resident, start=start, end=start + timedelta(hours=1)
+        )
+        response = await self.async_client.get(url, {'date': '2023-06-30'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 3)
+
+
+@override_settings(CHANGEFEED_POLL_INTERVAL=0.05, CHANGEFEED_KEEPALIVE=0.2)
+class BookingChangesStreamTest(APITestCase):
+    def setUp(self):
+        self.rooms = [Room.objects.create(name=f'room {i}', capacity=4) for i in range(2)]
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.start = timezone.make_aware(datetime(2023, 6, 30, 10))
+        self.async_client = AsyncClient()
+
+    async def read_events(self, content, count):
+        events = []
+        while len(events) < count:
+            chunk = (await asyncio.wait_for(content.__anext__(), timeout=5)).decode()
+            if chunk.startswith('id:'):
+                lines = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+                events.append((int(lines['id']), lines['event'], json.loads(lines['data'])))
+        return events
+
+    async def book(self, room, hour):
+        start = self.start + timedelta(hours=hour)
+        return await Booking.objects.acreate(
+            room=room, resident=self.resident, start=start, end=start + timedelta(hours=1)
+        )
+
+    async def test_live_events_for_selected_rooms(self):
+        response = await self.async_client.get(
+            reverse('booking-changes-stream'), {'rooms': str(self.rooms[0].pk)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+        self.assertTrue((await content.__anext__()).startswith(b'retry:'))
+
+        await self.book(self.rooms[1], 0)
+        booking = await self.book(self.rooms[0], 2)
+        booking_id = booking.pk
+        await booking.adelete()
+
+        (first_id, kind, data), (second_id, deleted, _) = await self.read_events(content, 2)
+        self.assertEqual(kind, 'created')
+        self.assertEqual(deleted, 'deleted')
+        self.assertLess(first_id, second_id)
+        self.assertEqual(data['booking'], booking_id)
+        self.assertEqual(data['room'], self.rooms[0].pk)
+        self.assertEqual(data['start'], '30-06-2023 12:00:00')
+        await content.aclose()
+
+    async def test_resume_from_last_event_id(self):
+        first = await self.book(self.rooms[0], 0)
+        second = await self.book(self.rooms[1], 2)
+        last_event_id = await BookingEvent.objects.filter(booking_id=first.pk).values_list('id', flat=True).aget()
+
+        response = await self.async_client.get(
+            reverse('booking-changes-stream'), headers={'Last-Event-ID': str(last_event_id)}
+        )
+        content = response.streaming_content
+        (event_id, _, data), = await self.read_events(content, 1)
+        self.assertEqual(data['booking'], second.pk)
+
+        # backlog dan keyin jonli hodisalar davom etadi
+        third = await self.book(self.rooms[0], 4)
+        (next_id, _, data), = await self.read_events(content, 1)
+        self.assertEqual(data['booking'], third.pk)
+        self.assertGreater(next_id, event_id)
+        await content.aclose()
+
+    async def test_broker_logs_poll_errors_and_backs_off(self):
+        broker = ChangeBroker()
+        broker.wakeup = asyncio.Event()
+        broker.subscribers.add(object())
+        polls = 0
+
+        async def poll():
+            nonlocal polls
+            polls += 1
+            raise DatabaseError('baza ishlamayapti')
+
+        broker.poll = poll
+        with self.assertLogs('booking.changefeed', 'ERROR'):
+            task = asyncio.ensure_future(broker.run())
+            # notify() uyg'otishlari qayta urinishlarni tezlashtirmaydi
+            for _ in range(20):
+                broker.wakeup.set()
+                await asyncio.sleep(0.01)
+            # wait_for uyg'otish bilan bir vaqtda kelgan cancel() ni yutib
+            # yuborishi mumkin (Python 3.12 gacha)
+            while not task.done():
+                task.cancel()
+                await asyncio.sleep(0.01)
+        self.assertTrue(task.cancelled())
+        self.assertLess(polls, 10)
+
+    def test_invalid_params(self):
+        response = self.client.get(reverse('booking-changes-stream'), {'rooms': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_events_recorded_with_bookings(self):
+        booking_date = (timezone.localdate() + timedelta(days=1)).strftime('%d-%m-%Y')
+        response = self.client.post(reverse('booking-batch'), {'bookings': [
+            {
+                'room': room.pk,
+                'resident': {'name': 'Anvar'},
+                'start': f'{booking_date} 10:00:00',
+                'end': f'{booking_date} 11:00:00',
+            }
+            for room in self.rooms
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        events = BookingEvent.objects.order_by('id')
+        self.assertEqual(
+            list(events.values_list('kind', 'room_id')),
+            [('created', room.pk) for room in self.rooms]
+        )
+        self.assertTrue(all(event.booking_id for event in events))
+
+        call_command('prune_booking_events', days=0, stdout=mock.MagicMock())
+        self.assertFalse(BookingEvent.objects.exists())
+
+
+class BookingHoldTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.url = reverse('room-hold', args=[self.room.pk])
+        availability_cache.clear()
+
+    def at(self, hour):
+        return f"{self.date.strftime('%d-%m-%Y')} {hour:02d}:00:00"
+
+    def hold(self, start_hour, end_hour, ttl=None, name="Anvar"):
+        data = {"resident": {"name": name}, "start": self.at(start_hour), "end": self.at(end_hour)}
+        if ttl:
+            data["ttl"] = ttl
+        return self.client.post(self.url, data, format='json')
+
+    def book(self, start_hour, end_hour):
+        return self.client.post(reverse('room-booking', args=[self.room.pk]), {
+            "resident": {"name": "Residentjon"}, "start": self.at(start_hour), "end": self.at(end_hour)
+        }, format='json')
+
+    def available(self):
+        response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()})
+        return [(item['start'][-8:-6], item['end'][-8:-6]) for item in response.data]
+
+    def test_hold_blocks_overlapping_bookings_and_holds(self):
+        response = self.hold(10, 11, ttl=60)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['ttl'], 60)
+        self.assertEqual(response.data['start'], self.at(10))
+
+        self.assertEqual(self.book(10, 12).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.hold(9, 11, name="Bobur").status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.book(11, 12).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.available(), [('00', '10'), ('12', '23')])
+
+        free = self.client.get(reverse('free-rooms'), {'start': self.at(10), 'end': self.at(11)})
+        self.assertEqual(free.data['count'], 0)
+        rooms = self.client.get(reverse('rooms-availability'), {'date': self.date.isoformat()})
+        self.assertEqual(len(rooms.data[0]['available']), 2)
+
+    def test_confirm_turns_hold_into_booking(self):
+        token = self.hold(10, 11).data['token']
+
+        response = self.client.post(reverse('booking-hold-confirm', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        booking = Booking.objects.get(pk=response.data['id'])
+        self.assertEqual(booking.resident.name, "Anvar")
+        self.assertEqual(timezone.localtime(booking.start).hour, 10)
+        self.assertFalse(BookingHold.objects.exists())
+        self.assertEqual(self.available(), [('00', '10'), ('11', '23')])
+
+        response = self.client.post(reverse('booking-hold-confirm', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expired_hold_is_ignored_and_swept(self):
+        token = self.hold(10, 11, ttl=30).data['token']
+        etag = self.client.get(
+            reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()}
+        )['ETag']
+
+        later = timezone.now() + timedelta(seconds=31)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get(
+                reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()},
+                HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), 1)
+            self.assertEqual(self.book(10, 11).status_code, status.HTTP_201_CREATED)
+
+            response = self.client.post(reverse('booking-hold-confirm', args=[token]))
+            self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+            self.hold(12, 13, ttl=10)
+            call_command('sweep_holds', stdout=mock.MagicMock())
+            self.assertEqual(BookingHold.objects.count(), 1)
+
+    def test_release_and_series_conflict(self):
+        token = self.hold(10, 11).data['token']
+        response = self.client.post(reverse('booking-series', args=[self.room.pk]), {
+            "resident": {"name": "Residentjon"},
+            "start": self.at(10), "end": self.at(11), "occurrences": 3,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        response = self.client.delete(reverse('booking-hold-detail', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.available(), [('00', '23')])
+
+    def test_confirm_rechecks_booking_period(self):
+        start = timezone.now() - timedelta(hours=1)
+        hold = BookingHold.objects.create(
+            token='stale', resident=self.resident, room=self.room,
+            start=start, end=start + timedelta(minutes=30), expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        response = self.client.post(reverse('booking-hold-confirm', args=[hold.token]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'error': "O'tgan vaqt uchun bron qilolmaysiz"})
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(BookingHold.objects.exists())
+
+    def test_release_returns_503_on_lock_conflict(self):
+        token = self.hold(10, 11).data['token']
+        with mock.patch('booking.views.write_transaction', side_effect=OperationalError('database is locked')):
+            response = self.client.delete(reverse('booking-hold-detail', args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertTrue(BookingHold.objects.filter(token=token).exists())
+
+    def test_availability_without_holds_skips_hold_query(self):
+        # versiyalar, xona va bo'sh oraliqlar (holdlar so'ralmaydi)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()})
+
+
+class ArchiveBookingsTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.resident = Resident.objects.create(name="Residentjon")
+        today = timezone.localdate()
+        self.old_dates = [today - timedelta(days=100 + i) for i in range(5)]
+        self.recent_date = today - timedelta(days=3)
+        for date_ in self.old_dates + [self.recent_date]:
+            start = timezone.make_aware(datetime.combine(date_, time(10)))
+            Booking.objects.create(room=self.room, resident=self.resident, start=start, end=start + timedelta(hours=1))
+        self.usage = list(RoomDailyUsage.objects.order_by('date').values_list('date', 'booked_seconds'))
+        self.ids = list(Booking.objects.order_by('id').values_list('id', flat=True))
+
+    def archive(self, **options):
+        call_command('archive_bookings', days=90, stdout=mock.MagicMock(), **options)
+
+    def test_moves_old_bookings_in_resumable_chunks(self):
+        events = BookingEvent.objects.count()
+        self.archive(chunk_size=2, max_chunks=1)
+        self.assertEqual(ArchivedBooking.objects.count(), 2)
+        self.assertEqual(Booking.objects.count(), 4)
+
+        self.archive(chunk_size=2)
+        # asl id lar saqlanadi
+        self.assertEqual(list(ArchivedBooking.objects.order_by('id').values_list('id', flat=True)), self.ids[:5])
+        self.assertEqual(
+            timezone.localtime(Booking.objects.get().start).date(), self.recent_date
+        )
+        self.assertEqual(set(ArchivedBooking.objects.values_list('room_id', flat=True)), {self.room.pk})
+        # arxivlangan kunlarning bo'sh oraliqlari saqlanadi
+        self.assertEqual(
+            set(RoomDayFreeInterval.objects.filter(date__in=self.old_dates).values_list('date', flat=True)),
+            set(self.old_dates)
+        )
+
+        # arxivlash o'chirish emas: rollup va changefeed o'zgarmaydi
+        self.assertEqual(list(RoomDailyUsage.objects.order_by('date').values_list('date', 'booked_seconds')), self.usage)
+        self.assertEqual(BookingEvent.objects.count(), events)
+        call_command('free_intervals', 'verify', stdout=mock.MagicMock(), stderr=mock.MagicMock())
+
+    def test_export_and_analytics_read_both_tables(self):
+        self.archive()
+
+        response = self.client.get(reverse('bookings-export'), {'format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        # avval asosiy jadval, keyin arxiv
+        self.assertEqual([row['id'] for row in rows], self.ids[5:] + self.ids[:5])
+        self.assertEqual(rows[0]['resident'], 'Residentjon')
+
+        grid = OccupancyGrid.build([self.room], [self.old_dates[0]])
+        self.assertEqual(grid.busy.sum(), 60)
+
+        call_command('backfill_usage', stdout=mock.MagicMock())
+        self.assertEqual(list(RoomDailyUsage.objects.order_by('date').values_list('date', 'booked_seconds')), self.usage)
+
+    def test_archived_days_stay_busy(self):
+        self.archive()
+        date_ = self.old_dates[0].isoformat()
+        day = self.old_dates[0].strftime('%d-%m-%Y')
+        busy = [{'start': f'{day} 00:00:00', 'end': f'{day} 10:00:00'},
+                {'start': f'{day} 11:00:00', 'end': f'{day} 23:59:59'}]
+
+        response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': date_})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, busy)
+
+        response = self.client.get(reverse('rooms-availability'), {'date': date_})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['available'], busy)
+
+        # xonani qayta qurish ham arxivdagi bookinglarni hisobga oladi
+        call_command('free_intervals', 'rebuild', stdout=mock.MagicMock())
+        response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': date_})
+        self.assertEqual(response.data, busy)
+        call_command('free_intervals', 'verify', stdout=mock.MagicMock(), stderr=mock.MagicMock())
+
+    def test_rejects_non_positive_days(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_bookings', days=0, stdout=mock.MagicMock())
+
+
+class BookingIndexTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.resident = Resident.objects.create(name="Residentjon")
+        self.date = timezone.localdate() + timedelta(days=1)
+        availability_cache.clear()
+
+    def at(self, hour):
+        return timezone.make_aware(datetime.combine(self.date, time(hour)))
+
+    def create(self, start_hour, end_hour):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                room=self.room, resident=self.resident, start=self.at(start_hour), end=self.at(end_hour)
+            )
+
+    def available(self):
+        response = self.client.get(reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()})
+        return [(item['start'][-8:-6], item['end'][-8:-6]) for item in response.data]
+
+    def test_commits_are_applied_without_reloading(self):
+        first = self.create(10, 11)
+        entry = booking_index.get(self.room.pk)
+        self.assertEqual(entry.day(self.date), [(self.at(10), self.at(11))])
+
+        second = self.create(12, 13)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertIs(booking_index.get(self.room.pk), entry)
+        self.assertEqual(entry.day(self.date), [(self.at(12), self.at(13))])
+        self.assertEqual(list(entry.bookings), [second.pk])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(entry.overlaps(self.at(12), self.at(14)))
+            self.assertFalse(entry.overlaps(self.at(13), self.at(14)))
+            self.assertFalse(entry.overlaps(self.at(9), self.at(12)))
+
+    def test_reloads_when_generation_changes_elsewhere(self):
+        self.create(10, 11)
+        entry = booking_index.get(self.room.pk)
+        # boshqa jarayon yozuvi: hisoblagich oshadi, lekin on_commit bu jarayonda ishlamaydi
+        Booking.objects.create(room=self.room, resident=self.resident, start=self.at(14), end=self.at(15))
+
+        reloaded = booking_index.get(self.room.pk)
+        self.assertIsNot(reloaded, entry)
+        self.assertEqual(reloaded.day(self.date), [(self.at(10), self.at(11)), (self.at(14), self.at(15))])
+
+    def book(self, start_hour, end_hour):
+        return self.client.post(reverse('room-booking', args=[self.room.pk]), {
+            "resident": {"name": "Residentjon"},
+            "start": self.at(start_hour).strftime(settings.DATETIME_FORMAT),
+            "end": self.at(end_hour).strftime(settings.DATETIME_FORMAT),
+        }, format='json')
+
+    def test_current_index_rejects_overlap_before_database_check(self):
+        self.create(10, 11)
+        booking_index.get(self.room.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.book(10, 12)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertFalse([query for query in queries if 'booking_booking' in query['sql']])
+
+    def test_stale_index_is_not_trusted(self):
+        booking = self.create(10, 11)
+        booking_index.get(self.room.pk)
+        # boshqa jarayon bookingni o'chirdi: hisoblagich oshadi, lekin
+        # on_commit (indeksga qo'llash) bu jarayonda ishlamaydi
+        booking.delete()
+
+        response = self.book(10, 11)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_availability_matches_free_interval_table(self):
+        self.create(9, 10)
+        self.create(15, 17)
+        self.assertEqual(self.available(), [('00', '09'), ('10', '15'), ('17', '23')])
+
+        # bir xil generation da indeks qayta yuklanmaydi
+        availability_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.available(), [('00', '09'), ('10', '15'), ('17', '23')])
+        self.assertEqual(len(queries), 2)
+
+        url = reverse('async-availability', args=[self.room.pk])
+        availability_cache.clear()
+        response = self.client.get(url, {'date': self.date.isoformat()})
+        self.assertEqual(
+            [(item['start'][-8:-6], item['end'][-8:-6]) for item in json.loads(response.content)],
+            [('00', '09'), ('10', '15'), ('17', '23')],
+        )
+
+
+class QueryBudgetTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.date = timezone.localdate() + timedelta(days=1)
+        availability_cache.clear()
+
+    def test_hot_endpoints_stay_within_budget(self):
+        day = self.date.strftime('%d-%m-%Y')
+        with query_budget('rooms'):
+            self.client.get(reverse('rooms'), {'search': 'training', 'type': 'team'})
+        with query_budget('room-detail'):
+            self.client.get(reverse('room-detail', args=[self.room.pk]))
+        with query_budget('room-booking'):
+            response = self.client.post(reverse('room-booking', args=[self.room.pk]), {
+                "resident": {"name": "Residentjon"}, "start": f"{day} 09:00:00", "end": f"{day} 10:00:00"
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with query_budget('availability'):
+            self.client.get(reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()})
+
+    def test_helper_reports_excess_and_duplicates(self):
+        with self.assertRaisesMessage(AssertionError, "2 ta so'rov, budjet 1"):
+            with query_budget('rooms', budget=1):
+                list(Room.objects.all())
+                list(Room.objects.filter(type='team'))
+
+        with capture_queries() as stats:
+            Room.objects.get(pk=self.room.pk)
+            Room.objects.get(pk=self.room.pk)
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.duplicates, 1)
+        self.assertGreater(stats.duration, 0)
+
+    @override_settings(QUERY_BUDGETS={'room-detail': 1})
+    def test_middleware_enforces_budget(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('room-detail', args=[self.room.pk]))
+
+    def test_middleware_only_logs_views_without_budget(self):
+        resident = Resident.objects.create(name="Residentjon")
+        start = timezone.make_aware(datetime.combine(self.date, time(10)))
+        for hour in range(3):
+            Booking.objects.create(
+                room=self.room, resident=resident,
+                start=start + timedelta(hours=hour), end=start + timedelta(hours=hour, minutes=30)
+            )
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+
+        # Booking.__str__ xona va rezidentni qayta o'qiydi
+        with self.assertLogs('booking.query_budget', 'WARNING') as logs:
+            response = self.client.get(reverse('admin:booking_booking_changelist'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(logs.records[0].query_budget['problems'])
+
+    @override_settings(QUERY_BUDGETS={'room-detail': 1}, QUERY_BUDGET_ENFORCE=False, DEBUG=False)
+    def test_middleware_logs_offenders_in_production(self):
+        with self.assertLogs('booking.query_budget', 'WARNING') as logs:
+            response = self.client.get(reverse('room-detail', args=[self.room.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        record = logs.records[0].query_budget
+        self.assertEqual(record['url_name'], 'room-detail')
+        self.assertEqual(record['queries'], 2)
+        self.assertEqual(record['budget'], 1)
+        self.assertEqual(json.loads(logs.records[0].getMessage()), record)
+
+    @override_settings(QUERY_BUDGETS={'room-detail': 1})
+    async def test_middleware_async_mode(self):
+        pk = self.room.pk
+
+        async def get_response(request):
+            await Room.objects.aget(pk=pk)
+            await Room.objects.filter(type='team').acount()
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = APIRequestFactory().get(reverse('room-detail', args=[pk]))
+        request.resolver_match = resolve(request.path)
+        with self.assertRaises(QueryBudgetExceeded):
+            await middleware(request)
+        self.assertEqual(request.query_stats.count, 2)
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.date = timezone.localdate() + timedelta(days=1)
+        availability_cache.clear()
+        registry._reset()
+
+    def book(self, start_hour, end_hour):
+        day = self.date.strftime('%d-%m-%Y')
+        return self.client.post(reverse('room-booking', args=[self.room.pk]), {
+            "resident": {"name": "Residentjon"}, "start": f"{day} {start_hour}:00:00", "end": f"{day} {end_hour}:00:00"
+        }, format='json')
+
+    def metrics(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return dict(line.rsplit(' ', 1) for line in response.content.decode().splitlines() if not line.startswith('#'))
+
+    def test_records_latency_queries_outcomes_and_cache(self):
+        self.assertEqual(self.book(10, 11).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.book(10, 11).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.book(11, 10).status_code, status.HTTP_410_GONE)
+        for _ in range(2):
+            self.client.get(reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()})
+
+        samples = self.metrics()
+        self.assertEqual(samples['booking_outcomes_total{view="room-booking",status="201"}'], '1')
+        self.assertEqual(samples['booking_outcomes_total{view="room-booking",status="410"}'], '2')
+        self.assertEqual(
+            samples['booking_http_requests_total{view="availability",method="GET",status="200"}'], '2'
+        )
+        self.assertEqual(samples['booking_http_request_duration_seconds_count{view="availability"}'], '2')
+        self.assertEqual(
+            samples['booking_http_request_duration_seconds_bucket{view="availability",le="+Inf"}'], '2'
+        )
+        self.assertGreater(int(samples['booking_db_queries_total{view="room-booking"}']), 0)
+        self.assertEqual(samples['booking_cache_hit_ratio{cache="availability"}'], '0.5')
+
+    async def test_records_async_views(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+
+        url = reverse('async-availability', args=[self.room.pk])
+        response = await AsyncClient().get(url, {'date': self.date.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        samples = await sync_to_async(self.metrics)()
+        self.assertEqual(
+            samples['booking_http_requests_total{view="async-availability",method="GET",status="200"}'], '1'
+        )
+        self.assertGreater(int(samples['booking_db_queries_total{view="async-availability"}']), 0)
+
+    def test_aggregates_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            # boshqa worker jarayoni yozgan fayl
+            other = {
+                'counters': [
+                    ['booking_outcomes_total', [['view', 'room-booking'], ['status', '201']], 3],
+                    ['booking_cache_hits_total', [['cache', 'availability']], 4],
+                    ['booking_cache_misses_total', [['cache', 'availability']], 0],
+                ],
+                'histograms': [[
+                    'booking_http_request_duration_seconds', [['view', 'room-booking']],
+                    [1] + [0] * len(settings.METRICS_LATENCY_BUCKETS), 0.001, 1,
+                ]],
+            }
+            Path(directory, '1-1.json').write_text(json.dumps(other))
+            self.book(10, 11)
+
+            samples = self.metrics()
+            self.assertEqual(samples['booking_outcomes_total{view="room-booking",status="201"}'], '4')
+            self.assertEqual(samples['booking_http_request_duration_seconds_count{view="room-booking"}'], '2')
+            self.assertGreaterEqual(
+                int(samples['booking_http_request_duration_seconds_bucket{view="room-booking",le="0.005"}']), 1
+            )
+            self.assertEqual(samples['booking_cache_hit_ratio{cache="availability"}'], '1')
+            self.assertEqual(len(list(Path(directory).glob('*.json'))), 2)
+
+
+class ProfilingTest(APITestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='training room', type='team', capacity=5)
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.admin = User.objects.create_user('admin', password='secret', is_staff=True)
+        availability_cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = self.settings(PROFILING_DIR=self.directory.name, PROFILING_KEEP=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def availability(self, **headers):
+        return self.client.get(
+            reverse('availability', args=[self.room.pk]), {'date': self.date.isoformat()}, headers=headers
+        )
+
+    def test_signed_header_profiles_request(self):
+        response = self.availability(**{'X-Profile': make_profile_token()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        name = response['X-Profile-Id']
+
+        self.client.force_authenticate(self.admin)
+        profile = self.client.get(reverse('profile-detail', args=[name])).data
+        self.assertEqual(profile['view'], 'availability')
+        self.assertEqual(profile['status'], 200)
+        self.assertEqual(profile['queries'], len(profile['sql']))
+        self.assertIn('booking_changecounter', profile['sql'][0]['sql'])
+
+        response = self.client.get(reverse('profile-stacks', args=[name]))
+        stacks = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(stacks)
+        # har bir qator `kadr;kadr;... mikrosekund`
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in stacks))
+        self.assertTrue(any('RoomAvailabiltyAPIView.get (booking/views.py' in line for line in stacks))
+
+    def test_frame_name_without_qualname(self):
+        # Python 3.11 dan oldin kod obyektlarida co_qualname yo'q
+        code = SimpleNamespace(
+            co_name='get', co_filename=str(settings.BASE_DIR / 'booking' / 'views.py'), co_firstlineno=10
+        )
+        self.assertEqual(frame_name(code), f"get ({Path('booking', 'views.py')}:10)")
+        self.assertEqual(
+            frame_name(RoomAvailabiltyAPIView.get.__code__).split(' (')[0],
+            getattr(RoomAvailabiltyAPIView.get.__code__, 'co_qualname', 'get'),
+        )
+
+    def test_unsigned_or_bad_header_is_ignored(self):
+        self.assertNotIn('X-Profile-Id', self.availability())
+        self.assertNotIn('X-Profile-Id', self.availability(**{'X-Profile': 'profile:bad:signature'}))
+        self.assertFalse(list(Path(self.directory.name).iterdir()))
+
+    def test_sampling_rotation_and_admin_listing(self):
+        day = self.date.strftime('%d-%m-%Y')
+        with self.settings(PROFILING_SAMPLE_RATE=1.0):
+            names = [self.availability()['X-Profile-Id'] for _ in range(2)]
+            response = self.client.post(reverse('room-booking', args=[self.room.pk]), {
+                "resident": {"name": "Residentjon"}, "start": f"{day} 09:00:00", "end": f"{day} 10:00:00"
+            }, format='json')
+            names.append(response['X-Profile-Id'])
+            # boshqa view lar profillanmaydi
+            self.assertNotIn('X-Profile-Id', self.client.get(reverse('rooms')))
+
+        self.assertEqual(self.client.get(reverse('profiles')).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.admin)
+        profiles = self.client.get(reverse('profiles')).data
+        # eng eskisi o'chirilgan, eng yangisi birinchi
+        self.assertEqual([profile['name'] for profile in profiles], names[:0:-1])
+        self.assertEqual(profiles[0]['view'], 'room-booking')
+        self.assertEqual(profiles[0]['status'], 201)
+        self.assertNotIn('sql', profiles[0])
+        self.assertEqual(len(list(Path(self.directory.name).iterdir())), 4)
+        self.assertEqual(
+            self.client.get(reverse('profile-detail', args=[names[0]])).status_code, status.HTTP_404_NOT_FOUND
+        )
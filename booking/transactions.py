@@ -0,0 +1,69 @@
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+
+
+def is_lock_error(exc):
+    '''
+        is_lock_error -> xatolik boshqa tranzaksiya bilan to'qnashuv
+        (qulf, deadlock, serialization failure) natijasimi yoki yo'qligini
+        aniqlaydi. Bunday xatoliklarda so'rovni qayta urinish mumkin.
+    '''
+    cause = exc.__cause__
+    return (
+        'locked' in str(exc)
+        or getattr(cause, 'pgcode', None) in ('40001', '40P01')
+        or (cause is not None and cause.args[:1] in ((1205,), (1213,)))
+    )
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    '''
+        write_transaction -> bitta yozish tranzaksiyasini ochadi.
+
+        SQLite da tranzaksiya `BEGIN IMMEDIATE` bilan boshlanadi, ya'ni yozish
+        qulfi tekshiruvdan oldin olinadi va parallel yozuvchilar tekshiruv
+        bilan insert orasiga kira olmaydi. Boshqa bazalarda qator qulfi
+        `select_for_update()` orqali olinishi kerak.
+    '''
+    connection = transaction.get_connection(using)
+
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # Django sqlite uchun tranzaksiyani oddiy BEGIN bilan boshlaydi
+    connection._start_transaction_under_autocommit = (
+        lambda: connection.cursor().execute('BEGIN IMMEDIATE')
+    )
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        del connection._start_transaction_under_autocommit
+
+
+def run_with_retry(func, using=DEFAULT_DB_ALIAS):
+    '''
+        run_with_retry -> func() ni qulf to'qnashuvida eksponensial kutish
+        bilan settings.BOOKING_WRITE_RETRIES martagacha qayta chaqiradi.
+
+        Urinishlar tugasa oxirgi OperationalError ko'tariladi. Tashqi
+        tranzaksiya ichida qayta urinib bo'lmaydi, xatolik darhol ko'tariladi.
+    '''
+    retries = settings.BOOKING_WRITE_RETRIES
+    backoff = settings.BOOKING_WRITE_BACKOFF
+
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except OperationalError as exc:
+            in_transaction = transaction.get_connection(using).in_atomic_block
+            if not is_lock_error(exc) or in_transaction or attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
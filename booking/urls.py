@@ -1,10 +1,32 @@
 from django.urls import path
-from .views import RoomListAPIView, RoomDetailView, BookingRoomView, RoomAvailabiltyAPIView
+
+from .calendar import RoomCalendarView
+from .changefeed import changes_stream
+from .views import (
+    RoomListAPIView, RoomDetailView, BookingRoomView, RoomAvailabiltyAPIView,
+    RoomsAvailabilityAPIView, FreeRoomListAPIView, NextSlotsAPIView,
+    BatchBookingView, BookingSeriesView, BookingSeriesDetailView,
+    RoomHeatmapAPIView, RoomStatsAPIView,
+    BookingHoldView, BookingHoldConfirmView, BookingHoldDetailView,
+)
 
 
 urlpatterns = [
     path('', RoomListAPIView.as_view(), name='rooms'),
+    path('availability/', RoomsAvailabilityAPIView.as_view(), name='rooms-availability'),
+    path('free/', FreeRoomListAPIView.as_view(), name='free-rooms'),
+    path('heatmap/', RoomHeatmapAPIView.as_view(), name='rooms-heatmap'),
+    path('stats/', RoomStatsAPIView.as_view(), name='rooms-stats'),
+    path('changes/stream', changes_stream, name='booking-changes-stream'),
+    path('bookings/batch/', BatchBookingView.as_view(), name='booking-batch'),
+    path('holds/<str:token>/', BookingHoldDetailView.as_view(), name='booking-hold-detail'),
+    path('holds/<str:token>/confirm/', BookingHoldConfirmView.as_view(), name='booking-hold-confirm'),
+    path('series/<int:pk>/', BookingSeriesDetailView.as_view(), name='booking-series-detail'),
     path('<int:pk>/', RoomDetailView.as_view(), name='room-detail'),
     path("<int:pk>/book/", BookingRoomView.as_view(), name='room-booking'),
+    path("<int:pk>/hold/", BookingHoldView.as_view(), name='room-hold'),
+    path("<int:pk>/series/", BookingSeriesView.as_view(), name='booking-series'),
     path("<int:pk>/availability/", RoomAvailabiltyAPIView.as_view(), name='availability'),
+    path("<int:pk>/next-slots/", NextSlotsAPIView.as_view(), name='next-slots'),
+    path("<int:pk>/calendar.ics", RoomCalendarView.as_view(), name='room-calendar'),
 ]
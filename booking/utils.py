@@ -0,0 +1,249 @@
+import bisect
+import re
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def day_range(date_):
+    '''
+        day_range -> funksiyasi berilgan sananing boshlanish va keyingi
+        sananing boshlanish vaqtini settings.TIME_ZONE bo'yicha qaytaradi.
+
+        maqsadi -> `start__date=date` o'rniga [boshlanish, tugash) oralig'i
+        bo'yicha filterlash, shunda (room, start) indeksidan foydalaniladi.
+    '''
+    time_zone = ZoneInfo(settings.TIME_ZONE)
+    start = datetime.combine(date_, time.min, tzinfo=time_zone)
+    end = datetime.combine(date_ + timedelta(days=1), time.min, tzinfo=time_zone)
+    return start, end
+
+
+def free_intervals(opening_time, closing_time, intervals):
+    '''
+        free_intervals -> funksiyasi ish vaqti va vaqt bo'yicha tartiblangan
+        band qilingan (start, end) oraliqlaridan bo'sh oraliqlarni qaytaradi.
+
+        parametrlar -> opening_time, closing_time, intervals
+        bu yerda:
+            opening_time: bo'sh vaqtlar boshlanishi (aware datetime),
+            closing_time: bo'sh vaqtlar tugashi (aware datetime),
+            intervals: start bo'yicha tartiblangan (start, end) juftliklari
+    '''
+    data = []
+    cursor = opening_time
+
+    for start, end in intervals:
+        if cursor >= closing_time:
+            break
+        # oldingi bandlikdan keyin bo'sh vaqt qolgan bo'lsa
+        if start > cursor:
+            data.append((cursor, min(start, closing_time)))
+        cursor = max(cursor, end)
+
+    # oxirgi bandlikdan keyin bo'sh vaqt bo'lsa
+    if cursor < closing_time:
+        data.append((cursor, closing_time))
+
+    return data
+
+
+def parse_date(value):
+    '''
+        parse_date -> funksiyasi "YYYY-MM-DD" yoki "DD-MM-YYYY"
+        ko'rinishidagi sanani date ga o'tkazadi, aks holda ValueError.
+    '''
+    try:
+        return datetime.strptime(value or '', "%Y-%m-%d").date()
+    except ValueError:
+        return datetime.strptime(value or '', "%d-%m-%Y").date()
+
+
+def parse_datetime(value):
+    '''
+        parse_datetime -> funksiyasi api orqali kelgan sana va vaqtni
+        settings.DATETIME_FORMAT (yoki ISO 8601) ko'rinishidan joriy
+        timezone dagi aware datetime ga o'tkazadi.
+
+        noto'g'ri qiymat berilsa ValueError ko'tariladi.
+    '''
+    if not value:
+        raise ValueError("sana va vaqt kiritilmagan")
+    try:
+        parsed = datetime.strptime(value, settings.DATETIME_FORMAT)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return timezone.localtime(parsed)
+
+
+def parse_duration(value):
+    '''
+        parse_duration -> funksiyasi "45m", "1h", "1h30m" yoki "90"
+        (daqiqa) ko'rinishidagi davomiylikni timedelta ga o'tkazadi.
+
+        noto'g'ri yoki musbat bo'lmagan qiymat uchun ValueError ko'tariladi.
+    '''
+    match = re.fullmatch(r'(?:(\d+)h)?(?:(\d+)m?)?', (value or '').strip())
+    if not match or not any(match.groups()):
+        raise ValueError(f"noto'g'ri davomiylik: {value}")
+
+    hours, minutes = match.groups()
+    duration = timedelta(hours=int(hours or 0), minutes=int(minutes or 0))
+    if duration <= timedelta(0):
+        raise ValueError(f"noto'g'ri davomiylik: {value}")
+    return duration
+
+
+def iter_free_slots(room, bookings, dates, duration, now):
+    '''
+        iter_free_slots -> generatori xonaning berilgan sanalardagi
+        davomiyligi `duration` dan kam bo'lmagan bo'sh oraliqlarini
+        vaqt bo'yicha ketma-ket qaytaradi.
+
+        parametrlar -> room, bookings, dates, duration, now
+        bu yerda:
+            bookings: butun davr uchun start bo'yicha tartiblangan
+                      (start, end) juftliklari (iterator bo'lishi mumkin),
+            dates: ketma-ket sanalar,
+            now: shu vaqtdan oldingi oraliqlar qaytarilmaydi
+
+        bookinglar bir marta o'qiladi, shuning uchun yetarli oraliq
+        topilgach generatorni to'xtatish bazadan o'qishni ham to'xtatadi.
+    '''
+    bookings = iter(bookings)
+    pending = next(bookings, None)
+
+    for date_ in dates:
+        # band qilish faqat bir kun ichida va xonaning ish vaqtida bo'ladi
+        opening_time = timezone.make_aware(datetime.combine(date_, room.opening_time))
+        closing_time = timezone.make_aware(datetime.combine(date_, room.closing_time))
+        cursor = max(opening_time, now)
+
+        while cursor < closing_time and pending is not None and pending[0] < closing_time:
+            start, end = pending
+            if start > cursor and start - cursor >= duration:
+                yield cursor, start
+            cursor = max(cursor, end)
+            # keyingi kunga o'tadigan booking keyingi kun uchun ham kerak
+            if end > closing_time:
+                break
+            pending = next(bookings, None)
+
+        if closing_time - cursor >= duration:
+            yield cursor, closing_time
+
+
+def trim_intervals(intervals, now):
+    '''
+        trim_intervals -> funksiyasi bo'sh oraliqlarning `now` dan oldingi
+        qismini kesib tashlaydi (bugungi sana uchun).
+    '''
+    return [(max(start, now), end) for start, end in intervals if end > now]
+
+
+class IntervalSet:
+    '''
+        IntervalSet -> band qilingan oraliqlarning start bo'yicha
+        tartiblangan, o'zaro kesishmaydigan to'plami.
+
+        maqsadi -> oraliq kesishishini bisect yordamida O(log n) da
+        tekshirish. Berilgan oraliqlar kesishsa, ular birlashtiriladi.
+    '''
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def overlaps(self, start, end):
+        # end qiymati start dan katta bo'lgan birinchi oraliq
+        index = bisect.bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def add(self, start, end):
+        '''
+            add -> oraliqni qo'shadi, kesishgan yoki tutash oraliqlar
+            bitta oraliqqa birlashtiriladi.
+        '''
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def remove(self, start, end):
+        '''
+            remove -> [start, end) oralig'ini to'plamdan chiqaradi,
+            kerak bo'lsa mavjud oraliqni ikkiga bo'ladi.
+        '''
+        first = bisect.bisect_right(self.ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        if first >= last:
+            return
+
+        pieces = []
+        if self.starts[first] < start:
+            pieces.append((self.starts[first], start))
+        if self.ends[last - 1] > end:
+            pieces.append((end, self.ends[last - 1]))
+        self.starts[first:last] = [piece[0] for piece in pieces]
+        self.ends[first:last] = [piece[1] for piece in pieces]
+
+
+def find_conflicts(intervals, bookings):
+    '''
+        find_conflicts -> funksiyasi start bo'yicha tartiblangan va o'zaro
+        kesishmaydigan `intervals` dan qaysilari start bo'yicha tartiblangan
+        `bookings` bilan kesishishini bitta birlashtirish (merge) o'tishida
+        aniqlaydi.
+    '''
+    bookings = list(bookings)
+    conflicts = []
+    first = 0
+
+    for start, end in intervals:
+        # bu va keyingi oraliqlardan oldin tugaydigan bookinglar o'tkazib yuboriladi
+        while first < len(bookings) and bookings[first][1] <= start:
+            first += 1
+
+        index = first
+        while index < len(bookings) and bookings[index][0] < end:
+            if bookings[index][1] > start:
+                conflicts.append((start, end))
+                break
+            index += 1
+
+    return conflicts
+
+
+def format_intervals(intervals):
+    '''
+        format_intervals -> (start, end) juftliklarini settings.TIME_ZONE
+        bo'yicha settings.DATETIME_FORMAT ko'rinishidagi lug'atlarga o'tkazadi.
+    '''
+    time_zone = ZoneInfo(settings.TIME_ZONE)
+    return [
+        {
+            "start": datetime.strftime(start.astimezone(time_zone), settings.DATETIME_FORMAT),
+            "end": datetime.strftime(end.astimezone(time_zone), settings.DATETIME_FORMAT)
+        }
+        for start, end in intervals
+    ]
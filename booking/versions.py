@@ -0,0 +1,82 @@
+import time
+
+from django.db.models import F
+from django.utils import timezone
+
+
+# barcha xonalar (nomi, turi, sig'imi, ish vaqti) versiyasi
+ROOMS_KEY = 'rooms'
+
+
+def room_key(room_id):
+    return f'room:{room_id}'
+
+
+def room_day_key(room_id, date_):
+    return f'room:{room_id}:{date_.isoformat()}'
+
+
+def room_holds_key(room_id, date_):
+    # updated_at -> shu kundagi holdlardan birortasi faol bo'lishi mumkin bo'lgan oxirgi vaqt
+    return f'holds:{room_id}:{date_.isoformat()}'
+
+
+def bump(keys, updated_at=None):
+    '''
+        bump -> berilgan hisoblagichlarni bittaga oshiradi (UPDATE ...
+        SET value = value + 1), hali yo'qlarini yaratadi. Booking
+        yoziladigan tranzaksiya ichida chaqiriladi, shuning uchun versiya
+        ma'lumot bilan birga commit bo'ladi. updated_at berilmasa hozirgi
+        vaqt yoziladi.
+
+        Qiymat avlod (generation) hisoblagichi: jarayon ichidagi nusxa
+        (BookingIndex) o'z yozuvlarini sanab, boshqa jarayon yozganini
+        qiymat farqidan biladi. Yangi hisoblagich nanosekundlardagi vaqtdan
+        boshlanadi, shuning uchun qayta yaratilgan hisoblagich qiymati
+        eskisi bilan to'qnashmaydi.
+    '''
+    from .models import ChangeCounter
+
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    updated_at = updated_at or timezone.now()
+    updated = ChangeCounter.objects.filter(key__in=keys).update(
+        value=F('value') + 1, updated_at=updated_at
+    )
+    if updated < len(keys):
+        value = time.time_ns()
+        ChangeCounter.objects.bulk_create(
+            [ChangeCounter(key=key, value=value, updated_at=updated_at) for key in keys],
+            ignore_conflicts=True,
+        )
+
+
+def get_versions(keys):
+    '''
+        get_versions -> {key: (value, updated_at)}, hali o'zgarmagan
+        hisoblagichlar uchun (0, None).
+    '''
+    from .models import ChangeCounter
+
+    versions = {key: (0, None) for key in keys}
+    for key, value, updated_at in ChangeCounter.objects.filter(key__in=keys).values_list(
+        'key', 'value', 'updated_at'
+    ):
+        versions[key] = (value, updated_at)
+    return versions
+
+
+async def aget_versions(keys):
+    '''
+        aget_versions -> get_versions ning async ORM dagi varianti.
+    '''
+    from .models import ChangeCounter
+
+    versions = {key: (0, None) for key in keys}
+    async for key, value, updated_at in ChangeCounter.objects.filter(key__in=keys).values_list(
+        'key', 'value', 'updated_at'
+    ):
+        versions[key] = (value, updated_at)
+    return versions
+
@@ -1,56 +1,79 @@
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import islice
 
 from django.utils import timezone
 from django.conf import settings
+from django.db import OperationalError
+from django.db.models import Exists, OuterRef, Prefetch, Sum
+from django.db.models.functions import ExtractIsoWeekDay
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
 
-from .models import Room, Resident, Booking
-from .serializers import RoomSerializer, BookingRoomSerializer
+from .holds import day_holds, holds_changed, holds_pending, new_token, subtract_holds, with_holds
+from .index import booking_index
+from .materialized import day_hours, read_day, rows_to_intervals
+from .occupancy import OccupancyGrid
+from .rollups import week_days
+from .models import (
+    Room, Resident, Booking, BookingHold, BookingSeries, RoomDayFreeInterval, RoomDailyUsage,
+)
+from .pagination import CustomPagination, KeysetPagination
+from .search import search_rooms
+from .serializers import (
+    RoomSerializer, BookingRoomSerializer, BatchBookingSerializer,
+    BatchBookingItemSerializer, BookingSeriesSerializer,
+    BookingSeriesUpdateSerializer, BookingHoldSerializer, check_booking_period,
+)
+from .utils import (
+    day_range, free_intervals, parse_date, parse_datetime, parse_duration, iter_free_slots,
+    trim_intervals, IntervalSet, format_intervals, find_conflicts,
+)
+from .cache import availability_cache
+from .conditional import ConditionalGetMixin
+from .profiling import ProfilingMixin
+from .signals import bookings_changed
+from .transactions import is_lock_error, run_with_retry, write_transaction
+from .versions import ROOMS_KEY, get_versions, room_day_key, room_holds_key, room_key
 
 
-class CustomPagination(PageNumberPagination):
-    page_size = 10
-    max_page_size = 10
-    page_size_query_param = 'page_size'
-
-    def get_paginated_response(self, data):
-        return Response(
-            {
-                'page': self.page.number,
-                'count': self.page.paginator.count,
-                "page_size": self.page.paginator.per_page,
-                'results': data
-            }
-        )
-
-
-class RoomListAPIView(ListAPIView):
+class RoomListAPIView(ConditionalGetMixin, ListAPIView):
     queryset = Room.objects.all()
     filter_backends = [DjangoFilterBackend, SearchFilter]
     filterset_fields = ['type']
     search_fields = ['name']
     pagination_class = CustomPagination
 
+    @property
+    def paginator(self):
+        '''
+            paginator -> `?cursor=` yoki `?pagination=cursor` berilganda
+            (yoki settings.ROOMS_PAGINATION = 'cursor' bo'lsa) cursor
+            sahifalashni, aks holda eski page/count javobini qaytaradi.
+        '''
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            mode = params.get('pagination', settings.ROOMS_PAGINATION)
+            if 'cursor' in params or mode == 'cursor':
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
         queryset = super().get_queryset()
         search_name = self.request.query_params.get("search")
         type = self.request.query_params.get('type')
 
-        if search_name and type:
-            queryset = queryset.filter(
-                name__icontains=search_name, 
-                type=type
-            )
-        elif search_name:
-            queryset = queryset.filter(name__icontains=search_name)
-        elif type:
+        # nom bo'yicha qidiruv trigram indeksi orqali bajariladi
+        if search_name:
+            queryset = search_rooms(queryset, search_name)
+        if type:
             queryset = queryset.filter(type=type)
 
         return queryset
@@ -58,7 +81,15 @@ class RoomListAPIView(ListAPIView):
     def get_serializer_class(self):
         return RoomSerializer
 
+    def get_version_keys(self):
+        return [ROOMS_KEY]
+
     def get(self, request, *args, **kwargs):
+        # xonalar o'zgarmagan bo'lsa ro'yhat qayta yuklanmaydi
+        not_modified = self.not_modified()
+        if not_modified:
+            return not_modified
+
         queryset = self.get_queryset()
         page = self.paginate_queryset(queryset)
 
@@ -70,8 +101,86 @@ class RoomListAPIView(ListAPIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class RoomDetailView(APIView):
+class FreeRoomListAPIView(ListAPIView):
+    '''
+        FreeRoomListAPIView -> berilgan [start, end) oralig'i davomida
+        to'liq bo'sh bo'lgan xonalarni qaytaradi.
+
+        maqsadi -> xona ish vaqti oraliqni to'liq qamrashi va oraliq bilan
+        kesishadigan booking yoki faol hold bo'lmasligi bitta SQL so'rovda
+        (NOT EXISTS) tekshiriladi. Natija eng kichik yetarli sig'im bo'yicha tartiblanadi.
+    '''
+    serializer_class = RoomSerializer
+    pagination_class = CustomPagination
+
+    def get_queryset(self):
+        start, end = self.window
+        overlapping = Booking.objects.filter(
+            room=OuterRef('pk'), end__gt=start, start__lt=end
+        )
+        held = BookingHold.objects.active().filter(
+            room=OuterRef('pk'), end__gt=start, start__lt=end
+        )
+        queryset = Room.objects.filter(
+            opening_time__lte=start.time(),
+            closing_time__gte=end.time(),
+        ).filter(~Exists(overlapping), ~Exists(held))
+
+        type = self.request.query_params.get('type')
+        min_capacity = self.request.query_params.get('min_capacity')
+        if type:
+            queryset = queryset.filter(type=type)
+        if min_capacity:
+            queryset = queryset.filter(capacity__gte=int(min_capacity))
+
+        return queryset.order_by('capacity', 'id')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start = parse_datetime(request.query_params.get('start'))
+            end = parse_datetime(request.query_params.get('end'))
+        except ValueError:
+            return Response(
+                {
+                    "error": f"siz sana va vaqtni ushbu ko'rinishda kiritishingiz kerak {settings.DATETIME_FORMAT}"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if end <= start:
+            return Response(
+                {"error": "boshlanish vaqti tugash vaqtidan keyin kelolmaydi!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start.date() != end.date():
+            return Response(
+                {"error": "oraliq eng ko‘pi bilan bir kun ichida bo'lishi mumkin"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        self.window = (start, end)
+        try:
+            queryset = self.get_queryset()
+        except ValueError:
+            return Response(
+                {"error": "min_capacity butun son bo'lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class RoomDetailView(ConditionalGetMixin, APIView):
+    def get_version_keys(self):
+        return [ROOMS_KEY]
+
     def get(self, request, pk, *args, **kwargs):
+        not_modified = self.not_modified()
+        if not_modified:
+            return not_modified
+
         try:
             room = Room.objects.get(id=pk)
             data = RoomSerializer(room).data
@@ -83,22 +192,20 @@ class RoomDetailView(APIView):
             return Response(data, status=status.HTTP_404_NOT_FOUND)
 
 
-class BookingRoomView(APIView):
+class BookingRoomView(ProfilingMixin, APIView):
     queryset = Booking.objects.all()
+    profile_name = 'room-booking'
 
     def get_serializer_class(self):
         return BookingRoomSerializer
 
     def post(self, request, *args, **kwargs):
-        room = Room.objects.get(id=self.kwargs.get('pk'))
         try:
             resident_name = request.data['resident']['name']
         except Exception:
             raise Exception("error occured")
 
-        if resident_name is not None and resident_name.rstrip():
-            resident, _ = Resident.objects.get_or_create(name=resident_name)
-        else:
+        if resident_name is None or not resident_name.rstrip():
             return Response({
                 "error": "Resident nomi bo‘sh bo‘lishi mumkin emas"
             },
@@ -121,38 +228,222 @@ class BookingRoomView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # serializer uchun data ni formatlash
-        data = {
-            "resident": resident.id,
-            'room': room.id,
-            "start": start,
-            "end": end
-        }
-        serialized_data = BookingRoomSerializer(
-            data=data, context={"room_id": room.id}
-        )
-        if serialized_data.is_valid():
-            serialized_data.save()
+        try:
+            return run_with_retry(lambda: self.book(resident_name, start, end))
+        except Room.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            # qayta urinishlar tugadi, xona hali ham boshqa so'rov tomonidan qulflangan
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def book(self, resident_name, start, end):
+        '''
+            book -> metodi tekshiruv va saqlashni bitta yozish
+            tranzaksiyasida bajaradi.
+
+            maqsadi -> parallel so'rovlarda bir vaqtni ikki marta band
+            qilishning oldini olish: xona qatori qulflanadi (SQLite da
+            butun baza BEGIN IMMEDIATE bilan), shundan keyingina kesishish
+            tekshiriladi va booking saqlanadi.
+        '''
+        with write_transaction():
+            room = Room.objects.select_for_update().get(id=self.kwargs.get('pk'))
+            resident, _ = Resident.objects.get_or_create(name=resident_name)
+
+            # serializer uchun data ni formatlash
+            # obyektlar uzatiladi, serializer ularni qayta so'ramaydi
+            data = {
+                "resident": resident,
+                'room': room,
+                "start": start,
+                "end": end
+            }
+            serialized_data = BookingRoomSerializer(
+                data=data, context={"room_id": room.id}
+            )
+            if serialized_data.is_valid():
+                serialized_data.save()
+                context = {
+                    "message": "xona muvaffaqiyatli band qilindi"
+                }
+                return Response(context, status=status.HTTP_201_CREATED)
+
+        try:
+            errors = serialized_data.errors['non_field_errors'][0]
+            error_code = errors.code  # xatolik kodini olish
+            error_message = str(errors)  # xatolik xabarini olish
+
             context = {
-                "message": "xona muvaffaqiyatli band qilindi"
+                error_code: error_message,
             }
-            return Response(context, status=status.HTTP_201_CREATED)
-        else:
+            return Response(context, status=status.HTTP_410_GONE)
+
+        except Exception:
+            return Response(serialized_data.errors, status=status.HTTP_410_GONE)
+
+
+class BookingHoldView(APIView):
+    '''
+        BookingHoldView -> xonani ttl sekundga vaqtincha band qiladi (hold)
+        va uni tasdiqlash uchun token qaytaradi.
+
+        maqsadi -> bir vaqt uchun raqobatlashayotgan residentlarning har
+        biri to'liq booking tekshiruvidan o'tib 410 olmasligi: vaqt avval
+        qisqa muddatga hold qilinadi, muddati tugaguncha u boshqalar uchun
+        band ko'rinadi va token bilan arzon tasdiqlanadi
+        (BookingHoldConfirmView).
+    '''
+
+    def post(self, request, pk, *args, **kwargs):
+        serializer = BookingHoldSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return run_with_retry(lambda: self.hold(serializer.validated_data))
+        except Room.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def hold(self, data):
+        start = timezone.localtime(data['start'])
+        end = timezone.localtime(data['end'])
+
+        with write_transaction():
+            room = Room.objects.select_for_update().get(id=self.kwargs.get('pk'))
             try:
-                errors = serialized_data.errors['non_field_errors'][0]
-                error_code = errors.code  # xatolik kodini olish
-                error_message = str(errors)  # xatolik xabarini olish
+                check_booking_period(room, start, end)
+            except ValidationError as exc:
+                error = exc.detail[0]
+                return Response({error.code: str(error)}, status=status.HTTP_410_GONE)
 
-                context = {
-                    error_code: error_message,
-                }
-                return Response(context, status=status.HTTP_410_GONE)
+            bookings = Booking.objects.filter(room=room, end__gt=start, start__lt=end)
+            if with_holds(bookings, room.pk, start, end).exists():
+                return Response(
+                    {"error": "uzr, siz tanlagan vaqtda xona band"},
+                    status=status.HTTP_410_GONE
+                )
+
+            resident, _ = Resident.objects.get_or_create(name=data['resident']['name'])
+            hold = BookingHold.objects.create(
+                token=new_token(),
+                resident=resident,
+                room=room,
+                start=start,
+                end=end,
+                expires_at=timezone.now() + timedelta(seconds=data['ttl']),
+            )
+            holds_changed(room.pk, start)
+
+        interval, = format_intervals([(start, end)])
+        return Response(
+            {
+                "token": hold.token,
+                **interval,
+                "expires_at": timezone.localtime(hold.expires_at).strftime(settings.DATETIME_FORMAT),
+                "ttl": data['ttl'],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class BookingHoldConfirmView(APIView):
+    '''
+        BookingHoldConfirmView -> hold ni Booking ga aylantiradi.
+
+        maqsadi -> hold yaratilganda vaqt tekshirilgan va boshqalar uchun
+        yopilgan, shuning uchun tasdiqlashda kesishishlar qayta
+        tekshirilmaydi: hold qulflanadi, booking yaratiladi va hold o'chiriladi.
+        Hold paytida vaqt o'tib ketgan bo'lishi mumkin, shuning uchun
+        check_booking_period qayta tekshiriladi.
+    '''
+
+    def post(self, request, token, *args, **kwargs):
+        try:
+            return run_with_retry(lambda: self.confirm(token))
+        except BookingHold.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def confirm(self, token):
+        with write_transaction():
+            hold = BookingHold.objects.select_related('room').select_for_update().get(token=token)
+            if hold.expires_at <= timezone.now():
+                hold.delete()
+                return Response(
+                    {"error": "hold muddati tugagan, vaqtni qayta band qiling"},
+                    status=status.HTTP_410_GONE
+                )
+
+            try:
+                check_booking_period(hold.room, timezone.localtime(hold.start), timezone.localtime(hold.end))
+            except ValidationError as exc:
+                hold.delete()
+                holds_changed(hold.room_id, hold.start)
+                error = exc.detail[0]
+                return Response({error.code: str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+            booking = Booking.objects.create(
+                room=hold.room, resident_id=hold.resident_id, start=hold.start, end=hold.end
+            )
+            hold.delete()
+
+        return Response(
+            {"id": booking.pk, "message": "xona muvaffaqiyatli band qilindi"},
+            status=status.HTTP_201_CREATED
+        )
 
-            except Exception:
-                return Response(serialized_data.errors, status=status.HTTP_410_GONE)
 
+class BookingHoldDetailView(APIView):
+    '''
+        BookingHoldDetailView -> DELETE hold ni muddatidan oldin bekor qiladi.
+    '''
 
-class RoomAvailabiltyAPIView(APIView):
+    def delete(self, request, token, *args, **kwargs):
+        try:
+            return run_with_retry(lambda: self.release(token))
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def release(self, token):
+        with write_transaction():
+            hold = BookingHold.objects.filter(token=token).first()
+            if hold is None:
+                return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+            hold.delete()
+            holds_changed(hold.room_id, hold.start)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class RoomAvailabiltyAPIView(ProfilingMixin, ConditionalGetMixin, APIView):
+    profile_name = 'availability'
     filter_backends = [DjangoFilterBackend, SearchFilter]
     # filterset_fields = ['']
     search_fields = ['start__date']
@@ -193,8 +484,10 @@ class RoomAvailabiltyAPIView(APIView):
     def get_queryset(self):
         queryset = Booking.objects.filter(room=self.kwargs.get("pk"))
         date = self.get_date()
-        # querysetdan berilgan sana bo'yicha bookinglarni filterlash
-        queryset = queryset.filter(start__date=date) 
+        # querysetdan berilgan sana bo'yicha bookinglarni filterlash,
+        # [kun boshi, keyingi kun boshi) oralig'i indeksdan foydalanadi
+        day_start, day_end = day_range(date)
+        queryset = queryset.filter(start__gte=day_start, start__lt=day_end)
         return queryset
 
     def get_room(self):
@@ -205,7 +498,10 @@ class RoomAvailabiltyAPIView(APIView):
             maqsadi -> rooms/<int:pk>/availability dan pk ga mos keluvchi
             xona obyektini qaytarish.
         '''
-        return Room.objects.get(id=self.kwargs.get('pk'))
+        # bitta so'rov davomida xona bazadan faqat bir marta olinadi
+        if not hasattr(self, '_room'):
+            self._room = Room.objects.get(id=self.kwargs.get('pk'))
+        return self._room
 
     def generate_available_times(self, opening_time, closing_time, bookings, *args, **kwargs):
         '''
@@ -219,38 +515,14 @@ class RoomAvailabiltyAPIView(APIView):
             bu yerda:
                 opening_time: xonaning ochilish vaqti,
                 closing_time: xonaning yopilish vaqti,
-                bookings: band qilingan xonalar ro‘yhati(queryset)
+                bookings: vaqt bo'yicha tartiblangan band qilingan
+                          xonalar ro‘yhati(queryset yoki list)
         '''
-        time_zone = ZoneInfo(settings.TIME_ZONE)
-        data = []
-        first_booking_start = bookings[0].start
-
-        # agar birinchi band qilingan vaqtdan oldin bo'sh vaqt bo'lsa
-        if opening_time < first_booking_start:
-            start = opening_time.astimezone(time_zone)
-            end = first_booking_start.astimezone(time_zone)
-            data.append({"start": datetime.strftime(start, settings.DATETIME_FORMAT),
-                        "end": datetime.strftime(end, settings.DATETIME_FORMAT)})
-
-        # birinchi bookingdan keyingi bo'sh vaqtlar
-        for i in range(len(bookings) - 1):
-            current_end = bookings[i].end
-            next_start = bookings[i+1].start
-            if current_end < next_start:
-                start = current_end.astimezone(time_zone)
-                end = next_start.astimezone(time_zone)
-                data.append({"start": datetime.strftime(start, settings.DATETIME_FORMAT),
-                            "end": datetime.strftime(end, settings.DATETIME_FORMAT)})
-
-        # agar oxirgi bookingdan keyin bo'sh vaqt bo'lsa
-        last_booking_end = bookings[len(bookings) - 1].end
-        if last_booking_end < closing_time:
-            start = last_booking_end.astimezone(time_zone)
-            end = closing_time.astimezone(time_zone)
-            data.append({"start": datetime.strftime(start, settings.DATETIME_FORMAT),
-                        "end": datetime.strftime(end, settings.DATETIME_FORMAT)})
-
-        return data
+        intervals = [(booking.start, booking.end) for booking in bookings]
+        return self.format_intervals(free_intervals(opening_time, closing_time, intervals))
+
+    def format_intervals(self, intervals):
+        return format_intervals(intervals)
 
     def make_aware(self, date_, time_, *args, **kwargs):
         '''
@@ -264,10 +536,10 @@ class RoomAvailabiltyAPIView(APIView):
         '''
         return timezone.make_aware(datetime.combine(date_, time_))
 
-    def check_time_for_today(self):
+    def check_time_for_today(self, room=None, date=None):
         current_time = self.get_current_time()
-        room = self.get_room()
-        date = self.get_date()
+        room = room or self.get_room()
+        date = date or self.get_date()
         times = {}
         if date == timezone.localdate():
             if room.opening_time < current_time and room.closing_time > current_time:
@@ -278,37 +550,103 @@ class RoomAvailabiltyAPIView(APIView):
                 return None
         else:
             return None
-        
+
+    def get_working_hours(self, room, date):
+        '''
+            get_working_hours -> metodi xonaning berilgan sanadagi
+            bo'sh vaqtlari qaysi oraliqda qidirilishini qaytaradi.
+
+            maqsadi -> bugungi sana uchun ochilish vaqti o'rniga hozirgi
+            vaqtni olish, boshqa sanalar uchun xonaning ish vaqtini olish.
+        '''
+        times = self.check_time_for_today(room=room, date=date)
+        if times:
+            return times['opening_time'], times['closing_time']
+
+        opening_time = self.make_aware(date, room.opening_time) # sana va vaqtni
+        closing_time = self.make_aware(date, room.closing_time) # birlashtirish
+        return opening_time, closing_time
+
+    def compute_free_intervals(self, room, date):
+        '''
+            compute_free_intervals -> metodi xonaning berilgan sanadagi
+            ochilishdan yopilishgacha bo'lgan bo'sh oraliqlarini qaytaradi:
+            bugungi va kelgusi sanalar uchun jarayon ichidagi BookingIndex
+            dagi tartiblangan bookinglardan, o'tgan sanalar uchun
+            RoomDayFreeInterval jadvalidan bitta indeksli so'rov bilan.
+        '''
+        if date >= timezone.localdate():
+            index = booking_index.get(room.pk, self.get_generation())
+            return free_intervals(*day_hours(room, date), index.day(date))
+        return read_day(room, date)
+
+    def get_version_keys(self):
+        # xona ish vaqti, shu kundagi bookinglar va holdlar versiyasi
+        pk, date = self.kwargs.get('pk'), self.get_date()
+        return [ROOMS_KEY, room_day_key(pk, date), room_holds_key(pk, date)]
+
+    def get_current_versions(self):
+        # BookingIndex generation i ham shu so'rovda o'qiladi, lekin ETag ga kirmaydi
+        if not hasattr(self, '_versions'):
+            key = room_key(self.kwargs.get('pk'))
+            self._versions = get_versions([*self.get_version_keys(), key])
+            self._generation, _ = self._versions.pop(key)
+        return self._versions
+
+    def get_generation(self):
+        self.get_current_versions()
+        return self._generation
+
+    def get_etag_extra(self):
+        # bugungi javob o'tib ketgan vaqtlarga bog'liq, daqiqa aniqligida
+        extra = None
+        if self.get_date() == timezone.localdate():
+            extra = self.get_now().isoformat()
+        # hold muddati tugashi versiyani o'zgartirmaydi, shuning uchun
+        # faol hold bo'lishi mumkin bo'lgan vaqtda 304 qaytarilmaydi
+        if self.holds_pending():
+            return [extra, timezone.now().isoformat()]
+        return extra
+
+    def holds_pending(self):
+        key = room_holds_key(self.kwargs.get('pk'), self.get_date())
+        return holds_pending(self.get_current_versions(), key)
+
+    def get_holds(self, room, date):
+        '''
+            get_holds -> xonaning shu sanadagi faol holdlari. Versiyalarga
+            ko'ra faol hold bo'lishi mumkin bo'lmasa bazaga murojaat qilinmaydi.
+        '''
+        if not self.holds_pending():
+            return []
+        return day_holds(date, [room.pk]).get(room.pk, [])
+
+    def get_now(self):
+        return timezone.localtime().replace(second=0, microsecond=0)
+
     def get(self, request, pk, *args, **kwargs):
+        not_modified = self.not_modified()
+        if not_modified:
+            return not_modified
+
         room = self.get_room() # ayni vaqtdagi xonani olish
         date = self.get_date() # sanani olish
 
-        times = self.check_time_for_today()
-        if times:
-            opening_time = times['opening_time']
-            closing_time = times['closing_time']
-        else:
-            opening_time = self.make_aware(date, room.opening_time) # sana va vaqtni         
-            closing_time = self.make_aware(date, room.closing_time) # birlashtirish
-
-        # band qilingan xonalarni olish
-        bookings = self.get_queryset()
-        if bookings:
-            bookings = bookings.order_by('start__time') #ularni vaqt bo'yicha tartiblash
-            data = self.generate_available_times(
-                opening_time=opening_time,
-                closing_time=closing_time,
-                bookings=bookings
-            )
-        else: 
-            # agar berilgan sanada hech qanday bookinglar bo'lmasa
-            # uning bo'sh vaqtlarni xonaning ochilish va yopilish
-            # vaqtiga teng bo'ladi
-            data = [{
-                "start": datetime.strftime(opening_time, '%Y-%m-%d %H:%M:%S'),
-                "end": datetime.strftime(closing_time, '%Y-%m-%d %H:%M:%S')
-            }]
-        
+        # kunlik bo'sh vaqtlar keshdan olinadi, keshda bo'lmasa yoki shu
+        # kun versiyasi o'zgargan bo'lsa qayta hisoblanib keshga yoziladi
+        day_version, _ = self.get_current_versions()[room_day_key(room.pk, date)]
+        intervals = availability_cache.get_or_set(
+            room, date, lambda: self.compute_free_intervals(room, date), day_version
+        )
+        # holdlar qisqa muddatli, ular keshga yozilmaydi
+        intervals = subtract_holds(intervals, self.get_holds(room, date))
+
+        # bugungi sana uchun o'tib ketgan vaqtlar (daqiqa aniqligida) kesib tashlanadi
+        if date == timezone.localdate():
+            intervals = trim_intervals(intervals, self.get_now())
+
+        data = self.format_intervals(intervals)
+
         if data:
             return Response(
                 data,
@@ -322,3 +660,664 @@ class RoomAvailabiltyAPIView(APIView):
                 },
                 status=status.HTTP_404_NOT_FOUND
             )
+
+
+class RoomsAvailabilityAPIView(RoomAvailabiltyAPIView):
+    '''
+        RoomsAvailabilityAPIView -> barcha (yoki filterlangan) xonalarning
+        berilgan sanadagi bo'sh vaqtlarini bitta so'rovda qaytaradi.
+
+        maqsadi -> har bir xona uchun alohida availability so'rovi
+        yuborishning oldini olish. Xonalar, shu sanadagi bo'sh oraliqlar
+        (RoomDayFreeInterval) va faol holdlar jami uchta SQL so'rov bilan olinadi.
+    '''
+
+    def get_rooms(self, date):
+        queryset = Room.objects.order_by('id')
+        type = self.request.query_params.get('type')
+        min_capacity = self.request.query_params.get('min_capacity')
+
+        if type:
+            queryset = queryset.filter(type=type)
+        if min_capacity:
+            queryset = queryset.filter(capacity__gte=int(min_capacity))
+
+        # shu sanadagi bo'sh oraliqlar xonalar bo'yicha xotirada guruhlanadi
+        intervals = RoomDayFreeInterval.objects.filter(date=date).order_by('start')
+
+        return queryset.prefetch_related(
+            Prefetch('free_intervals', queryset=intervals, to_attr='day_intervals')
+        )
+
+    def get(self, request, *args, **kwargs):
+        try:
+            date = self.get_date()
+        except ValueError:
+            return Response(
+                {"error": "sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            rooms = self.get_rooms(date)
+        except ValueError:
+            return Response(
+                {"error": "min_capacity butun son bo'lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # faol holdlar kam, ular expires_at indeksi orqali olinadi
+        holds = day_holds(date)
+
+        now = self.get_now()
+        data = []
+        for room in rooms:
+            intervals = rows_to_intervals(
+                room, date, [(row.start, row.end) for row in room.day_intervals]
+            )
+            intervals = subtract_holds(intervals, holds.get(room.pk, []))
+            # bugungi sana uchun o'tib ketgan vaqtlar kesib tashlanadi
+            if date == timezone.localdate():
+                intervals = trim_intervals(intervals, now)
+            data.append({
+                **RoomSerializer(room).data,
+                "available": self.format_intervals(intervals)
+            })
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class RoomHeatmapAPIView(APIView):
+    '''
+        RoomHeatmapAPIView -> xonalarning [from, to] kunlari bo'yicha
+        bandlik xaritasini (heatmap) qaytaradi.
+
+        maqsadi -> yuzlab xona va bir necha kun uchun bandlik foizi,
+        "hech bo'lmasa bitta xona bo'sh" va "barcha xonalar bo'sh" vaqtlarini
+        har bir xona uchun alohida hisoblamasdan, OccupancyGrid massivlari
+        ustida vektorli amallar bilan topish. Bookinglar bitta so'rov bilan
+        olinadi.
+    '''
+
+    def get_dates(self):
+        from_ = self.request.query_params.get('from')
+        to = self.request.query_params.get('to')
+        first = parse_date(from_) if from_ else timezone.localdate()
+        last = parse_date(to) if to else first + timedelta(days=6)
+        return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+    def get_rooms(self):
+        queryset = Room.objects.order_by('id')
+        type = self.request.query_params.get('type')
+        if type:
+            queryset = queryset.filter(type=type)
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        try:
+            dates = self.get_dates()
+        except ValueError:
+            return Response(
+                {"error": "sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not dates:
+            return Response(
+                {"error": "from sanasi to sanasidan keyin kelolmaydi!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(dates) > settings.OCCUPANCY_MAX_DAYS:
+            return Response(
+                {"error": f"oraliq eng ko‘pi bilan {settings.OCCUPANCY_MAX_DAYS} kun bo'lishi mumkin"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        grid = OccupancyGrid.build(self.get_rooms(), dates)
+        hourly = grid.bucket_utilization(60)
+        daily = grid.utilization(axis=(0, 2))
+        any_free = grid.any_free()
+        all_free = grid.all_free()
+        opening_time = min((room.opening_time for room in grid.rooms), default=None)
+        closing_time = max((room.closing_time for room in grid.rooms), default=None)
+
+        days = []
+        for i, date_ in enumerate(dates):
+            days.append({
+                "date": date_.isoformat(),
+                "utilization": round(float(daily[i]), 4),
+                "hours": [round(float(value), 4) for value in hourly[i]],
+                "any_free": format_intervals(grid.spans(any_free[i], i, opening_time, closing_time)),
+                "all_free": format_intervals(grid.spans(all_free[i], i, opening_time, closing_time)),
+            })
+
+        utilization = grid.utilization(axis=(1, 2))
+        rooms = [
+            {
+                "id": room.pk,
+                "name": room.name,
+                "type": room.type,
+                "utilization": round(float(utilization[i]), 4),
+            }
+            for i, room in enumerate(grid.rooms)
+        ]
+
+        return Response(
+            {
+                "from": dates[0].isoformat(),
+                "to": dates[-1].isoformat(),
+                "slot_minutes": grid.slot_minutes,
+                "days": days,
+                "rooms": rooms,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class RoomStatsAPIView(APIView):
+    '''
+        RoomStatsAPIView -> [from, to] oralig'idagi xonalar bandligi
+        (foizda) xona, xona turi yoki hafta kuni bo'yicha.
+
+        maqsadi -> bandlikni bookinglardan hisoblamaslik: natija faqat
+        RoomDailyUsage yig'indilari va xonalarning ish vaqtidan olinadi.
+        Bandlik foizi -> band vaqt / oraliqdagi ish vaqti.
+    '''
+    group_by_fields = {
+        'room': 'room_id',
+        'type': 'room__type',
+        'weekday': 'weekday',
+    }
+
+    def get_dates(self):
+        from_ = self.request.query_params.get('from')
+        to = self.request.query_params.get('to')
+        last = parse_date(to) if to else timezone.localdate()
+        first = parse_date(from_) if from_ else last - timedelta(days=29)
+        return first, last
+
+    def get_usage(self, first, last, group_by):
+        queryset = RoomDailyUsage.objects.filter(date__gte=first, date__lte=last)
+        if group_by == 'weekday':
+            queryset = queryset.annotate(weekday=ExtractIsoWeekDay('date'))
+        field = self.group_by_fields[group_by]
+        return {
+            row[field]: row
+            for row in queryset.values(field).annotate(
+                seconds=Sum('booked_seconds'), count=Sum('bookings')
+            ).order_by()
+        }
+
+    def working_seconds(self, room):
+        opening_time, closing_time = room.opening_time, room.closing_time
+        return (
+            (closing_time.hour - opening_time.hour) * 3600
+            + (closing_time.minute - opening_time.minute) * 60
+            + closing_time.second - opening_time.second
+        )
+
+    def get_groups(self, first, last, group_by):
+        '''
+            get_groups -> har bir guruh uchun (kalit, qo'shimcha maydonlar,
+            oraliqdagi ish vaqti sekundlarda) ro'yhati.
+        '''
+        days = (last - first).days + 1
+        rooms = Room.objects.order_by('id').only('id', 'name', 'type', 'opening_time', 'closing_time')
+
+        if group_by == 'room':
+            return [
+                (room.pk, {"room": room.pk, "name": room.name, "type": room.type},
+                 self.working_seconds(room) * days)
+                for room in rooms
+            ]
+
+        if group_by == 'type':
+            available = defaultdict(int)
+            for room in rooms:
+                available[room.type] += self.working_seconds(room) * days
+            return [
+                (type, {"type": type}, available[type])
+                for type, _ in Room.ROOM_TYPES if type in available
+            ]
+
+        weekly = sum(self.working_seconds(room) for room in rooms)
+        return [
+            (weekday, {"weekday": weekday}, weekly * count)
+            for weekday, count in sorted(week_days(first, last).items())
+        ]
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get('group_by', 'room')
+        if group_by not in self.group_by_fields:
+            return Response(
+                {"error": "group_by qiymati room, type yoki weekday bo'lishi kerak"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            first, last = self.get_dates()
+        except ValueError:
+            return Response(
+                {"error": "sanani YYYY-MM-DD yoki DD-MM-YYYY ko'rinishida kiriting"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if last < first:
+            return Response(
+                {"error": "from sanasi to sanasidan keyin kelolmaydi!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        usage = self.get_usage(first, last, group_by)
+        results = []
+        for key, fields, available in self.get_groups(first, last, group_by):
+            row = usage.get(key, {})
+            seconds = row.get('seconds') or 0
+            results.append({
+                **fields,
+                "bookings": row.get('count') or 0,
+                "booked_minutes": round(seconds / 60, 2),
+                "available_minutes": round(available / 60, 2),
+                # RoomHeatmapAPIView bilan bir xil: 0 dan 1 gacha ulush
+                "utilization": round(seconds / available, 4) if available else 0,
+            })
+
+        return Response(
+            {
+                "from": first.isoformat(),
+                "to": last.isoformat(),
+                "group_by": group_by,
+                "results": results,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class NextSlotsAPIView(RoomAvailabiltyAPIView):
+    '''
+        NextSlotsAPIView -> xonaning yaqin kunlardagi eng birinchi
+        `count` ta bo'sh oraliqlarini qaytaradi.
+
+        maqsadi -> availability ni kunma-kun so'rash o'rniga butun davr
+        bookinglarini bitta so'rov bilan olish va ularni bir marta
+        ko'rib chiqib, yetarli oraliq topilganda to'xtash.
+    '''
+    default_count = 5
+    max_count = 50
+    default_days = 14
+    max_days = 90
+
+    def get_int_param(self, name, default, maximum):
+        value = int(self.request.query_params.get(name, default))
+        if value < 1:
+            raise ValueError(f"{name} musbat son bo'lishi kerak")
+        return min(value, maximum)
+
+    def get(self, request, pk, *args, **kwargs):
+        try:
+            room = self.get_room()
+        except Room.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            duration = parse_duration(request.query_params.get('duration', '1h'))
+            count = self.get_int_param('count', self.default_count, self.max_count)
+            days = self.get_int_param('days', self.default_days, self.max_days)
+        except ValueError:
+            return Response(
+                {
+                    "error": "duration '45m', '1h30m' ko'rinishida, count va days esa musbat son bo'lishi kerak"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.localtime().replace(microsecond=0)
+        dates = [now.date() + timedelta(days=i) for i in range(days)]
+        _, horizon_end = day_range(dates[-1])
+
+        # butun davr uchun bookinglar va faol holdlar bitta range so'rov bilan olinadi
+        bookings = with_holds(
+            Booking.objects.filter(room=room, end__gt=now, start__lt=horizon_end),
+            room.pk, now, horizon_end
+        ).order_by('start').iterator()
+
+        slots = islice(iter_free_slots(room, bookings, dates, duration, now), count)
+        data = format_intervals(slots)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class BatchBookingView(APIView):
+    '''
+        BatchBookingView -> bir nechta xonani bitta so'rovda band qiladi.
+
+        maqsadi -> har bir booking uchun alohida so'rov yubormaslik.
+        Har bir xona uchun mavjud bookinglar bitta so'rov bilan olinadi va
+        batch ichidagi bookinglar bilan birga xotirada tekshiriladi,
+        residentlar va bookinglar bulk_create bilan saqlanadi.
+
+        mode:
+            atomic: bitta xato bo'lsa ham hech narsa saqlanmaydi,
+            best_effort: to'g'ri bookinglar saqlanadi, qolganlari uchun xato qaytadi
+    '''
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchBookingSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        mode = serializer.validated_data['mode']
+        items = serializer.validated_data['bookings']
+
+        results = [None] * len(items)
+        valid_items = {}
+        for index, item in enumerate(items):
+            item_serializer = BatchBookingItemSerializer(data=item)
+            if item_serializer.is_valid():
+                valid_items[index] = item_serializer.validated_data
+            else:
+                results[index] = {"index": index, "status": "invalid", "errors": item_serializer.errors}
+
+        try:
+            return run_with_retry(lambda: self.book(mode, valid_items, list(results)))
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def book(self, mode, valid_items, results):
+        with write_transaction():
+            rooms = Room.objects.select_for_update().in_bulk(
+                {item['room'] for item in valid_items.values()}
+            )
+
+            # bazaga murojaat qilmasdan tekshiriladigan qoidalar
+            room_items = defaultdict(list)
+            for index, item in valid_items.items():
+                room = rooms.get(item['room'])
+                if room is None:
+                    results[index] = {"index": index, "status": "invalid", "errors": {"room": ["topilmadi"]}}
+                    continue
+
+                start = timezone.localtime(item['start'])
+                end = timezone.localtime(item['end'])
+                try:
+                    check_booking_period(room, start, end)
+                except ValidationError as exc:
+                    results[index] = {"index": index, "status": "invalid", "errors": exc.detail}
+                    continue
+
+                room_items[room.pk].append((index, start, end, item['resident']['name']))
+
+            # har bir xona uchun bitta so'rov: mavjud bookinglar, faol holdlar
+            # va batch ichidagi oldingi bookinglar bilan kesishishni tekshirish
+            accepted = []
+            for room_id, items in room_items.items():
+                first_start = min(start for _, start, _, _ in items)
+                last_end = max(end for _, _, end, _ in items)
+                occupied = IntervalSet(with_holds(
+                    Booking.objects.filter(room_id=room_id, end__gt=first_start, start__lt=last_end),
+                    room_id, first_start, last_end
+                ))
+
+                for index, start, end, name in items:
+                    if occupied.overlaps(start, end):
+                        results[index] = {
+                            "index": index, "status": "conflict",
+                            "error": "uzr, siz tanlagan vaqtda xona band"
+                        }
+                    else:
+                        occupied.add(start, end)
+                        accepted.append((index, room_id, start, end, name))
+
+            failed = any(result is not None for result in results)
+            if mode == 'atomic' and failed:
+                for index, *_ in accepted:
+                    results[index] = {"index": index, "status": "skipped"}
+                return Response(
+                    {"mode": mode, "created": 0, "results": results},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            residents = self.get_residents({name for *_, name in accepted})
+            bookings = Booking.objects.bulk_create([
+                Booking(room_id=room_id, resident_id=residents[name], start=start, end=end)
+                for _, room_id, start, end, name in accepted
+            ])
+            # bulk_create signal yubormaydi
+            bookings_changed(
+                added=[(booking.room_id, booking.start, booking.end, booking.pk) for booking in bookings],
+                rooms=rooms
+            )
+
+        for (index, *_), booking in zip(accepted, bookings):
+            results[index] = {"index": index, "status": "created", "id": booking.pk}
+
+        return Response(
+            {"mode": mode, "created": len(bookings), "results": results},
+            status=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_201_CREATED
+        )
+
+    def get_residents(self, names):
+        '''
+            get_residents -> metodi resident nomlariga mos id larni
+            qaytaradi, bazada yo'q residentlar bitta bulk_create bilan
+            yaratiladi.
+        '''
+        residents = dict(
+            Resident.objects.filter(name__in=names).order_by('-id').values_list('name', 'id')
+        )
+        missing = [Resident(name=name) for name in names if name not in residents]
+        for resident in Resident.objects.bulk_create(missing):
+            residents[resident.name] = resident.pk
+        return residents
+
+
+class BookingSeriesView(APIView):
+    '''
+        BookingSeriesView -> takrorlanuvchi booking yaratadi, masalan
+        "har seshanba 10:00-11:00, 26 hafta".
+
+        maqsadi -> barcha takrorlarni bitta so'rovda tekshirish: series
+        davridagi mavjud bookinglar bitta range so'rov bilan olinadi va
+        takrorlar bilan bitta merge o'tishida solishtiriladi.
+    '''
+
+    def post(self, request, pk, *args, **kwargs):
+        serializer = BookingSeriesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return run_with_retry(lambda: self.create_series(serializer.validated_data))
+        except Room.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def create_series(self, data):
+        with write_transaction():
+            room = Room.objects.select_for_update().get(id=self.kwargs.get('pk'))
+            series = BookingSeries(
+                room=room,
+                start=timezone.localtime(data['start']),
+                end=timezone.localtime(data['end']),
+                interval_days=data['interval_days'],
+                occurrences=data['occurrences'],
+            )
+            times = series.occurrence_times()
+
+            try:
+                for start, end in times:
+                    check_booking_period(room, start, end)
+            except ValidationError as exc:
+                error = exc.detail[0]
+                return Response({error.code: str(error)}, status=status.HTTP_410_GONE)
+
+            bookings = with_holds(
+                Booking.objects.filter(room=room, end__gt=times[0][0], start__lt=times[-1][1]),
+                room.pk, times[0][0], times[-1][1]
+            ).order_by('start')
+            conflicts = find_conflicts(times, bookings)
+            if conflicts:
+                return Response(
+                    {
+                        "error": "uzr, siz tanlagan vaqtda xona band",
+                        "conflicts": format_intervals(conflicts)
+                    },
+                    status=status.HTTP_410_GONE
+                )
+
+            series.resident, _ = Resident.objects.get_or_create(name=data['resident']['name'])
+            series.save()
+            bookings = Booking.objects.bulk_create([
+                Booking(room=room, resident=series.resident, series=series, start=start, end=end)
+                for start, end in times
+            ])
+            bookings_changed(
+                added=[(room.pk, booking.start, booking.end, booking.pk) for booking in bookings],
+                rooms={room.pk: room}
+            )
+
+        return Response(
+            {
+                "id": series.pk,
+                "message": "xona muvaffaqiyatli band qilindi",
+                "occurrences": format_intervals(times)
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class BookingSeriesDetailView(APIView):
+    '''
+        BookingSeriesDetailView -> takrorlanuvchi bookingni ko'rish,
+        kelgusi takrorlarining vaqtini o'zgartirish (PATCH) yoki ularni
+        bekor qilish (DELETE). O'zgarishlar barcha takrorlarga bitta
+        so'rovda qo'llanadi.
+    '''
+
+    def get_series(self):
+        return BookingSeries.objects.select_related('room', 'resident').get(id=self.kwargs.get('pk'))
+
+    def get(self, request, pk, *args, **kwargs):
+        try:
+            series = self.get_series()
+        except BookingSeries.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+
+        bookings = series.bookings.order_by('start').values_list('start', 'end')
+        return Response(
+            {
+                "id": series.pk,
+                "room": series.room_id,
+                "resident": series.resident.name,
+                "interval_days": series.interval_days,
+                "occurrences": format_intervals(bookings)
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def patch(self, request, pk, *args, **kwargs):
+        serializer = BookingSeriesUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return run_with_retry(lambda: self.update_series(**serializer.validated_data))
+        except BookingSeries.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            return Response(
+                {"error": "xona hozir band qilinmoqda, birozdan so'ng qayta urinib ko'ring"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"}
+            )
+
+    def update_series(self, start_time, end_time):
+        with write_transaction():
+            series = self.get_series()
+            room = Room.objects.select_for_update().get(id=series.room_id)
+
+            # faqat hali boshlanmagan takrorlar o'zgartiriladi
+            bookings = list(series.bookings.filter(start__gte=timezone.now()).order_by('start'))
+            if not bookings:
+                return Response({"error": "o'zgartirish uchun takrorlar qolmagan"}, status=status.HTTP_410_GONE)
+
+            previous = [(booking.room_id, booking.start, booking.end, booking.pk) for booking in bookings]
+            times = []
+            for booking in bookings:
+                date_ = timezone.localtime(booking.start).date()
+                times.append((
+                    timezone.make_aware(datetime.combine(date_, start_time)),
+                    timezone.make_aware(datetime.combine(date_, end_time)),
+                ))
+
+            try:
+                for start, end in times:
+                    check_booking_period(room, start, end)
+            except ValidationError as exc:
+                error = exc.detail[0]
+                return Response({error.code: str(error)}, status=status.HTTP_410_GONE)
+
+            others = with_holds(
+                Booking.objects.filter(
+                    room=room, end__gt=times[0][0], start__lt=times[-1][1]
+                ).exclude(series=series),
+                room.pk, times[0][0], times[-1][1]
+            ).order_by('start')
+            conflicts = find_conflicts(times, others)
+            if conflicts:
+                return Response(
+                    {
+                        "error": "uzr, siz tanlagan vaqtda xona band",
+                        "conflicts": format_intervals(conflicts)
+                    },
+                    status=status.HTTP_410_GONE
+                )
+
+            for booking, (start, end) in zip(bookings, times):
+                booking.start, booking.end = start, end
+            Booking.objects.bulk_update(bookings, ['start', 'end'])
+            bookings_changed(
+                added=[(room.pk, booking.start, booking.end, booking.pk) for booking in bookings],
+                removed=previous,
+                rooms={room.pk: room}
+            )
+
+        return Response(
+            {
+                "id": series.pk,
+                "message": "takrorlar vaqti o'zgartirildi",
+                "occurrences": format_intervals(times)
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def delete(self, request, pk, *args, **kwargs):
+        try:
+            with write_transaction():
+                series = self.get_series()
+                # o'tib ketgan takrorlar tarix sifatida qoladi
+                bookings = series.bookings.filter(start__gte=timezone.now())
+                # har bir booking uchun post_delete o'rniga bitta bookings_changed
+                # (BookingQuerySet.delete), Bookingga FK lar yo'q
+                cancelled, _ = bookings.delete(rooms={series.room_id: series.room})
+                # arxivlangan takrorlar ham series ga CASCADE bilan bog'langan
+                if not series.bookings.exists() and not series.archived_bookings.exists():
+                    series.delete()
+        except BookingSeries.DoesNotExist:
+            return Response({"error": "topilmadi"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(
+            {"message": "takrorlar bekor qilindi", "cancelled": cancelled},
+            status=status.HTTP_200_OK
+        )
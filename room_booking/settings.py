@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'booking.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'booking.query_budget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'room_booking.urls'
@@ -82,10 +85,137 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# 'availability' keshida har bir (xona, sana) uchun bo'sh oraliqlar saqlanadi.
+# LocMemCache eng kam ishlatilgan yozuvni birinchi o'chiradi (LRU),
+# CULL_FREQUENCY = MAX_ENTRIES bo'lganda to'lganda bittadan yozuv o'chiriladi.
+AVAILABILITY_CACHE_SIZE = 10000
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'availability': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'availability',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': AVAILABILITY_CACHE_SIZE,
+            'CULL_FREQUENCY': AVAILABILITY_CACHE_SIZE,
+        },
+    },
+}
+
+# Xonani band qilishda qulf to'qnashuvi bo'lsa nechta marta va qancha
+# (sekund, har urinishda ikki barobar oshadi) kutib qayta urinish
+BOOKING_WRITE_RETRIES = 5
+BOOKING_WRITE_BACKOFF = 0.01
+
+# POST /api/rooms/bookings/batch/ bitta so'rovda qabul qiladigan bookinglar soni
+BOOKING_BATCH_MAX_SIZE = 5000
+
+# POST /api/rooms/<pk>/hold/: vaqtincha band qilish (hold) muddati (sekund),
+# mijoz so'rashi mumkin bo'lgan maksimal muddat va sweep_holds buyrug'i
+# muddati o'tgan holdlarni o'chirish oralig'i (sekund)
+BOOKING_HOLD_TTL = 120
+BOOKING_HOLD_MAX_TTL = 900
+BOOKING_HOLD_SWEEP_INTERVAL = 60
+
+# archive_bookings: shu kundan eski (tugagan) bookinglar ArchivedBooking ga
+# ko'chiriladi, bitta tranzaksiyada ko'chiriladigan bookinglar soni
+BOOKING_ARCHIVE_DAYS = 90
+BOOKING_ARCHIVE_CHUNK_SIZE = 1000
+
+# takrorlanuvchi booking (series) ning maksimal takrorlari soni
+BOOKING_SERIES_MAX_OCCURRENCES = 104
+
+# xonalar ro'yhatini sahifalash usuli: 'page' (page/count) yoki 'cursor'
+ROOMS_PAGINATION = 'page'
+
+# GET /api/rooms/heatmap/ bandlik massivlarining bitta katakchasi (daqiqa,
+# 1440 ga bo'linishi kerak) va bitta so'rovdagi maksimal kunlar soni
+OCCUPANCY_SLOT_MINUTES = 1
+OCCUPANCY_MAX_DAYS = 31
+
+# GET /api/bookings/export/ bazadan bir marta o'qiydigan qatorlar soni
+BOOKING_EXPORT_CHUNK_SIZE = 2000
+
+# GET /api/rooms/<pk>/calendar.ics: bugundan necha kun oldingi va keyingi
+# bookinglar beriladi, kalendar ilovalari uchun Cache-Control max-age (sekund)
+ROOM_CALENDAR_PAST_DAYS = 30
+ROOM_CALENDAR_FUTURE_DAYS = 365
+ROOM_CALENDAR_MAX_AGE = 300
+
+# GET /api/rooms/changes/stream: outbox jadvalini tekshirish oralig'i,
+# keep-alive izohlari oralig'i (sekund), ketma-ketlikdagi bo'shliqni
+# (hali commit bo'lmagan hodisa) kutish vaqti va hodisalar saqlanadigan kunlar
+CHANGEFEED_POLL_INTERVAL = 1.0
+CHANGEFEED_KEEPALIVE = 15
+CHANGEFEED_GAP_TIMEOUT = 5.0
+CHANGEFEED_RETENTION_DAYS = 7
+
+# QueryBudgetMiddleware: URL nomi bo'yicha bitta so'rovdagi SQL so'rovlari
+# budjeti. ENFORCE=True bo'lsa (dev, test) QUERY_BUDGETS dagi view larning
+# budjetdan oshishi xatolik bilan to'xtatiladi, qolganlari (va production da
+# hammasi) 'booking.query_budget' loggeriga yoziladi.
+# Bir xil parametrli takroriy so'rovlar soni, N+1 deb hisoblanadigan bir xil
+# SQL shabloni takrorlanishi va loggerga yoziladigan DB vaqti (ms) chegarasi.
+# availability: versiyalar, xona, BookingIndex yuklash va faol holdlar;
+# room-booking ga BookingIndex hisoblagichini tekshirish ham kiradi
+QUERY_BUDGETS = {
+    'rooms': 3,
+    'room-detail': 2,
+    'room-booking': 18,
+    'availability': 4,
+}
+QUERY_BUDGET_ENFORCE = DEBUG
+QUERY_BUDGET_MAX_DUPLICATES = 0
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+QUERY_BUDGET_SLOW_MS = 200
+
+# 'booking.*' loggerlari (booking.query_budget, booking.changefeed):
+# WARNING va undan yuqori yozuvlar stderr ga
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'booking': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# GET /metrics: ko'p jarayonli (gunicorn) ishga tushirishda har bir worker
+# metrikalarini yozadigan umumiy papka (deploy boshida tozalanadi), None
+# bo'lsa faqat joriy jarayon metrikalari beriladi. Faylga yozish oralig'i
+# (sekund), so'rov vaqti histogrammasi chegaralari (sekund) va natijalari
+# booking_outcomes_total ga yoziladigan band qilish view lari
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_BOOKING_VIEWS = ('room-booking', 'booking-batch', 'booking-series', 'booking-hold-confirm')
+
+# Tanlangan so'rovlarni profillash (BookingRoomView, RoomAvailabiltyAPIView):
+# imzolangan qiymat yuboriladigan sarlavha (`python manage.py profile_token`)
+# va uning amal qilish muddati (sekund), tasodifiy profillanadigan so'rovlar
+# ulushi (0 - o'chiq), profillar papkasi va saqlanadigan profillar soni
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_KEEP = 100
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
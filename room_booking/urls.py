@@ -4,6 +4,10 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from booking.export import BookingExportView
+from booking.metrics import metrics_view
+from booking.profiling import ProfileDetailView, ProfileListView, ProfileStacksView
+
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -27,4 +31,10 @@ urlpatterns = [
     ),
     path('admin/', admin.site.urls),
     path('api/rooms/', include('booking.urls')),
+    path('api/async/rooms/', include('booking.async_urls')),
+    path('api/bookings/export/', BookingExportView.as_view(), name='bookings-export'),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/profiles/', ProfileListView.as_view(), name='profiles'),
+    path('api/profiles/<str:name>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('api/profiles/<str:name>/collapsed/', ProfileStacksView.as_view(), name='profile-stacks'),
 ]